@@ -4,13 +4,21 @@ Multi-Agent System with Receptionist, Clinical, and Web Search Agents
 """
 import streamlit as st
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from typing import Tuple
 import sys
+import uuid
+
+import orjson
 
 # Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent))
+_HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(_HERE))
 
-from multi_agent_orchestrator import MultiAgentOrchestrator, AgentType
+from multi_agent_orchestrator import (
+    MultiAgentOrchestrator, AgentType, SharedResources, create_shared_resources
+)
 from config import MEDICAL_DISCLAIMER, VECTOR_STORE_TYPE
 from logger_system import get_logger
 
@@ -24,7 +32,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better UI
-st.markdown("""
+APP_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -87,14 +95,20 @@ st.markdown("""
         border-radius: 8px;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_resources() -> SharedResources:
+    """LLM client, vectorstore and tools shared by all browser sessions"""
+    return create_shared_resources()
 
 
 # Initialize session state
 def init_session_state():
     """Initialize Streamlit session state"""
     if 'orchestrator' not in st.session_state:
-        st.session_state.orchestrator = MultiAgentOrchestrator()
+        st.session_state.orchestrator = MultiAgentOrchestrator(shared=get_shared_resources())
         st.session_state.logger = get_logger()
     
     if 'messages' not in st.session_state:
@@ -107,30 +121,91 @@ def init_session_state():
         st.session_state.session_start_time = None
 
 
+AGENT_BADGE_CLASSES = {
+    "receptionist": "receptionist-badge",
+    "clinical": "clinical-badge",
+    "web_search": "web-search-badge"
+}
+
+AGENT_DISPLAY_NAMES = {
+    "receptionist": "🏨 Receptionist",
+    "clinical": "⚕️ Clinical AI",
+    "web_search": "🌐 Web Search"
+}
+
+KB_SOURCE_BOX_TEMPLATE = """
+<div class="source-box">
+    📚 <strong>Source:</strong> Nephrology Knowledge Base<br>
+    <strong>References:</strong> {count} document(s) with relevance scores
+</div>
+"""
+
+PATIENT_CONTEXT_TEMPLATE = """
+- **Name:** {name}
+- **Diagnosis:** {diagnosis}
+- **Discharge Date:** {discharge_date}
+"""
+
+
+@lru_cache(maxsize=8)
 def render_agent_badge(agent_name: str):
     """Render agent badge with appropriate styling"""
-    badge_class = {
-        "receptionist": "receptionist-badge",
-        "clinical": "clinical-badge",
-        "web_search": "web-search-badge"
-    }.get(agent_name, "receptionist-badge")
-    
-    display_name = {
-        "receptionist": "🏨 Receptionist",
-        "clinical": "⚕️ Clinical AI",
-        "web_search": "🌐 Web Search"
-    }.get(agent_name, "🤖 Assistant")
+    badge_class = AGENT_BADGE_CLASSES.get(agent_name, "receptionist-badge")
+    display_name = AGENT_DISPLAY_NAMES.get(agent_name, "🤖 Assistant")
     
     return f'<span class="agent-badge {badge_class}">{display_name}</span>'
 
 
-def render_message(role: str, content: str, agent_name: str = None, metadata: dict = None):
+def make_message(role: str, content: str, agent_name: str = None, metadata: dict = None) -> dict:
+    """Create a chat message with a stable id used as its render cache key"""
+    return {
+        "id": uuid.uuid4().hex,
+        "role": role,
+        "content": content,
+        "agent": agent_name,
+        "metadata": metadata or {}
+    }
+
+
+def _build_message_html(agent_name: str, metadata: dict) -> Tuple[str, str]:
+    """Build the badge and knowledge-base source HTML for an assistant message"""
+    badge_html = render_agent_badge(agent_name) if agent_name else ""
+    
+    source_html = ""
+    if metadata and metadata.get("source_type") == "nephrology_knowledge_base":
+        sources = metadata.get("sources", [])
+        if sources:
+            source_html = KB_SOURCE_BOX_TEMPLATE.format(count=len(sources))
+    
+    return badge_html, source_html
+
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def render_message_html(msg_id: str, _agent_name: str, _metadata: dict) -> Tuple[str, str]:
+    """Cached HTML fragments for a stored message, keyed only on its id"""
+    return _build_message_html(_agent_name, _metadata)
+
+
+def render_message(
+    role: str,
+    content: str,
+    agent_name: str = None,
+    metadata: dict = None,
+    msg_id: str = None
+):
     """Render a chat message with appropriate styling"""
     
+    badge_html = source_html = ""
+    if role == "assistant":
+        if msg_id:
+            badge_html, source_html = render_message_html(msg_id, agent_name, metadata)
+        else:
+            badge_html, source_html = _build_message_html(agent_name, metadata)
+    
     with st.chat_message(role):
         # Show agent badge for assistant messages
-        if role == "assistant" and agent_name:
-            st.markdown(render_agent_badge(agent_name), unsafe_allow_html=True)
+        if badge_html:
+            st.markdown(badge_html, unsafe_allow_html=True)
         
         # Show message content
         st.markdown(content)
@@ -142,14 +217,8 @@ def render_message(role: str, content: str, agent_name: str = None, metadata: di
                 source_type = metadata["source_type"]
                 
                 if source_type == "nephrology_knowledge_base":
-                    sources = metadata.get("sources", [])
-                    if sources:
-                        st.markdown(f"""
-                        <div class="source-box">
-                            📚 <strong>Source:</strong> Nephrology Knowledge Base<br>
-                            <strong>References:</strong> {len(sources)} document(s) with relevance scores
-                        </div>
-                        """, unsafe_allow_html=True)
+                    if source_html:
+                        st.markdown(source_html, unsafe_allow_html=True)
                 
                 elif source_type == "web_search":
                     sources = metadata.get("sources", [])
@@ -165,16 +234,34 @@ def render_message(role: str, content: str, agent_name: str = None, metadata: di
                     patient = patient["patient"]
                 
                 with st.expander("📋 Patient Context Applied"):
-                    st.markdown(f"""
-                    - **Name:** {patient.get('patient_name', 'N/A')}
-                    - **Diagnosis:** {patient.get('primary_diagnosis', 'N/A')}
-                    - **Discharge Date:** {patient.get('discharge_date', 'N/A')}
-                    """)
+                    st.markdown(PATIENT_CONTEXT_TEMPLATE.format(
+                        name=patient.get('patient_name', 'N/A'),
+                        diagnosis=patient.get('primary_diagnosis', 'N/A'),
+                        discharge_date=patient.get('discharge_date', 'N/A')
+                    ))
+
+
+def serialize_conversation_log(orchestrator: MultiAgentOrchestrator) -> bytes:
+    """
+    Serialize the conversation log to JSON, rebuilt only when the log grows
+    
+    Kept in this session's state: a process-wide cache would hold other
+    patients' conversations and could mix up sessions started together.
+    """
+    key = (st.session_state.session_start_time, orchestrator.interaction_count)
+    cached = st.session_state.get("conversation_log_export")
+    if cached is None or cached[0] != key:
+        data = orjson.dumps(orchestrator.get_conversation_log(), option=orjson.OPT_INDENT_2)
+        cached = st.session_state.conversation_log_export = (key, data)
+    return cached[1]
 
 
 def main():
     """Main application function"""
     
+    # Inject custom styles
+    st.markdown(APP_CSS, unsafe_allow_html=True)
+    
     # Initialize session state
     init_session_state()
     
@@ -224,12 +311,9 @@ def main():
                 st.session_state.session_start_time = datetime.now()
                 
                 # Add greeting to messages
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": greeting,
-                    "agent": "receptionist",
-                    "metadata": {}
-                })
+                st.session_state.messages.append(
+                    make_message("assistant", greeting, "receptionist")
+                )
                 
                 st.rerun()
         else:
@@ -245,12 +329,12 @@ def main():
             
             with col2:
                 if st.button("📥 Download Log", use_container_width=True):
-                    log = st.session_state.orchestrator.get_conversation_log()
+                    orchestrator = st.session_state.orchestrator
                     st.download_button(
                         "Save Conversation",
-                        data=str(log),
-                        file_name=f"conversation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                        mime="text/plain",
+                        data=serialize_conversation_log(orchestrator),
+                        file_name=f"conversation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                        mime="application/json",
                         use_container_width=True
                     )
         
@@ -306,40 +390,53 @@ def main():
                 message["role"],
                 message["content"],
                 message.get("agent"),
-                message.get("metadata")
+                message.get("metadata"),
+                msg_id=message.get("id")
             )
         
         # Chat input
         if prompt := st.chat_input("Type your message here..."):
             # Add user message
-            st.session_state.messages.append({
-                "role": "user",
-                "content": prompt,
-                "agent": None,
-                "metadata": {}
-            })
+            user_message = make_message("user", prompt)
+            st.session_state.messages.append(user_message)
             
             # Display user message
-            render_message("user", prompt)
+            render_message("user", prompt, msg_id=user_message["id"])
+            
+            # Process message through orchestrator, showing text as it streams
+            result = {}
+            
+            def response_text():
+                for item in st.session_state.orchestrator.process_message_stream(prompt):
+                    if isinstance(item, dict):
+                        result.update(item)
+                    else:
+                        yield item
             
-            # Process message through orchestrator
+            live = st.empty()
             with st.spinner("Processing..."):
-                result = st.session_state.orchestrator.process_message(prompt)
+                with live.container():
+                    with st.chat_message("assistant"):
+                        st.write_stream(response_text())
+            # Replaced below by the fully styled message
+            live.empty()
             
             # Add assistant response
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": result["response"],
-                "agent": result.get("current_agent"),
-                "metadata": result.get("metadata", {})
-            })
+            assistant_message = make_message(
+                "assistant",
+                result["response"],
+                result.get("current_agent"),
+                result.get("metadata", {})
+            )
+            st.session_state.messages.append(assistant_message)
             
             # Display assistant response
             render_message(
                 "assistant",
                 result["response"],
                 result.get("current_agent"),
-                result.get("metadata")
+                result.get("metadata"),
+                msg_id=assistant_message["id"]
             )
             
             # Show action notification if needed
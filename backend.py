@@ -1,8 +1,11 @@
 #currently not used but we can utilize it 
 import os
 import uuid
+import asyncio
+import hashlib
 import uvicorn
-from datetime import datetime
+import chromadb
+from datetime import datetime, timezone
 from typing import Optional
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -13,9 +16,10 @@ from dotenv import load_dotenv
 from agent_orchestrator import orchestrator
 from logger import log_event
 from utils import load_and_chunk_pdf, build_or_load_chroma
+from config import COLLECTION_NAME
 import shutil
 from fastapi import UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 
 # Load environment variables
 load_dotenv()
@@ -26,18 +30,58 @@ load_dotenv()
 def init_patient_db():
     pass
 
+DEFAULT_PDF = "data/nephrology.pdf"
+CHROMA_DIR = "chroma_db"
+PDF_HASH_FILE = os.path.join(CHROMA_DIR, ".pdf_hash")
+
+def _pdf_fingerprint(pdf_path: str) -> str:
+    """SHA-256 of the PDF contents, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        while block := f.read(1 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _read_stored_fingerprint() -> Optional[str]:
+    """Fingerprint of the PDF the vectorstore was last built from"""
+    try:
+        with open(PDF_HASH_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+# Raised by get_collection for a missing collection (ValueError before chromadb 0.6)
+try:
+    from chromadb.errors import NotFoundError
+    _CollectionNotFound = (NotFoundError, ValueError)
+except ImportError:
+    _CollectionNotFound = ValueError
+
+def _collection_count() -> int:
+    """Number of vectors already persisted in the knowledge base collection"""
+    try:
+        client = chromadb.PersistentClient(path=CHROMA_DIR)
+        # Read-only check: never create an empty collection here
+        return client.get_collection(COLLECTION_NAME).count()
+    except _CollectionNotFound:
+        return 0
+    except Exception as e:
+        log_event(f"[Startup] Could not read ChromaDB collection: {str(e)}")
+        return 0
+
 # Preload and ingest the default PDF if it exists
 def preload_pdf():
-    import time
-    
-    default_pdf = "data/nephrology.pdf"
-    chroma_dir = "chroma_db"
-    
-    if not os.path.exists(default_pdf):
+    if not os.path.exists(DEFAULT_PDF):
         log_event("[Startup] Default PDF not found, skipping preload")
         return
         
     try:
+        # Rebuild only when the PDF changed or the collection is empty
+        fingerprint = _pdf_fingerprint(DEFAULT_PDF)
+        if fingerprint == _read_stored_fingerprint() and _collection_count() > 0:
+            log_event("[Startup] Chroma up-to-date, skipping rebuild")
+            return True
+        
         log_event("[Startup] Preloading default PDF...")
         
         # Do not delete directory; instead rebuild collection safely
@@ -61,6 +105,10 @@ def preload_pdf():
                 except Exception as e:
                     log_event(f"[Startup] Error verifying ChromaDB: {str(e)}")
             
+            os.makedirs(CHROMA_DIR, exist_ok=True)
+            with open(PDF_HASH_FILE, "w", encoding="utf-8") as f:
+                f.write(fingerprint)
+            
             log_event("[Startup] Default PDF preloaded successfully")
             return True
             
@@ -75,12 +123,14 @@ def preload_pdf():
         log_event(f"[Startup] Traceback: {traceback.format_exc()}")
         return False
 
-preload_pdf()
-
 # ----------------------------
 # 2. App
 # ----------------------------
-app = FastAPI(title="Post-Discharge AI Assistant")
+# orjson encodes every JSON response; /logs still streams via FileResponse
+app = FastAPI(
+    title="Post-Discharge AI Assistant",
+    default_response_class=ORJSONResponse
+)
 
 # Enable CORS
 app.add_middleware(
@@ -91,7 +141,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Import agent AFTER preload so retriever sees a populated vectorstore
+def _now_iso() -> str:
+    """Current UTC time as an ISO-8601 string"""
+    return datetime.now(timezone.utc).isoformat()
+
+@app.on_event("startup")
+async def _startup():
+    """Preload the default PDF once per process, off the event loop"""
+    await asyncio.get_running_loop().run_in_executor(None, preload_pdf)
 
 # Models
 class ChatRequest(BaseModel):
@@ -109,17 +166,24 @@ class ChatResponse(BaseModel):
 @app.post("/chat", response_model=ChatResponse)
 async def chat(chat_request: ChatRequest):
     """Main chat endpoint that handles all user messages."""
+    # Resolve the session id once so the orchestrator and the client agree
+    session_id = chat_request.session_id or str(uuid.uuid4())
+    timestamp = _now_iso()
+    
     try:
+        # Every turn reaches the orchestrator: it tracks intake and routing state
+        # across turns, so replaying an earlier reply would skip that turn.
+        # Repeated medical questions are served by the clinical agent's answer cache.
         response = orchestrator.process_message(
             user_input=chat_request.message,
-            session_id=chat_request.session_id or str(uuid.uuid4())
+            session_id=session_id
         )
         return {
             "response": response.get("response", "I'm sorry, I couldn't process that."),
-            "session_id": chat_request.session_id or str(uuid.uuid4()),
+            "session_id": session_id,
             "patient_context": response.get("patient"),
             "sources": response.get("sources", []),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": timestamp
         }
     except Exception as e:
         log_event(f"[API Error] {str(e)}")
@@ -130,12 +194,24 @@ async def health_check():
     """Health check endpoint."""
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": _now_iso()
     }
 
 # ----------------------------
 # 5. PDF Upload Endpoint
 # ----------------------------
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+def _save_upload(source, dest: str) -> None:
+    """Copy an uploaded file to disk in 1 MB blocks"""
+    with open(dest, "wb") as buffer:
+        shutil.copyfileobj(source, buffer, UPLOAD_CHUNK_SIZE)
+
+def _process_pdf(pdf_path: str) -> None:
+    """Chunk a PDF and rebuild the vectorstore from it"""
+    docs = load_and_chunk_pdf(pdf_path)
+    build_or_load_chroma(docs, force_rebuild=True)
+
 @app.post("/upload_pdf")
 async def upload_pdf(file: UploadFile = File(...)):
     if not file.filename.lower().endswith('.pdf'):
@@ -145,16 +221,17 @@ async def upload_pdf(file: UploadFile = File(...)):
     os.makedirs("data", exist_ok=True)
     
     # Save the uploaded file
+    # Blocking file I/O and embedding run on worker threads so the event
+    # loop keeps serving other requests during large uploads
+    loop = asyncio.get_running_loop()
     dest = "data/uploaded_document.pdf"
-    with open(dest, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    await loop.run_in_executor(None, _save_upload, file.file, dest)
     
     log_event(f"[API] PDF uploaded: {file.filename}")
     
     try:
         # Process the uploaded PDF
-        docs = load_and_chunk_pdf(dest)  # Pass the uploaded file path
-        build_or_load_chroma(docs, force_rebuild=True)
+        await loop.run_in_executor(None, _process_pdf, dest)
         log_event("[API] PDF processed and vectorstore updated")
         return {"detail": "PDF uploaded and processed successfully."}
     except Exception as e:
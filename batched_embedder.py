@@ -0,0 +1,87 @@
+"""
+Batched Query Embedder
+- Coalesces concurrent embedding requests into one encoder call
+- Requests arriving within a short window share a single padded batch
+- Amortizes the per-call model overhead across up to max_batch_size queries
+"""
+import asyncio
+from typing import Callable, List, Optional, Tuple
+
+# Defaults for interactive queries
+BATCH_MAX_SIZE = 32
+BATCH_WINDOW_S = 0.005
+
+
+class BatchedEmbedder:
+    """Async front-end that batches embed calls arriving close together"""
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int = BATCH_MAX_SIZE,
+        window_s: float = BATCH_WINDOW_S
+    ):
+        """
+        Args:
+            embed_batch: Blocking function embedding a list of texts in one call
+            max_batch_size: Most texts sent to embed_batch at once
+            window_s: How long to wait for more texts after the first arrives
+        """
+        self.embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.window_s = window_s
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self) -> None:
+        """Start the batching task on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._worker())
+
+    async def _worker(self) -> None:
+        """Drain queued texts and embed them together in one encoder call"""
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await queue.get()]
+            deadline = loop.time() + self.window_s
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = await loop.run_in_executor(None, self.embed_batch, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Queue a text for the next batch and wait for its embedding
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
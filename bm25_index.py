@@ -0,0 +1,243 @@
+"""
+BM25 Sparse Index Helpers
+- Shared tokenizer used both when building and when querying the index
+- Content-term extraction for the corpus vocabulary prefilter
+- BM25 postings stored as flat numpy arrays instead of a pickled object graph,
+  one .npy file per array so they can be memory-mapped at load
+- Per-posting BM25 weights precomputed once, so scoring is a sparse
+  matrix-vector product over the query's postings
+"""
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+# Word characters only, so punctuation never sticks to a term ("kidney," -> "kidney")
+TOKEN_PATTERN = r"\w+"
+_TOKEN_RE = re.compile(TOKEN_PATTERN, re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase BM25 terms
+
+    Args:
+        text: Raw chunk or query text
+
+    Returns:
+        List of terms
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+
+# Function words that say nothing about whether a query is on-topic
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been
+before being below between both but by can could did do does doing down during
+each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no
+nor not now of off on once only or other our ours ourselves out over own same
+she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours yourself
+yourselves tell know please get got need want like thanks thank hello hi
+""".split())
+
+
+def content_terms(text: str) -> Set[str]:
+    """
+    Distinct non-stopword terms of at least three characters
+
+    Args:
+        text: Raw chunk or query text
+
+    Returns:
+        Set of content terms
+    """
+    return {
+        term for term in tokenize(text)
+        if len(term) >= 3 and not term.isdigit() and term not in STOPWORDS
+    }
+
+
+class BM25Index:
+    """
+    Okapi BM25 over term-major postings
+
+    Postings for term t are doc_ids[indptr[t]:indptr[t+1]] with matching
+    term_freqs and precomputed BM25 weights. Scores match rank_bm25.BM25Okapi
+    for the same corpus.
+    """
+
+    def __init__(
+        self,
+        vocab: Sequence[str],
+        indptr: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        doc_len: np.ndarray,
+        idf: np.ndarray,
+        chunk_ids: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75,
+        weights: Optional[np.ndarray] = None,
+        token_pattern: str = TOKEN_PATTERN
+    ):
+        self.vocab = np.asarray(vocab)
+        self.term_to_id: Dict[str, int] = {term: i for i, term in enumerate(self.vocab.tolist())}
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_len = doc_len
+        self.idf = idf
+        self.chunk_ids = chunk_ids
+        self.k1 = float(k1)
+        self.b = float(b)
+
+        # Queries must be split exactly as the corpus was at build time
+        self.token_pattern = str(token_pattern)
+        self._token_re = (
+            _TOKEN_RE if self.token_pattern == TOKEN_PATTERN
+            else re.compile(self.token_pattern, re.UNICODE)
+        )
+
+        # tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)) for every posting,
+        # fixed once the corpus is built
+        if weights is None:
+            avgdl = float(doc_len.mean()) if len(doc_len) else 1.0
+            norm = self.k1 * (1 - self.b + self.b * np.asarray(doc_len, dtype=np.float64) / avgdl)
+            tf = np.asarray(term_freqs, dtype=np.float64)
+            weights = tf * (self.k1 + 1) / (tf + norm[doc_ids])
+        self.weights = weights
+
+    @classmethod
+    def from_bm25(cls, bm25, chunk_ids: Sequence[int]) -> "BM25Index":
+        """
+        Convert a fitted rank_bm25.BM25Okapi into flat postings
+
+        Args:
+            bm25: Fitted BM25Okapi instance
+            chunk_ids: Chunk id for each document, in corpus order
+
+        Returns:
+            BM25Index with identical scoring
+        """
+        vocab = sorted(bm25.idf)
+        term_to_id = {term: i for i, term in enumerate(vocab)}
+
+        postings: List[List[tuple]] = [[] for _ in vocab]
+        for doc_id, freqs in enumerate(bm25.doc_freqs):
+            for term, tf in freqs.items():
+                postings[term_to_id[term]].append((doc_id, tf))
+
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(p) for p in postings])
+        flat = [pair for term_postings in postings for pair in term_postings]
+
+        return cls(
+            vocab=vocab,
+            indptr=indptr,
+            doc_ids=np.array([d for d, _ in flat], dtype=np.int64),
+            term_freqs=np.array([tf for _, tf in flat], dtype=np.float64),
+            doc_len=np.asarray(bm25.doc_len, dtype=np.float64),
+            idf=np.array([bm25.idf[term] for term in vocab], dtype=np.float64),
+            chunk_ids=np.asarray(chunk_ids),
+            k1=bm25.k1,
+            b=bm25.b
+        )
+
+    def tokenize(self, text: str) -> List[str]:
+        """
+        Split query text with the tokenizer the index was built with
+
+        Args:
+            text: Raw query text
+
+        Returns:
+            List of terms
+        """
+        return self._token_re.findall(text.lower())
+
+    def get_scores(self, tokens: Sequence[str]) -> np.ndarray:
+        """
+        Score every document against a tokenized query
+
+        Args:
+            tokens: Query terms (repeated terms count repeatedly, as in rank_bm25)
+
+        Returns:
+            Array of BM25 scores, one per document
+        """
+        # Query vector: idf times how often each known term repeats
+        known = [
+            (self.term_to_id[term], count)
+            for term, count in Counter(tokens).items() if term in self.term_to_id
+        ]
+        if not known:
+            return np.zeros(len(self.doc_len), dtype=np.float64)
+        term_ids = np.array([t for t, _ in known], dtype=np.int64)
+        query_weights = self.idf[term_ids] * np.array([c for _, c in known], dtype=np.float64)
+
+        # Gather the query terms' postings and sum weight * query weight per document
+        starts, ends = self.indptr[term_ids], self.indptr[term_ids + 1]
+        postings = np.concatenate([np.arange(a, e) for a, e in zip(starts, ends)])
+        return np.bincount(
+            self.doc_ids[postings],
+            weights=self.weights[postings] * np.repeat(query_weights, ends - starts),
+            minlength=len(self.doc_len)
+        )
+
+    # Arrays written by save(), one <name>.npy file each
+    _ARRAYS = ("vocab", "indptr", "doc_ids", "term_freqs", "doc_len", "idf", "chunk_ids", "weights")
+
+    def save(self, path: Path) -> None:
+        """
+        Write the index as a directory of uncompressed .npy files
+
+        Args:
+            path: Output directory
+        """
+        path.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "vocab": self.vocab,
+            "indptr": self.indptr,
+            "doc_ids": self.doc_ids.astype(np.int32),
+            "term_freqs": self.term_freqs.astype(np.float32),
+            "doc_len": self.doc_len.astype(np.int32),
+            "idf": self.idf,
+            "chunk_ids": self.chunk_ids,
+            "weights": self.weights,
+            "params": np.array([self.k1, self.b]),
+            "token_pattern": np.array(self.token_pattern)
+        }
+        for name, array in arrays.items():
+            np.save(path / f"{name}.npy", array, allow_pickle=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        """
+        Read an index written by save()
+
+        Postings are memory-mapped rather than copied, so loading is cheap
+        and processes serving the same index share the OS page cache.
+
+        Args:
+            path: Index directory
+
+        Returns:
+            Loaded BM25Index
+        """
+        # Plain arrays only; refuse pickled objects
+        arrays = {
+            name: np.load(path / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+            for name in cls._ARRAYS
+        }
+        k1, b = np.load(path / "params.npy", allow_pickle=False)
+        pattern_file = path / "token_pattern.npy"
+        token_pattern = (
+            np.load(pattern_file, allow_pickle=False).item() if pattern_file.exists()
+            else TOKEN_PATTERN
+        )
+        return cls(**arrays, k1=k1, b=b, token_pattern=token_pattern)
@@ -6,44 +6,137 @@ Clinical AI Agent
 - Provides citations from reference materials
 - Logs all interactions
 """
-from typing import Dict, Optional, List
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Deque, Dict, Generator, Iterator, Optional, List, Tuple, Union
 from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langchain_core.output_parsers import StrOutputParser
 
 from config import (
     GROQ_API_KEY, GROQ_MODEL, TEMPERATURE,
-    SIMILARITY_THRESHOLD, TOP_K_RESULTS, MEDICAL_DISCLAIMER
+    SIMILARITY_THRESHOLD, TOP_K_RESULTS, MEDICAL_DISCLAIMER,
+    SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES
 )
 from logger_system import get_logger
+from rate_limiter import get_groq_callbacks
+from semantic_cache import SemanticCache
+from bm25_index import tokenize
+from batched_embedder import BatchedEmbedder
 # Use fast RAG engine for better performance
 from rag_engine_fast import get_rag_engine, get_context_for_query, has_relevant_information
-from web_search_agent import WebSearchAgent
+from web_search_agent import WebSearchAgent, get_web_search_agent
+
+
+# Most recent messages (user + assistant) kept in conversation_history
+HISTORY_MAX_MESSAGES = 64
+
+# Knowledge-base coverage answers are reused for this long
+COVERAGE_CACHE_TTL_S = 60
+COVERAGE_CACHE_MAX_ENTRIES = 512
+
+# Disclaimer text as it appears at the end of a finished answer
+_DISCLAIMER = MEDICAL_DISCLAIMER.strip()
+
+# Citation header emitted for each retrieved chunk in the RAG context
+_SOURCE_RE = re.compile(r'\[Source (\d+) - Page ([\d\w]+), Relevance: ([\d.]+)\]')
+
+# Patient block passed to the RAG prompt
+_PATIENT_TEMPLATE = """Name: {patient_name}
+Diagnosis: {primary_diagnosis}
+Medications: {medications}
+Dietary Restrictions: {dietary_restrictions}"""
+
+
+# Formatted patient blocks: id(record) -> (record, block). The record is kept so
+# an id reused after garbage collection never returns another patient's block
+_PATIENT_BLOCKS: Dict[int, Tuple[Dict, str]] = {}
+_PATIENT_BLOCKS_MAX = 256
+_PATIENT_BLOCKS_LOCK = threading.Lock()
+
+
+def _fmt_patient(ctx: Dict) -> str:
+    """
+    Format patient context for the prompts, memoized per patient record
+    
+    Args:
+        ctx: Patient record, or a {"warning", "patient"} wrapper around one
+        
+    Returns:
+        Formatted patient block
+    """
+    patient = ctx["patient"] if "warning" in ctx else ctx
+    with _PATIENT_BLOCKS_LOCK:
+        cached = _PATIENT_BLOCKS.get(id(patient))
+    if cached is not None and cached[0] is patient:
+        return cached[1]
+    
+    formatted = _PATIENT_TEMPLATE.format_map({
+        "patient_name": patient.get('patient_name', 'N/A'),
+        "primary_diagnosis": patient.get('primary_diagnosis', 'N/A'),
+        "medications": ', '.join(patient.get('medications', [])),
+        "dietary_restrictions": patient.get('dietary_restrictions', 'N/A')
+    })
+    with _PATIENT_BLOCKS_LOCK:
+        if len(_PATIENT_BLOCKS) >= _PATIENT_BLOCKS_MAX:
+            # Evict the oldest block (dicts keep insertion order)
+            _PATIENT_BLOCKS.pop(next(iter(_PATIENT_BLOCKS)))
+        _PATIENT_BLOCKS[id(patient)] = (patient, formatted)
+    return formatted
 
 
 class ClinicalAgent:
     """Clinical AI Agent for medical queries with RAG and web search"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        llm: Optional[ChatGroq] = None,
+        web_search_agent: Optional[WebSearchAgent] = None
+    ):
+        """
+        Args:
+            llm: Shared Groq client; a new one is created if omitted
+            web_search_agent: Shared web search agent; a new one is created if omitted
+        """
         self.logger = get_logger()
         self.logger.log_system_event("Initializing Clinical AI Agent")
         
         # Initialize Groq LLM for RAG
-        self.llm = ChatGroq(
+        self.llm = llm or ChatGroq(
             model=GROQ_MODEL,
             temperature=TEMPERATURE,
             groq_api_key=GROQ_API_KEY,
-            max_tokens=2048
+            max_tokens=2048,
+            callbacks=get_groq_callbacks()
         )
         
-        # Initialize RAG engine (uses singleton pattern)
-        self.rag_engine = get_rag_engine()
+        # Initialize RAG engine (uses singleton pattern) and web search agent
+        # concurrently; both spend their start-up time on disk/network I/O
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            rag_future = executor.submit(get_rag_engine)
+            web_future = None if web_search_agent else executor.submit(get_web_search_agent)
+            self.rag_engine = rag_future.result()
+            self.web_search_agent = web_search_agent or web_future.result()
         
-        # Initialize web search agent
-        self.web_search_agent = WebSearchAgent()
+        # Concurrent async queries share one encoder call
+        self._embedder = BatchedEmbedder(self.rag_engine.embed_queries)
         
-        # Conversation history
-        self.conversation_history = []
+        # Answers to previously seen questions (same words, per patient)
+        self._response_cache = SemanticCache(
+            threshold=SEMANTIC_CACHE_THRESHOLD,
+            max_entries=SEMANTIC_CACHE_MAX_ENTRIES
+        )
+        
+        # check_knowledge_base_coverage results: normalized query -> (timestamp, covered)
+        self._coverage_cache: Dict[str, Tuple[float, bool]] = {}
+        
+        # Conversation history, capped so long sessions do not grow without bound
+        self.conversation_history: Deque[Dict] = deque(maxlen=HISTORY_MAX_MESSAGES)
         
         # System instructions
         self.system_instructions = """You are a specialized Clinical AI Agent providing medical information for post-discharge patient care.
@@ -78,14 +171,13 @@ Important:
 - Be clear about information sources (knowledge base vs web search)
 """
         
-        # Create RAG prompt template
-        self.rag_prompt = ChatPromptTemplate.from_messages([
-            ("system", self.system_instructions),
-            ("human", "{context}\n\nPatient Context: {patient_context}\n\nQuestion: {question}")
-        ])
+        # The system message never changes, so build it once; only the
+        # human turn is formatted per query
+        self._system_message = SystemMessage(content=self.system_instructions)
+        self._human_template = "{context}\n\nPatient Context: {patient_context}\n\nQuestion: {question}"
         
-        # Create RAG chain
-        self.rag_chain = self.rag_prompt | self.llm | StrOutputParser()
+        # Create RAG chain (takes a ready-made message list)
+        self.rag_chain = self.llm | StrOutputParser()
         
         self.logger.log_agent_action(
             "ClinicalAgent",
@@ -108,109 +200,283 @@ Important:
         Returns:
             Dict with answer, sources, and metadata
         """
-        self.logger.log_user_message(query)
-        self.logger.log_agent_action(
-            "ClinicalAgent",
-            "ProcessingMedicalQuery",
-            {"query": query[:100], "has_patient_context": patient_context is not None}
-        )
+        result = None
+        for item in self.stream_medical_query(query, patient_context):
+            if isinstance(item, dict):
+                result = item
+        return result
+    
+    def stream_medical_query(
+        self,
+        query: str,
+        patient_context: Optional[Dict] = None
+    ) -> Iterator[Union[str, Dict]]:
+        """
+        Process a medical query, yielding web search answers as they are generated
+        
+        Args:
+            query: Medical question from patient
+            patient_context: Optional patient discharge information
+            
+        Yields:
+            Text chunks of a web search answer while Groq generates it, then
+            the same dict process_medical_query returns. Knowledge-base and
+            cached answers yield only the dict.
+        """
+        self._log_query(query, patient_context)
         
         try:
-            # Step 1: Try RAG first (using fast retrieval)
-            rag_context = self.rag_engine.get_context_for_query(
-                query,
-                k=TOP_K_RESULTS
-            )
+            # Step 0: Reuse the answer to the same question for the same patient
+            query_embedding = self.rag_engine.embed_query(query)
+            cache_namespace = self._answer_cache_namespace(query, patient_context)
+            cached = self._get_cached_answer(query, query_embedding, cache_namespace)
+            if cached is not None:
+                yield cached
+                return
+            
+            # Step 1: Try RAG first (using fast retrieval), unless the query
+            # shares no vocabulary with the knowledge base
+            rag_context = ""
+            if self.rag_engine.may_cover(query):
+                rag_context = self.rag_engine.get_context_for_query(
+                    query,
+                    k=TOP_K_RESULTS
+                )
             
             if rag_context:
                 # Use RAG results
-                return self._generate_rag_answer(query, rag_context, patient_context)
+                result = self._generate_rag_answer(query, rag_context, patient_context)
             else:
                 # Fallback to web search
-                self.logger.log_agent_action(
-                    "ClinicalAgent",
-                    "RAGNoResults",
-                    {"query": query, "action": "falling_back_to_web_search"}
-                )
-                return self._generate_web_search_answer(query, patient_context)
+                self._log_rag_miss(query)
+                result = yield from self._stream_web_search_answer(query, patient_context)
+            
+            self._cache_answer(query_embedding, result, cache_namespace)
+            yield result
         
         except Exception as e:
-            self.logger.log_error("ClinicalQueryProcessing", str(e), {"query": query})
-            return {
-                "answer": "I apologize, I encountered an error processing your question. Please try rephrasing or consult with your healthcare provider.",
-                "sources": [],
-                "source_type": "error",
-                "success": False,
-                "error": str(e)
-            }
+            yield self._error_result(query, e)
     
-    def _generate_rag_answer(
+    async def aprocess_medical_query(
         self,
         query: str,
-        rag_context: str,
-        patient_context: Optional[Dict]
+        patient_context: Optional[Dict] = None
     ) -> Dict:
-        """Generate answer using RAG context"""
+        """
+        Async variant of process_medical_query
         
-        self.logger.log_agent_action(
-            "ClinicalAgent",
-            "GeneratingRAGAnswer",
-            {"query": query[:100]}
-        )
+        Query embedding and retrieval run concurrently on worker threads,
+        and the RAG answer is generated with a non-blocking Groq call.
         
-        # Build patient context string
-        patient_info = "None provided"
-        if patient_context:
-            if "warning" in patient_context:
-                patient_context = patient_context["patient"]
+        Args:
+            query: Medical question from patient
+            patient_context: Optional patient discharge information
             
-            patient_info = f"""Name: {patient_context.get('patient_name', 'N/A')}
-Diagnosis: {patient_context.get('primary_diagnosis', 'N/A')}
-Medications: {', '.join(patient_context.get('medications', []))}
-Dietary Restrictions: {patient_context.get('dietary_restrictions', 'N/A')}"""
+        Returns:
+            Dict with answer, sources, and metadata
+        """
+        self._log_query(query, patient_context)
         
         try:
-            # Use Groq LLM chain for RAG answer
-            answer = self.rag_chain.invoke({
-                "context": rag_context,
-                "patient_context": patient_info,
-                "question": query
-            })
+            if self.rag_engine.may_cover(query):
+                query_embedding, rag_context = await asyncio.gather(
+                    self._embedder.embed(query),
+                    asyncio.to_thread(
+                        self.rag_engine.get_context_for_query, query, TOP_K_RESULTS
+                    )
+                )
+            else:
+                query_embedding = await self._embedder.embed(query)
+                rag_context = ""
             
-            # Ensure disclaimer is included
-            if MEDICAL_DISCLAIMER.strip() not in answer:
-                answer += f"\n\n{MEDICAL_DISCLAIMER}"
+            cache_namespace = self._answer_cache_namespace(query, patient_context)
+            cached = self._get_cached_answer(query, query_embedding, cache_namespace)
+            if cached is not None:
+                return cached
             
-            self.logger.log_agent_response("ClinicalAgent", answer)
+            if rag_context:
+                answer = await self.rag_chain.ainvoke(
+                    self._rag_messages(query, rag_context, patient_context)
+                )
+                result = self._finish_rag_answer(query, rag_context, answer)
+            else:
+                self._log_rag_miss(query)
+                result = await asyncio.to_thread(
+                    self._generate_web_search_answer, query, patient_context
+                )
             
-            # Add to conversation history
-            self.conversation_history.append({
-                "role": "user",
-                "content": query
-            })
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": answer,
-                "source_type": "rag"
-            })
+            self._cache_answer(query_embedding, result, cache_namespace)
+            return result
+        
+        except Exception as e:
+            return self._error_result(query, e)
+    
+    @staticmethod
+    def _answer_cache_namespace(query: str, patient_context: Optional[Dict]) -> Tuple[int, str]:
+        """
+        Scope answer-cache entries to one patient and one normalized question
+        
+        Embedding similarity alone can match medically opposite questions ("high"
+        vs "low potassium", "should I" vs "should I not"), so a hit also needs the
+        same words; only case, spacing and punctuation may differ. Answers do not
+        depend on the conversation history, which the RAG prompt does not include.
+        
+        Args:
+            query: Medical question from patient
+            patient_context: Optional patient discharge information
             
-            return {
-                "answer": answer,
-                "sources": self._extract_rag_sources(rag_context),
-                "source_type": "nephrology_knowledge_base",
-                "success": True
-            }
+        Returns:
+            (patient block hash, normalized query text)
+        """
+        patient_key = hash(_fmt_patient(patient_context)) if patient_context else 0
+        return patient_key, " ".join(tokenize(query))
+    
+    def _cache_answer(self, query_embedding, result: Dict, namespace) -> None:
+        """
+        Cache a successful knowledge-base answer
+        
+        Web search answers are not cached here: WebSearchAgent keeps them only
+        for its own fresh/stale window, which a process-lifetime entry would override.
+        """
+        if result.get("success") and result.get("source_type") == "nephrology_knowledge_base":
+            self._response_cache.set(query_embedding, result, namespace=namespace)
+    
+    def _log_query(self, query: str, patient_context: Optional[Dict]) -> None:
+        """Log an incoming medical query"""
+        self.logger.log_user_message(query)
+        self.logger.log_agent_action(
+            "ClinicalAgent",
+            "ProcessingMedicalQuery",
+            {"query": query[:100], "has_patient_context": patient_context is not None}
+        )
+    
+    def _log_rag_miss(self, query: str) -> None:
+        """Log that the knowledge base had nothing relevant"""
+        self.logger.log_agent_action(
+            "ClinicalAgent",
+            "RAGNoResults",
+            {"query": query, "action": "falling_back_to_web_search"}
+        )
+    
+    def _error_result(self, query: str, error: Exception) -> Dict:
+        """Build the response returned when query processing fails"""
+        self.logger.log_error("ClinicalQueryProcessing", str(error), {"query": query})
+        return {
+            "answer": "I apologize, I encountered an error processing your question. Please try rephrasing or consult with your healthcare provider.",
+            "sources": [],
+            "source_type": "error",
+            "success": False,
+            "error": str(error)
+        }
+    
+    def _get_cached_answer(
+        self,
+        query: str,
+        query_embedding: List[float],
+        cache_namespace: Tuple[int, str]
+    ) -> Optional[Dict]:
+        """Return a cached answer for the same query, recording it in history"""
+        cached = self._response_cache.get(query_embedding, namespace=cache_namespace)
+        if cached is None:
+            return None
+        
+        self.logger.log_agent_action(
+            "ClinicalAgent",
+            "SemanticCacheHit",
+            {"query": query[:100], "source_type": cached["source_type"]}
+        )
+        self._record_exchange(query, cached["answer"], "cache")
+        return dict(cached)
+    
+    def _generate_rag_answer(
+        self,
+        query: str,
+        rag_context: str,
+        patient_context: Optional[Dict]
+    ) -> Dict:
+        """Generate answer using RAG context"""
+        try:
+            # Use Groq LLM chain for RAG answer
+            answer = self.rag_chain.invoke(
+                self._rag_messages(query, rag_context, patient_context)
+            )
+            return self._finish_rag_answer(query, rag_context, answer)
             
         except Exception as e:
             self.logger.log_error("RAGAnswerGeneration", str(e))
             raise
     
+    def _rag_messages(
+        self,
+        query: str,
+        rag_context: str,
+        patient_context: Optional[Dict]
+    ) -> List[BaseMessage]:
+        """Build the RAG chain messages for a query"""
+        self.logger.log_agent_action(
+            "ClinicalAgent",
+            "GeneratingRAGAnswer",
+            {"query": query[:100]}
+        )
+        
+        patient_info = _fmt_patient(patient_context) if patient_context else "None provided"
+        
+        return [
+            self._system_message,
+            HumanMessage(content=self._human_template.format(
+                context=rag_context,
+                patient_context=patient_info,
+                question=query
+            ))
+        ]
+    
+    def _finish_rag_answer(self, query: str, rag_context: str, answer: str) -> Dict:
+        """Add the disclaimer, record history and package a RAG answer"""
+        # Ensure disclaimer is included
+        if not answer.rstrip().endswith(_DISCLAIMER):
+            answer += f"\n\n{MEDICAL_DISCLAIMER}"
+        
+        self.logger.log_agent_response("ClinicalAgent", answer)
+        
+        # Add to conversation history
+        self._record_exchange(query, answer, "rag")
+        
+        return {
+            "answer": answer,
+            "sources": self._extract_rag_sources(rag_context),
+            "source_type": "nephrology_knowledge_base",
+            "success": True
+        }
+    
     def _generate_web_search_answer(
         self,
         query: str,
         patient_context: Optional[Dict]
     ) -> Dict:
         """Generate answer using web search"""
+        result = None
+        for item in self._stream_web_search_answer(query, patient_context):
+            if isinstance(item, dict):
+                result = item
+        return result
+    
+    def _stream_web_search_answer(
+        self,
+        query: str,
+        patient_context: Optional[Dict]
+    ) -> Generator[str, None, Dict]:
+        """
+        Answer using web search, passing the web answer's text chunks through
+        
+        With a patient context the final answer is the streamed one plus a
+        personalized note, so the returned dict supersedes the streamed text.
+        
+        Yields:
+            Text chunks of the web search answer
+            
+        Returns:
+            Result dict with answer, sources, and metadata
+        """
         
         self.logger.log_agent_handoff(
             "ClinicalAgent",
@@ -218,8 +484,13 @@ Dietary Restrictions: {patient_context.get('dietary_restrictions', 'N/A')}"""
             f"No relevant information in knowledge base for: {query[:50]}..."
         )
         
-        # Use web search agent
-        web_result = self.web_search_agent.answer_query(query)
+        # Use web search agent, streaming its answer through
+        web_result = None
+        for item in self.web_search_agent.stream_query(query):
+            if isinstance(item, dict):
+                web_result = item
+            else:
+                yield item
         
         if not web_result["success"]:
             return {
@@ -233,18 +504,13 @@ Dietary Restrictions: {patient_context.get('dietary_restrictions', 'N/A')}"""
         answer = web_result["answer"]
         
         if patient_context:
-            if "warning" in patient_context:
-                patient_context = patient_context["patient"]
-            
             enhancement_prompt = f"""Given this web search answer about: "{query}"
 
 Answer:
 {answer}
 
 Patient Context:
-- Diagnosis: {patient_context.get('primary_diagnosis', 'N/A')}
-- Medications: {', '.join(patient_context.get('medications', []))}
-- Dietary Restrictions: {patient_context.get('dietary_restrictions', 'N/A')}
+{_fmt_patient(patient_context)}
 
 Add a brief personalized note (1-2 sentences) relating the answer to this patient's specific condition.
 Keep the original answer intact, just add the personalized note at the end before the disclaimer."""
@@ -254,7 +520,7 @@ Keep the original answer intact, just add the personalized note at the end befor
                 enhanced = self.llm.invoke(enhancement_prompt).content.strip()
                 answer = enhanced
                 
-                if MEDICAL_DISCLAIMER.strip() not in answer:
+                if not answer.rstrip().endswith(_DISCLAIMER):
                     answer += f"\n\n{MEDICAL_DISCLAIMER}"
                     
             except Exception as e:
@@ -263,15 +529,7 @@ Keep the original answer intact, just add the personalized note at the end befor
         self.logger.log_agent_response("ClinicalAgent", answer)
         
         # Add to conversation history
-        self.conversation_history.append({
-            "role": "user",
-            "content": query
-        })
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": answer,
-            "source_type": "web_search"
-        })
+        self._record_exchange(query, answer, "web_search")
         
         return {
             "answer": answer,
@@ -282,30 +540,31 @@ Keep the original answer intact, just add the personalized note at the end befor
     
     def _extract_rag_sources(self, rag_context: str) -> List[Dict]:
         """Extract source information from RAG context"""
-        sources = []
-        
         # Parse source citations from context
-        import re
-        source_pattern = r'\[Source (\d+) - Page ([\d\w]+), Relevance: ([\d.]+)\]'
-        matches = re.finditer(source_pattern, rag_context)
-        
-        for match in matches:
-            sources.append({
-                "source_number": match.group(1),
-                "page": match.group(2),
-                "relevance": float(match.group(3)),
+        return [
+            {
+                "source_number": number,
+                "page": page,
+                "relevance": float(relevance),
                 "type": "nephrology_textbook"
-            })
-        
-        return sources
+            }
+            for number, page, relevance in _SOURCE_RE.findall(rag_context)
+        ]
+    
+    def _record_exchange(self, query: str, answer: str, source_type: str) -> None:
+        """Append a question/answer pair to the bounded conversation history"""
+        self.conversation_history.extend((
+            {"role": "user", "content": query},
+            {"role": "assistant", "content": answer, "source_type": source_type}
+        ))
     
     def get_conversation_history(self) -> List[Dict]:
         """Get the conversation history"""
-        return self.conversation_history
+        return list(self.conversation_history)
     
     def reset(self):
         """Reset agent state for new conversation"""
-        self.conversation_history = []
+        self.conversation_history.clear()
         self.logger.log_system_event("Clinical Agent reset for new conversation")
     
     def check_knowledge_base_coverage(self, query: str) -> bool:
@@ -318,10 +577,30 @@ Keep the original answer intact, just add the personalized note at the end befor
         Returns:
             True if knowledge base has relevant info
         """
-        return self.rag_engine.has_relevant_information(
+        # Callers often check coverage right before asking the same question
+        key = query.lower().strip()
+        now = time.monotonic()
+        cached = self._coverage_cache.get(key)
+        if cached is not None and now - cached[0] < COVERAGE_CACHE_TTL_S:
+            return cached[1]
+        
+        covered = self.rag_engine.has_relevant_information(
             query, 
             threshold=SIMILARITY_THRESHOLD
         )
+        
+        self._coverage_cache.pop(key, None)
+        if len(self._coverage_cache) >= COVERAGE_CACHE_MAX_ENTRIES:
+            # Drop the oldest entry (dicts keep insertion order)
+            del self._coverage_cache[next(iter(self._coverage_cache))]
+        self._coverage_cache[key] = (now, covered)
+        return covered
+
+
+@lru_cache(maxsize=1)
+def _get_agent() -> ClinicalAgent:
+    """Shared agent for the standalone helper, built on first use"""
+    return ClinicalAgent()
 
 
 # Standalone function for testing
@@ -336,8 +615,7 @@ def answer_medical_question(question: str, patient_context: Optional[Dict] = Non
     Returns:
         Answer string
     """
-    agent = ClinicalAgent()
-    result = agent.process_medical_query(question, patient_context)
+    result = _get_agent().process_medical_query(question, patient_context)
     
     answer = result["answer"]
     
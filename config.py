@@ -40,21 +40,66 @@ GEMINI_MODEL = "gemini-2.0-flash-thinking-exp-01-21"
 GEMINI_EMBEDDINGS_MODEL = "models/text-embedding-004"
 GROQ_MODEL = "llama-3.3-70b-versatile"
 
+# Groq rate limits for GROQ_MODEL on this account; LLM calls are paced client-side to stay under them
+GROQ_RPM = int(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = int(os.getenv("GROQ_TPM", "12000"))
+
 # RAG Configuration - Using Local Vector Stores
-VECTOR_STORE_TYPE = "chromadb"  # Options: "chromadb" or "faiss"
+VECTOR_STORE_TYPE = "chromadb"  # Options: "chromadb", "faiss" or "int8"
 COLLECTION_NAME = "nephrology_knowledge_base"
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 SIMILARITY_THRESHOLD = 0.7
 TOP_K_RESULTS = 5
 
+# Semantic response cache: minimum cosine similarity between two queries
+# for the cached answer of one to be reused for the other
+SEMANTIC_CACHE_THRESHOLD = 0.95
+SEMANTIC_CACHE_MAX_ENTRIES = 1024
+
+# Retrieval cache in front of the vector search: near-identical queries
+# (cosine >= threshold) reuse the same chunks until the entry expires
+RETRIEVAL_CACHE_THRESHOLD = 0.98
+RETRIEVAL_CACHE_MAX_ENTRIES = 1024
+RETRIEVAL_CACHE_TTL_S = 3600
+
+# ONNX Runtime export loaded on CPU by both the ingest encoder and the query
+# encoder; chunks and queries must come from the same file to share one vector space
+EMBED_ONNX_FILE = "onnx/model_quint8_avx2.onnx"  # Dynamic INT8 export published with the model
+
 # ChromaDB Configuration (Local)
 CHROMA_PERSIST_DIR = str(CHROMA_DIR)
+CHROMA_SERVER_HOST = os.getenv("CHROMA_SERVER_HOST")  # Set to query a Chroma server instead of the local files
+CHROMA_SERVER_PORT = int(os.getenv("CHROMA_SERVER_PORT", "8000"))
+CHROMA_SEGMENT_CACHE_POLICY = "LRU"  # Keep loaded HNSW segments resident between queries
+CHROMA_MEMORY_LIMIT_BYTES = 2 * 1024 * 1024 * 1024  # Budget for cached segments
 
 # FAISS Configuration (Local)
 FAISS_INDEX_DIR = BASE_DIR / "faiss_index"
 FAISS_INDEX_DIR.mkdir(exist_ok=True)
 FAISS_INDEX_PATH = str(FAISS_INDEX_DIR / "nephrology_index")
+FAISS_HNSW_M = 32
+FAISS_EF_CONSTRUCTION = 200
+FAISS_EF_SEARCH = 64
+FAISS_IVFPQ_MIN_VECTORS = 100_000  # Switch from HNSW to IVF-PQ above this size
+FAISS_IVFPQ_FACTORY = "IVF4096,PQ32"
+FAISS_TRAIN_SAMPLE = 100_000
+FAISS_SQ8 = True  # Store HNSW vectors as 8-bit scalar-quantized codes
+FAISS_REFINE_K_FACTOR = 4  # Re-rank k * factor quantized candidates with exact vectors
+
+# Int8 store (Local): exact search over 8-bit scalar-quantized vectors,
+# a quarter of the float32 size, scanned with one matrix product per block
+INT8_SCAN_BLOCK = 4096  # Rows widened to float32 at a time (~6 MB for 384-d), kept cache-sized
+
+# BM25 prefilter for the fast engine: the dense search only considers the
+# chunks with the best BM25 scores, then hits are ordered by reciprocal rank fusion
+BM25_PREFILTER_ENABLED = True
+BM25_PREFILTER_CANDIDATES = 100
+
+# Reranking (cross-encoder over the retrieved candidates)
+RERANK_ENABLED = False
+RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_TOP_K = 3  # Chunks kept for the LLM prompt after reranking
 
 # Agent Configuration
 TEMPERATURE = 0.7
@@ -71,3 +116,5 @@ medical advice, diagnosis, or treatment.
 # Logging Configuration
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+LOG_MAX_BYTES = 50 * 1024 * 1024  # Rotate the log file at 50 MB
+LOG_BACKUP_COUNT = 5
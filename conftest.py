@@ -0,0 +1,68 @@
+"""
+Shared pytest fixtures for the system tests
+- Expensive singletons are built once per test session (once per worker under pytest-xdist)
+- Run in parallel with: pytest -n auto
+- Skip network-heavy tests with: pytest -m "not slow"
+"""
+import pytest
+
+from config import GROQ_API_KEY, NEPHROLOGY_PDF, PATIENTS_JSON
+
+# Prerequisites reported by test_configuration; dependent tests skip instead of failing again
+requires_groq = pytest.mark.skipif(not GROQ_API_KEY, reason="GROQ_API_KEY not set")
+requires_patients = pytest.mark.skipif(not PATIENTS_JSON.exists(), reason=f"{PATIENTS_JSON} missing")
+requires_pdf = pytest.mark.skipif(not NEPHROLOGY_PDF.exists(), reason=f"{NEPHROLOGY_PDF} missing")
+
+
+def pytest_configure(config):
+    """Register custom markers"""
+    config.addinivalue_line("markers", "slow: needs network access or loads embedding models")
+
+
+@pytest.fixture(scope="session")
+def rag_engine():
+    """Fast RAG engine shared by every test in the session"""
+    from rag_engine_fast import get_rag_engine
+    return get_rag_engine()
+
+
+@pytest.fixture(scope="session")
+def patient_tool():
+    """Patient retrieval tool shared by every test in the session"""
+    from patient_retrieval_tool import get_patient_tool
+    return get_patient_tool()
+
+
+@pytest.fixture(scope="session")
+def shared_resources(rag_engine, patient_tool):
+    """LLM client, RAG engine, web search agent and patient tool, built once"""
+    from multi_agent_orchestrator import create_shared_resources
+    return create_shared_resources()
+
+
+@pytest.fixture(scope="session")
+def web_agent(shared_resources):
+    """Web search agent shared by every test in the session"""
+    return shared_resources.web_search_agent
+
+
+@pytest.fixture(scope="session")
+def receptionist(shared_resources):
+    """Receptionist agent built on the shared LLM and patient tool"""
+    from receptionist_agent import ReceptionistAgent
+    return ReceptionistAgent(llm=shared_resources.llm, patient_tool=shared_resources.patient_tool)
+
+
+@pytest.fixture(scope="session")
+def clinical_agent(shared_resources):
+    """Clinical agent built on the shared LLM and web search agent"""
+    from clinical_agent import ClinicalAgent
+    return ClinicalAgent(llm=shared_resources.llm, web_search_agent=shared_resources.web_search_agent)
+
+
+@pytest.fixture(scope="session")
+def orchestrator(shared_resources):
+    """Multi-agent orchestrator on the same shared resources as the agent fixtures"""
+    from multi_agent_orchestrator import MultiAgentOrchestrator
+    return MultiAgentOrchestrator(shared_resources)
+
@@ -7,16 +7,26 @@ Advanced Ingestion Script with Dense + Sparse Indexing
 - Saves chunks for hybrid retrieval
 """
 import shutil
-import json
 import logging
 from pathlib import Path
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+import chromadb
+import numpy as np
+import orjson
 
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
 
+from bm25_index import BM25Index, tokenize
+
+# Rust splitter is much faster than the pure-Python one (optional)
+try:
+    from semantic_text_splitter import TextSplitter
+except ImportError:
+    TextSplitter = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,160 +37,261 @@ logger = logging.getLogger(__name__)
 # Configuration
 PDF_PATH = Path("../data/nephrology.pdf")
 CHROMA_DIR = Path("chroma_db")
-CHUNKS_FILE = Path("data/processed/chunks.json")
-BM25_INDEX_FILE = Path("data/processed/bm25_index.pkl")
+CHUNKS_FILE = Path("data/processed/chunks.jsonl")
+BM25_INDEX_FILE = Path("data/processed/bm25_index")
+DENSE_SQ8_INDEX_FILE = Path("data/processed/dense_sq8.faiss")
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 COLLECTION_NAME = "nephrology_knowledge_base"
-EMBED_MODEL = "BAAI/bge-base-en-v1.5"
+EMBED_MODEL = "BAAI/bge-base-en-v1.5"  # FastEmbed serves this as an INT8-quantized ONNX model
+EMBED_BATCH_SIZE = 64
+EMBED_PARALLEL = 0  # FastEmbed data-parallel workers: 0 = one per CPU core, None = in-process
+
+# HNSW index parameters for the Chroma collection
+HNSW_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64
+}
+
+
+def _make_splitter() -> Callable[[str], List[Tuple[int, str]]]:
+    """
+    Pick the text splitter used for chunking
+    
+    Returns:
+        Function mapping page text to (start_index, chunk_text) pairs
+    """
+    if TextSplitter is not None:
+        logger.info("   Using semantic-text-splitter (Rust)")
+        splitter = TextSplitter(CHUNK_SIZE, overlap=CHUNK_OVERLAP)
+        return splitter.chunk_indices
+    
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        add_start_index=True,
+        separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
+    )
+    
+    def split(text: str) -> List[Tuple[int, str]]:
+        return [
+            (doc.metadata["start_index"], doc.page_content)
+            for doc in splitter.create_documents([text])
+        ]
+    
+    return split
 
 
-def load_and_chunk_pdf(pdf_path: Path) -> List[Dict]:
+def load_and_chunk_pdf(pdf_path: Path) -> Iterator[Dict]:
     """
-    Load PDF and split into chunks with metadata
+    Load PDF page by page and yield chunks with metadata
+    
+    Pages are split as they are read, so only one page and its chunks
+    are held in memory at a time.
     
     Args:
         pdf_path: Path to PDF file
         
-    Returns:
-        List of chunk dictionaries with content and metadata
+    Yields:
+        Chunk dictionaries with content and metadata
     """
     logger.info(f"📖 Loading PDF from {pdf_path.absolute()}")
     
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF not found at {pdf_path.absolute()}")
     
-    # Load PDF
-    loader = PyPDFLoader(str(pdf_path))
-    pages = loader.load()
-    logger.info(f"✅ Loaded {len(pages)} pages")
-    
     # Split into chunks
     logger.info("✂️  Chunking document...")
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        add_start_index=True,
-        separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
-    )
+    split = _make_splitter()
     
-    docs = splitter.split_documents(pages)
-    
-    # Convert to dictionary format
-    chunks = []
-    for i, doc in enumerate(docs):
-        chunks.append({
-            "id": i,
-            "content": doc.page_content,
-            "metadata": {
-                "source": doc.metadata.get("source", "nephrology.pdf"),
-                "page": doc.metadata.get("page", 0),
-                "chunk_index": i,
-                "start_index": doc.metadata.get("start_index", 0)
+    chunk_index = 0
+    page_count = 0
+    for page in PyPDFLoader(str(pdf_path)).lazy_load():
+        page_count += 1
+        for start_index, text in split(page.page_content):
+            yield {
+                "id": chunk_index,
+                "content": text,
+                "metadata": {
+                    "source": page.metadata.get("source", "nephrology.pdf"),
+                    "page": page.metadata.get("page", 0),
+                    "chunk_index": chunk_index,
+                    "start_index": start_index
+                }
             }
-        })
+            chunk_index += 1
     
-    logger.info(f"✅ Created {len(chunks)} chunks")
-    return chunks
+    logger.info(f"✅ Created {chunk_index} chunks from {page_count} pages")
 
 
-def save_chunks(chunks: List[Dict], output_file: Path) -> None:
+def save_chunks(chunks: Iterable[Dict], output_file: Path) -> int:
     """
-    Save chunks to JSON file
+    Stream chunks to a JSON Lines file, one chunk per line
     
     Args:
-        chunks: List of chunk dictionaries
-        output_file: Path to output JSON file
+        chunks: Iterable of chunk dictionaries
+        output_file: Path to output JSONL file
+        
+    Returns:
+        Number of chunks written
     """
     logger.info(f"💾 Saving chunks to {output_file.absolute()}")
     
     # Create directory if needed
     output_file.parent.mkdir(parents=True, exist_ok=True)
     
-    # Save as JSON
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(chunks, f, indent=2, ensure_ascii=False)
+    count = 0
+    with open(output_file, 'wb') as f:
+        for chunk in chunks:
+            f.write(orjson.dumps(chunk, option=orjson.OPT_APPEND_NEWLINE))
+            count += 1
+    
+    logger.info(f"✅ Saved {count} chunks")
+    return count
+
+
+def load_chunks(chunks_file: Path) -> Iterator[Dict]:
+    """
+    Lazily read chunks written by save_chunks
+    
+    Args:
+        chunks_file: Path to JSONL chunks file
+        
+    Yields:
+        Chunk dictionaries
+    """
+    with open(chunks_file, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
+
+
+def build_sq8_index(vectors: np.ndarray, ids: List[str], output_file: Path) -> None:
+    """
+    Build an HNSW index over 8-bit scalar-quantized copies of the dense vectors
+    
+    Each dimension is stored as one byte instead of four, so the index is
+    about a quarter of the float32 size and distance computations run on
+    int8 codes.
+    
+    Args:
+        vectors: Dense embeddings, one row per chunk
+        ids: Chunk id for each row
+        output_file: Path to save the FAISS index
+    """
+    try:
+        import faiss
+    except ImportError:
+        logger.warning("⚠️  faiss not installed. Skipping int8 dense index.")
+        logger.warning("   Install with: pip install faiss-cpu")
+        return
+    
+    logger.info("🗜️  Building int8 (SQ8) dense index...")
     
-    logger.info(f"✅ Saved {len(chunks)} chunks")
+    # Unit vectors: inner product equals cosine similarity
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    
+    hnsw = faiss.IndexHNSWSQ(
+        vectors.shape[1], faiss.ScalarQuantizer.QT_8bit,
+        HNSW_METADATA["hnsw:M"], faiss.METRIC_INNER_PRODUCT
+    )
+    hnsw.hnsw.efConstruction = HNSW_METADATA["hnsw:construction_ef"]
+    hnsw.train(vectors)
+    
+    index = faiss.IndexIDMap(hnsw)
+    index.add_with_ids(vectors, np.asarray([int(i) for i in ids], dtype=np.int64))
+    
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    faiss.write_index(index, str(output_file))
+    
+    logger.info(f"✅ Int8 dense index built with {index.ntotal} vectors")
 
 
-def build_dense_index(chunks: List[Dict], chroma_dir: Path) -> None:
+def build_dense_index(chunks: Iterable[Dict], chroma_dir: Path) -> None:
     """
     Build dense vector index using ChromaDB
     
     Args:
-        chunks: List of chunk dictionaries
+        chunks: Iterable of chunk dictionaries
         chroma_dir: Directory for ChromaDB persistence
     """
     logger.info("🔢 Building dense vector index (ChromaDB)...")
-    logger.info(f"   This will process {len(chunks)} chunks - may take 2-3 minutes...")
     
     # Wipe old DB for clean slate
     if chroma_dir.exists():
         logger.info("   Removing old index...")
         shutil.rmtree(chroma_dir)
     
-    # Prepare documents for Chroma
-    from langchain_core.documents import Document
+    # Prepare columns for a native bulk insert
     logger.info("   Preparing documents...")
-    documents = [
-        Document(
-            page_content=chunk["content"],
-            metadata=chunk["metadata"]
-        )
-        for chunk in chunks
-    ]
+    ids, documents, metadatas = [], [], []
+    for chunk in chunks:
+        ids.append(str(chunk["id"]))
+        documents.append(chunk["content"])
+        metadatas.append(chunk["metadata"])
+    logger.info(f"   This will process {len(documents)} chunks - may take 2-3 minutes...")
     
     # Create embeddings
     logger.info("   Loading FastEmbed model (first time may download ~100MB)...")
-    embeddings = FastEmbedEmbeddings(model_name=EMBED_MODEL)
+    # Batches are sharded across worker processes, each with its own ONNX session
+    embeddings = FastEmbedEmbeddings(
+        model_name=EMBED_MODEL,
+        batch_size=EMBED_BATCH_SIZE,
+        parallel=EMBED_PARALLEL
+    )
     
     # Build and persist vector store
     logger.info("   Generating embeddings and building index...")
     logger.info("   ⏳ Please wait... (this takes 2-3 minutes)")
     
-    vectorstore = Chroma.from_documents(
-        documents=documents,
-        embedding=embeddings,
-        collection_name=COLLECTION_NAME,
-        persist_directory=str(chroma_dir)
-    )
-    vectorstore.persist()
+    vectors = np.asarray(embeddings.embed_documents(documents), dtype=np.float32)
+    
+    client = chromadb.PersistentClient(path=str(chroma_dir))
+    collection = client.create_collection(name=COLLECTION_NAME, metadata=HNSW_METADATA)
+    
+    # Insert in as few transactions as Chroma allows
+    batch_size = client.get_max_batch_size()
+    for i in range(0, len(ids), batch_size):
+        collection.add(
+            ids=ids[i:i + batch_size],
+            embeddings=vectors[i:i + batch_size],
+            documents=documents[i:i + batch_size],
+            metadatas=metadatas[i:i + batch_size]
+        )
     
-    logger.info(f"✅ Dense index built with {len(chunks)} vectors")
+    logger.info(f"✅ Dense index built with {len(documents)} vectors")
+    
+    build_sq8_index(vectors, ids, DENSE_SQ8_INDEX_FILE)
 
 
-def build_sparse_index(chunks: List[Dict], output_file: Path) -> None:
+def build_sparse_index(chunks: Iterable[Dict], output_dir: Path) -> None:
     """
     Build sparse BM25 index
     
     Args:
-        chunks: List of chunk dictionaries
-        output_file: Path to save BM25 index
+        chunks: Iterable of chunk dictionaries
+        output_dir: Directory to save BM25 index arrays in
     """
     logger.info("📊 Building sparse BM25 index...")
     
     try:
         from rank_bm25 import BM25Okapi
-        import pickle
-        
-        # Create directory if needed
-        output_file.parent.mkdir(parents=True, exist_ok=True)
         
-        # Tokenize chunks for BM25
-        tokenized_corpus = [chunk["content"].lower().split() for chunk in chunks]
+        # Tokenize chunks for BM25 (same tokenizer as the query side)
+        tokenized_corpus = []
+        chunk_ids = []
+        for chunk in chunks:
+            tokenized_corpus.append(tokenize(chunk["content"]))
+            chunk_ids.append(chunk["id"])
         
         # Build BM25 index
         bm25 = BM25Okapi(tokenized_corpus)
         
-        # Save index and chunks mapping
-        index_data = {
-            "bm25": bm25,
-            "chunk_ids": [chunk["id"] for chunk in chunks]
-        }
-        
-        with open(output_file, 'wb') as f:
-            pickle.dump(index_data, f)
+        # Save postings and chunk id mapping as plain numpy arrays
+        BM25Index.from_bm25(bm25, chunk_ids).save(output_dir)
         
         logger.info(f"✅ BM25 index built and saved")
         
@@ -200,23 +311,21 @@ def ingest(pdf_path: Path = PDF_PATH) -> None:
     logger.info("🚀 Starting Advanced RAG Ingestion Pipeline")
     logger.info("=" * 80)
     
-    # Step 1: Load and chunk PDF
-    chunks = load_and_chunk_pdf(pdf_path)
-    
-    # Step 2: Save chunks to JSON
-    save_chunks(chunks, CHUNKS_FILE)
+    # Step 1 + 2: Chunk the PDF page by page, streaming chunks to JSONL
+    save_chunks(load_and_chunk_pdf(pdf_path), CHUNKS_FILE)
     
     # Step 3: Build dense vector index
-    build_dense_index(chunks, CHROMA_DIR)
+    build_dense_index(load_chunks(CHUNKS_FILE), CHROMA_DIR)
     
     # Step 4: Build sparse BM25 index
-    build_sparse_index(chunks, BM25_INDEX_FILE)
+    build_sparse_index(load_chunks(CHUNKS_FILE), BM25_INDEX_FILE)
     
     logger.info("=" * 80)
     logger.info("✅ Ingestion Complete!")
     logger.info(f"   - Chunks: {CHUNKS_FILE.absolute()}")
     logger.info(f"   - Dense Index: {CHROMA_DIR.absolute()}")
     logger.info(f"   - Sparse Index: {BM25_INDEX_FILE.absolute()}")
+    logger.info(f"   - Int8 Dense Index: {DENSE_SQ8_INDEX_FILE.absolute()}")
     logger.info("=" * 80)
     logger.info("💡 You can now run: streamlit run app.py")
     logger.info("=" * 80)
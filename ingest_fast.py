@@ -4,18 +4,48 @@ Fast Ingestion Script - Optimized for Speed
 Uses smaller embedding model and pypdf for faster processing
 """
 import os
+
+# Pin BLAS/OpenMP pools to the core count before torch is imported
+for _var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, str(os.cpu_count() or 1))
+
 import json
 import logging
 import hashlib
+import mmap
 import re
+import queue
+import sqlite3
+import threading
+from bisect import bisect_right
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from dataclasses import dataclass, asdict
-from typing import List
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple
 from tqdm import tqdm
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
 import pypdf
 import chromadb
-from chromadb.utils import embedding_functions
+from chromadb.config import Settings
+from sentence_transformers import SentenceTransformer
+from transformers import AutoTokenizer
+
+# Faster chunk-id hashing (optional)
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+from bm25_index import BM25Index, content_terms, tokenize
+from config import (
+    VECTOR_STORE_TYPE, FAISS_INDEX_PATH, FAISS_HNSW_M, FAISS_EF_CONSTRUCTION,
+    FAISS_IVFPQ_MIN_VECTORS, FAISS_IVFPQ_FACTORY, FAISS_TRAIN_SAMPLE,
+    FAISS_SQ8, FAISS_REFINE_K_FACTOR, EMBED_ONNX_FILE
+)
 
 # Configure logging
 logging.basicConfig(
@@ -27,19 +57,144 @@ logger = logging.getLogger(__name__)
 # Configuration
 PDF_PATH = Path("../data/nephrology.pdf")
 CHROMA_DIR = Path("chroma_db")
-CHUNKS_FILE = Path("data/processed/chunks.json")
-CHUNK_SIZE = 800
-CHUNK_OVERLAP = 200
+CHUNKS_FILE = Path("data/processed/chunks_fast.arrow")
+CHUNKS_META_FILE = Path("data/processed/chunks_fast_meta.json")
+VOCAB_FILE = Path("data/processed/vocab.json")
+BM25_INDEX_DIR = Path("data/processed/bm25_index_fast")
+INT8_INDEX_DIR = Path("data/processed/dense_int8_fast")
+EMBED_MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2 truncates inputs beyond 256 tokens, [CLS] and [SEP] included
+CHUNK_SIZE = EMBED_MAX_SEQ_LENGTH - 2  # Tokens; leaves room for [CLS] and [SEP]
+CHUNK_OVERLAP = 64  # Tokens
+MIN_CHUNK_TOKENS = 20  # Shorter chunks are dropped
 COLLECTION_NAME = "nephrology_knowledge_base"
 EMBED_MODEL = "all-MiniLM-L6-v2"  # Faster than BAAI/bge-base-en-v1.5
+TOKENIZER_MODEL = f"sentence-transformers/{EMBED_MODEL}"
+EMBEDDING_CACHE_FILE = CHROMA_DIR / "chunk_cache.sqlite"
+EMBED_BACKEND = "onnx"  # CPU-only hosts: ONNX Runtime instead of PyTorch (needs optimum[onnxruntime])
+EMBED_BATCH_SIZE = 64
+UPSERT_BATCH_SIZE = 1000  # Capped by the client's max batch size
+PIPELINE_QUEUE_SIZE = 2  # Embedded batches buffered ahead of the upserts
+
+# Horizontal whitespace runs, and blank-line paragraph breaks
+_WS = re.compile(r'[ \t]+')
+_PARA = re.compile(r'\n\s*\n')
+
+# HNSW index parameters for the Chroma collection. Embeddings are stored
+# unit-length, so inner product is the cosine and hnswlib skips the
+# per-vector normalization its "cosine" space would do
+HNSW_METADATA = {
+    "hnsw:space": "ip",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64
+}
 
 
 @dataclass
-class DocumentChunk:
-    """Document chunk with metadata"""
-    id: str
-    content: str
-    metadata: dict
+class ChunkBatch:
+    """Document chunks stored column-wise; metadata dicts are built only per upsert batch"""
+    ids: List[str]
+    contents: List[str]
+    sources: List[str]
+    pages: np.ndarray
+    chunk_indices: np.ndarray
+    chunk_nums: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def metadatas(self, start: int, end: int) -> List[Dict]:
+        """Chroma metadata dicts for chunks [start, end)"""
+        return [
+            {"source": source, "page": int(page), "chunk_index": int(index), "chunk_num": int(num)}
+            for source, page, index, num in zip(
+                self.sources[start:end], self.pages[start:end],
+                self.chunk_indices[start:end], self.chunk_nums[start:end]
+            )
+        ]
+
+
+def _detect_device() -> str:
+    """Pick the fastest available torch device for encoding"""
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    
+    if torch.cuda.is_available():
+        return "cuda"
+    if getattr(torch.backends, "mps", None) and torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def _configure_torch_threads() -> None:
+    """Use every core for intra-op work and a small inter-op pool"""
+    try:
+        import torch
+    except ImportError:
+        return
+    
+    torch.set_num_threads(os.cpu_count() or 1)
+    try:
+        torch.set_num_interop_threads(2)
+    except RuntimeError:
+        # Can only be set before torch starts any parallel work
+        pass
+    torch.backends.mkldnn.enabled = True
+
+
+def _load_encoder(device: str) -> SentenceTransformer:
+    """
+    Load the chunk encoder, preferring ONNX Runtime on CPU
+    
+    Args:
+        device: Torch device from _detect_device()
+        
+    Returns:
+        SentenceTransformer model (ONNX or PyTorch backend)
+    """
+    if device == "cpu" and EMBED_BACKEND == "onnx":
+        try:
+            model = SentenceTransformer(
+                EMBED_MODEL, device=device, backend="onnx",
+                model_kwargs={"file_name": EMBED_ONNX_FILE}
+            )
+            logger.info("⚡ Using ONNX Runtime encoder")
+            return model
+        except Exception as e:
+            logger.warning(f"⚠️  ONNX encoder unavailable ({e}), using PyTorch")
+    
+    return SentenceTransformer(EMBED_MODEL, device=device)
+
+
+def _token_spans(breaks: List[int], num_tokens: int, chunk_size: int, overlap: int) -> List[Tuple[int, int]]:
+    """
+    Token [start, end) windows for one page
+    
+    Args:
+        breaks: Sorted token indices where paragraphs begin
+        num_tokens: Tokens on the page
+        chunk_size: Maximum tokens per window
+        overlap: Tokens shared by consecutive windows
+        
+    Returns:
+        List of (start, end) token spans
+    """
+    spans = []
+    start = 0
+    while start < num_tokens:
+        end = min(start + chunk_size, num_tokens)
+        if end < num_tokens:
+            # Prefer a paragraph break in the second half of the window
+            i = bisect_right(breaks, end) - 1
+            if i >= 0 and breaks[i] > start + chunk_size // 2:
+                end = breaks[i]
+        spans.append((start, end))
+        if end == num_tokens:
+            break
+        start = max(end - overlap, start + 1)
+    return spans
 
 
 class FastPDFProcessor:
@@ -48,78 +203,181 @@ class FastPDFProcessor:
     def __init__(self, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        
+        # Fast (Rust) tokenizer of the embedding model, so chunks fit its input window
+        self.tokenizer = AutoTokenizer.from_pretrained(TOKENIZER_MODEL)
     
-    def _generate_id(self, text: str) -> str:
-        """Generate unique ID for chunk"""
-        return hashlib.md5(text.encode()).hexdigest()
+    def _generate_id(self, data: bytes) -> str:
+        """Generate unique ID for chunk (not security-sensitive, so use the fastest hash)"""
+        if blake3 is not None:
+            return blake3.blake3(data).hexdigest(length=16)
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
     
     def _split_text(self, text: str) -> List[str]:
-        """Split text into overlapping chunks"""
+        """Split text into overlapping windows of embedder tokens, ending at paragraph breaks where possible"""
         if not text.strip():
             return []
         
-        # Split by paragraphs
-        paragraphs = [p for p in re.split(r'\n\s*\n', text) if p.strip()]
+        # One tokenizer pass; chunks are cut from the original text at token offsets
+        offsets = self.tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_tensors="np",
+            verbose=False
+        )["offset_mapping"].reshape(-1, 2).astype(np.int32)
         
-        chunks = []
-        current_chunk = []
-        current_size = 0
+        # Token index at which each paragraph after the first begins
+        para_ends = [m.end() for m in _PARA.finditer(text)]
+        breaks = np.searchsorted(offsets[:, 0], para_ends).tolist()
         
-        for para in paragraphs:
-            para_words = para.split()
-            
-            if current_size + len(para_words) > self.chunk_size and current_chunk:
-                # Save current chunk
-                chunks.append(' '.join(current_chunk))
-                
-                # Start new chunk with overlap
-                overlap = current_chunk[-self.chunk_overlap:]
-                current_chunk = overlap + para_words
-                current_size = len(overlap) + len(para_words)
-            else:
-                current_chunk.extend(para_words)
-                current_size += len(para_words)
-        
-        if current_chunk:
-            chunks.append(' '.join(current_chunk))
-        
-        return chunks
-    
-    def process_pdf(self, file_path: Path) -> List[DocumentChunk]:
+        return [
+            text[offsets[start, 0]:offsets[end - 1, 1]]
+            for start, end in _token_spans(breaks, len(offsets), self.chunk_size, self.chunk_overlap)
+            # Page numbers, running headers and the like are noise-only vectors
+            if end - start >= MIN_CHUNK_TOKENS
+        ]
+    
+    def process_pdf(self, file_path: Path) -> ChunkBatch:
         """Process PDF and return chunks"""
         if not file_path.exists():
             raise FileNotFoundError(f"PDF not found: {file_path}")
         
         logger.info(f"📖 Loading PDF from {file_path}")
-        reader = pypdf.PdfReader(str(file_path))
-        all_chunks = []
+        with _open_pdf(file_path) as reader:
+            num_pages = len(reader.pages)
+        ids, contents, pages_col, chunk_nums = [], [], [], []
         
-        logger.info(f"📄 Processing {len(reader.pages)} pages...")
+        logger.info(f"📄 Processing {num_pages} pages...")
         
-        for page_num, page in enumerate(tqdm(reader.pages, desc="Processing pages")):
-            # Extract text
-            text = page.extract_text() or ""
-            text = re.sub(r'\s+', ' ', text).strip()
-            
+        # Text extraction is CPU-bound; give each worker a contiguous page range
+        workers = max(1, min(os.cpu_count() or 1, num_pages))
+        step = max(1, -(-num_pages // workers))  # A page-less PDF yields no ranges, not range(0, 0, 0)
+        pages = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_extract_page_range, file_path, start, min(start + step, num_pages))
+                for start in range(0, num_pages, step)
+            ]
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Processing pages"):
+                pages.extend(future.result())
+        pages.sort()
+        
+        # Chunk ids hash raw bytes; build the per-file and per-page parts once
+        path_key = str(file_path).encode('utf-8', 'ignore') + b"|"
+        
+        for page_num, text in pages:
             # Split into chunks
             chunks = self._split_text(text)
+            page_key = page_num.to_bytes(4, "little")
             
             for chunk_num, chunk_text in enumerate(chunks):
-                # Ensure ID is always a string
-                chunk_id = str(self._generate_id(f"{file_path}_{page_num}_{chunk_num}"))
-                all_chunks.append(DocumentChunk(
-                    id=chunk_id,
-                    content=chunk_text,
-                    metadata={
-                        "source": file_path.name,
-                        "page": page_num + 1,
-                        "chunk_index": len(all_chunks),
-                        "chunk_num": chunk_num + 1
-                    }
+                ids.append(self._generate_id(
+                    path_key + page_key + b"|" + chunk_num.to_bytes(4, "little")
                 ))
+                contents.append(chunk_text)
+                pages_col.append(page_num + 1)
+                chunk_nums.append(chunk_num + 1)
+        
+        logger.info(f"✅ Created {len(ids)} chunks")
+        return ChunkBatch(
+            ids=ids,
+            contents=contents,
+            sources=[file_path.name] * len(ids),
+            pages=np.asarray(pages_col, dtype=np.int32),
+            chunk_indices=np.arange(len(ids), dtype=np.int32),
+            chunk_nums=np.asarray(chunk_nums, dtype=np.int32)
+        )
+
+
+def _extract_page_range(file_path: Path, start: int, end: int) -> List[Tuple[int, str]]:
+    """
+    Extract whitespace-normalized text from pages [start, end)
+    
+    Runs in a worker process, so it opens its own reader.
+    
+    Args:
+        file_path: PDF path
+        start: First page number (0-based)
+        end: Page number to stop before
         
-        logger.info(f"✅ Created {len(all_chunks)} chunks")
-        return all_chunks
+    Returns:
+        List of (page_num, text) pairs
+    """
+    pages = []
+    with _open_pdf(file_path) as reader:
+        for page_num in range(start, end):
+            text = reader.pages[page_num].extract_text() or ""
+            # Collapse runs of spaces but keep newlines, so paragraph breaks survive
+            pages.append((page_num, _WS.sub(' ', text).strip()))
+    return pages
+
+
+@contextmanager
+def _open_pdf(file_path: Path) -> Iterator[pypdf.PdfReader]:
+    """Open a PDF over a read-only mmap, so random access to page objects needs no read() calls"""
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        yield pypdf.PdfReader(mm)
+
+
+class ChunkEmbeddingCache:
+    """Persistent content-hash -> embedding table so unchanged chunks are never re-embedded"""
+    
+    def __init__(
+        self,
+        db_path: Path = EMBEDDING_CACHE_FILE,
+        model_name: str = EMBED_MODEL,
+        backend: str = "torch",
+        normalize: bool = True
+    ):
+        """
+        Args:
+            db_path: SQLite file holding the cache
+            model_name: Embedding model name
+            backend: Encoder backend actually loaded ("torch" or "onnx")
+            normalize: Whether stored embeddings are unit-length
+        """
+        # Vectors from different encoders never share a key: the ONNX file is
+        # part of it for the ONNX backend (fp32 and INT8 exports differ)
+        onnx_file = EMBED_ONNX_FILE if backend == "onnx" else ""
+        self.encoder_key = f"{model_name}\0{backend}\0{onnx_file}\0{'norm' if normalize else 'raw'}"
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunk_cache (hash TEXT PRIMARY KEY, embedding BLOB)"
+        )
+    
+    def content_hash(self, text: str) -> str:
+        """Hash chunk text together with the encoder settings, so an encoder swap invalidates the cache"""
+        return hashlib.blake2b(
+            f"{self.encoder_key}\0{text}".encode("utf-8"), digest_size=16
+        ).hexdigest()
+    
+    def get_many(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Look up cached embeddings for a list of hashes"""
+        found = {}
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(hashes), 500):
+            part = hashes[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT hash, embedding FROM chunk_cache WHERE hash IN ({','.join('?' * len(part))})",
+                part
+            )
+            for h, blob in rows:
+                found[h] = np.frombuffer(blob, dtype=np.float32)
+        return found
+    
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Store newly computed embeddings"""
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO chunk_cache (hash, embedding) VALUES (?, ?)",
+            [(h, np.asarray(v, dtype=np.float32).tobytes()) for h, v in items.items()]
+        )
+        self.conn.commit()
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        self.conn.close()
 
 
 class FastChromaDBManager:
@@ -130,14 +388,17 @@ class FastChromaDBManager:
         persist_directory.mkdir(parents=True, exist_ok=True)
         
         # Initialize client
-        self.client = chromadb.PersistentClient(path=str(persist_directory))
-        
-        # Use faster, smaller embedding model
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=EMBED_MODEL
+        self.client = chromadb.PersistentClient(
+            path=str(persist_directory),
+            settings=Settings(anonymized_telemetry=False, allow_reset=True)
         )
         
-        logger.info(f"💾 ChromaDB initialized at {persist_directory}")
+        # Use faster, smaller embedding model (encoded here, not by Chroma)
+        _configure_torch_threads()
+        device = _detect_device()
+        self.model = _load_encoder(device)
+        
+        logger.info(f"💾 ChromaDB initialized at {persist_directory} (encoding on {device})")
     
     def create_collection(self, collection_name: str = COLLECTION_NAME):
         """Create or recreate collection"""
@@ -149,57 +410,282 @@ class FastChromaDBManager:
         
         collection = self.client.get_or_create_collection(
             name=collection_name,
-            embedding_function=self.embedding_function,
-            metadata={"hnsw:space": "cosine"}
+            embedding_function=None,
+            metadata=HNSW_METADATA
         )
         logger.info(f"✅ Collection '{collection_name}' ready")
         return collection
     
-    def add_chunks(self, chunks: List[DocumentChunk], collection_name: str = COLLECTION_NAME):
-        """Add chunks to collection in batches"""
+    def add_chunks(self, chunks: ChunkBatch, collection_name: str = COLLECTION_NAME):
+        """
+        Embed chunks and add them to the collection in batches
+        
+        Encoding runs on a worker thread one batch ahead of the upserts, so
+        the model and Chroma's index build overlap instead of running back
+        to back.
+        """
         collection = self.create_collection(collection_name)
+        # Unit-length vectors, since the collection's HNSW space is inner product
+        normalize = True
+        cache = ChunkEmbeddingCache(
+            self.persist_directory / EMBEDDING_CACHE_FILE.name,
+            backend=self.model.get_backend(),
+            normalize=normalize
+        )
         
-        batch_size = 100
         total_chunks = len(chunks)
+        documents = chunks.contents
         
         logger.info(f"📝 Adding {total_chunks} chunks to ChromaDB...")
         
-        for i in tqdm(range(0, total_chunks, batch_size), desc="Adding to ChromaDB"):
-            batch = chunks[i:i + batch_size]
+        try:
+            # Only embed chunks whose content has not been seen before; keying
+            # by content hash also embeds repeated text (headers, TOC) once
+            hashes = [cache.content_hash(doc) for doc in documents]
+            embeddings = cache.get_many(hashes)
+            cache_hits = sum(h in embeddings for h in hashes)
             
-            documents = [chunk.content for chunk in batch]
-            metadatas = [chunk.metadata for chunk in batch]
-            ids = [str(chunk.id) for chunk in batch]  # Ensure IDs are strings
+            # Fewer, larger upserts: one SQLite transaction per batch
+            batch_size = min(UPSERT_BATCH_SIZE, self.client.get_max_batch_size())
+            computed: Dict[str, np.ndarray] = {}
+            embedded = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
             
-            collection.upsert(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
-            )
+            def embed_batches() -> None:
+                try:
+                    for i in range(0, total_chunks, batch_size):
+                        batch_hashes = hashes[i:i + batch_size]
+                        misses = {
+                            h: doc
+                            for h, doc in zip(batch_hashes, documents[i:i + batch_size])
+                            if h not in embeddings
+                        }
+                        if misses:
+                            # encode() sorts by length internally, so each batch pads only to its longest text
+                            vectors = self.model.encode(
+                                list(misses.values()),
+                                batch_size=EMBED_BATCH_SIZE,
+                                convert_to_numpy=True,
+                                normalize_embeddings=normalize
+                            )
+                            new = dict(zip(misses, vectors))
+                            embeddings.update(new)
+                            computed.update(new)
+                        embedded.put(np.asarray([embeddings[h] for h in batch_hashes], dtype=np.float32))
+                    embedded.put(None)
+                except Exception as e:
+                    embedded.put(e)
+            
+            worker = threading.Thread(target=embed_batches, daemon=True)
+            worker.start()
+            
+            with tqdm(total=total_chunks, desc="Embedding + adding to ChromaDB") as progress:
+                for i in range(0, total_chunks, batch_size):
+                    vectors = embedded.get()
+                    if isinstance(vectors, Exception):
+                        raise vectors
+                    end = min(i + batch_size, total_chunks)
+                    collection.upsert(
+                        documents=documents[i:end],
+                        metadatas=chunks.metadatas(i, end),
+                        embeddings=vectors,
+                        ids=chunks.ids[i:end]
+                    )
+                    progress.update(end - i)
+            worker.join()
+            
+            # SQLite connections stay on the thread that opened them
+            cache.put_many(computed)
+        finally:
+            cache.close()
         
+        logger.info(f"🧮 Embedded {len(computed)} unique new texts")
+        logger.info(f"♻️  Reused {cache_hits} cached embeddings")
         logger.info(f"✅ Successfully added {total_chunks} chunks to '{collection_name}'")
         return collection
 
 
-def save_chunks_to_json(chunks: List[DocumentChunk], output_path: Path):
-    """Save chunks to JSON file"""
+def build_faiss_index(collection, index_path: Path = Path(FAISS_INDEX_PATH)) -> None:
+    """
+    Build a FAISS ANN index over the embeddings stored in a Chroma collection
+    
+    Uses HNSW (optionally over 8-bit scalar-quantized codes) for small
+    corpora and IVF-PQ above FAISS_IVFPQ_MIN_VECTORS. Quantized indexes are
+    wrapped in IndexRefineFlat so the top candidates are re-ranked with
+    exact vectors. Vectors are L2-normalized so inner product equals
+    cosine similarity.
+    
+    Args:
+        collection: Populated Chroma collection
+        index_path: Path prefix for the .faiss index and .ids.json files
+    """
+    import faiss
+    
+    data = collection.get(include=["embeddings"])
+    ids = [str(i) for i in data["ids"]]
+    vectors = np.ascontiguousarray(data["embeddings"], dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    dim = vectors.shape[1]
+    
+    logger.info(f"🧭 Building FAISS index over {len(ids)} vectors (dim={dim})...")
+    
+    if len(ids) >= FAISS_IVFPQ_MIN_VECTORS:
+        index = faiss.index_factory(dim, FAISS_IVFPQ_FACTORY, faiss.METRIC_INNER_PRODUCT)
+    elif FAISS_SQ8:
+        index = faiss.IndexHNSWSQ(
+            dim, faiss.ScalarQuantizer.QT_8bit, FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT
+        )
+        index.hnsw.efConstruction = FAISS_EF_CONSTRUCTION
+    else:
+        index = faiss.IndexHNSWFlat(dim, FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = FAISS_EF_CONSTRUCTION
+    
+    if not index.is_trained:
+        sample_size = min(len(ids), FAISS_TRAIN_SAMPLE)
+        sample = vectors[np.random.default_rng(0).choice(len(ids), sample_size, replace=False)]
+        index.train(sample)
+        
+        # Recover accuracy lost to quantization with an exact re-rank
+        index = faiss.IndexRefineFlat(index)
+        index.k_factor = FAISS_REFINE_K_FACTOR
+    
+    index.add(vectors)
+    
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    faiss.write_index(index, f"{index_path}.faiss")
+    with open(f"{index_path}.ids.json", 'w', encoding='utf-8') as f:
+        json.dump(ids, f)
+    
+    logger.info(f"✅ FAISS index saved to {index_path}.faiss")
+
+
+def build_int8_index(collection, output_dir: Path = INT8_INDEX_DIR) -> None:
+    """
+    Save 8-bit scalar-quantized copies of the embeddings in a Chroma collection
+    
+    Each dimension d is stored as round(x_d / scale_d) in int8, with
+    scale_d = max |x_d| / 127, so vectors take a quarter of the float32
+    space. The norm of every dequantized row is saved too, letting the
+    engine compute exact cosine similarity against the codes.
+    
+    Args:
+        collection: Populated Chroma collection
+        output_dir: Directory for the ids, codes, scale and norms .npy files
+    """
+    data = collection.get(include=["embeddings"])
+    ids = np.array([str(i) for i in data["ids"]], dtype=str)
+    vectors = np.asarray(data["embeddings"], dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    
+    logger.info(f"🗜️  Quantizing {len(ids)} vectors to int8 (dim={vectors.shape[1]})...")
+    
+    scale = np.abs(vectors).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+    norms = np.linalg.norm(codes * scale, axis=1).astype(np.float32)
+    
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, array in (("ids", ids), ("codes", codes), ("scale", scale.astype(np.float32)), ("norms", norms)):
+        np.save(output_dir / f"{name}.npy", array, allow_pickle=False)
+    
+    logger.info(f"✅ Int8 index saved to {output_dir}")
+
+
+def save_chunks(chunks: ChunkBatch, output_path: Path):
+    """Save chunks as a zstd-compressed Arrow (Feather v2) table"""
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump([asdict(c) for c in chunks], f, ensure_ascii=False, indent=2)
+    table = pa.table({
+        "id": chunks.ids,
+        "content": chunks.contents,
+        "source": chunks.sources,
+        "page": chunks.pages,
+        "chunk_index": chunks.chunk_indices,
+        "chunk_num": chunks.chunk_nums
+    })
+    feather.write_feather(table, str(output_path), compression="zstd")
     
     logger.info(f"💾 Saved {len(chunks)} chunks to {output_path}")
 
 
-def needs_processing(pdf_path: Path, chunks_path: Path) -> bool:
-    """Check if PDF needs reprocessing"""
-    if not chunks_path.exists():
+def load_chunks(chunks_path: Path) -> ChunkBatch:
+    """Load chunks written by save_chunks"""
+    table = feather.read_table(str(chunks_path))
+    return ChunkBatch(
+        ids=table.column("id").to_pylist(),
+        contents=table.column("content").to_pylist(),
+        sources=table.column("source").to_pylist(),
+        pages=table.column("page").to_numpy(),
+        chunk_indices=table.column("chunk_index").to_numpy(),
+        chunk_nums=table.column("chunk_num").to_numpy()
+    )
+
+
+def save_vocabulary(chunks: ChunkBatch, output_path: Path) -> None:
+    """Save the corpus content-term vocabulary used to prefilter off-topic queries"""
+    vocab = set()
+    for content in chunks.contents:
+        vocab.update(content_terms(content))
+    
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(sorted(vocab), f, ensure_ascii=False)
+    
+    logger.info(f"💾 Saved {len(vocab)} vocabulary terms to {output_path}")
+
+
+def save_bm25_index(chunks: ChunkBatch, output_dir: Path) -> None:
+    """Save a BM25 index over the chunks, keyed by Chroma id, for the dense-search prefilter"""
+    try:
+        from rank_bm25 import BM25Okapi
+    except ImportError:
+        logger.warning("⚠️  rank-bm25 not installed. Skipping BM25 prefilter index.")
+        logger.warning("   Install with: pip install rank-bm25")
+        return
+    
+    bm25 = BM25Okapi([tokenize(content) for content in chunks.contents])
+    BM25Index.from_bm25(bm25, np.array(chunks.ids, dtype=str)).save(output_dir)
+    
+    logger.info(f"💾 Saved BM25 index over {len(chunks)} chunks to {output_dir}")
+
+
+def _pdf_fingerprint(pdf_path: Path) -> str:
+    """Content hash of the PDF (BLAKE3 over an mmap when available, else BLAKE2b in 1 MB blocks)"""
+    if blake3 is not None:
+        return blake3.blake3().update_mmap(str(pdf_path)).hexdigest()
+    
+    digest = hashlib.blake2b()
+    with open(pdf_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _chunks_meta(pdf_path: Path) -> Dict:
+    """Everything the cached chunks depend on"""
+    return {
+        "pdf_hash": _pdf_fingerprint(pdf_path),
+        "embed_model": EMBED_MODEL,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "min_chunk_tokens": MIN_CHUNK_TOKENS
+    }
+
+
+def save_chunks_meta(pdf_path: Path, meta_path: Path = CHUNKS_META_FILE) -> None:
+    """Record what the cached chunks were built from"""
+    meta_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(_chunks_meta(pdf_path), f, indent=2)
+
+
+def needs_processing(pdf_path: Path, chunks_path: Path, meta_path: Path = CHUNKS_META_FILE) -> bool:
+    """Check if PDF needs reprocessing (contents or chunking settings changed)"""
+    if not chunks_path.exists() or not meta_path.exists():
         return True
     
-    # Check if PDF was modified after chunks
-    pdf_mtime = pdf_path.stat().st_mtime
-    chunks_mtime = chunks_path.stat().st_mtime
-    return pdf_mtime > chunks_mtime
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        saved_meta = json.load(f)
+    return saved_meta != _chunks_meta(pdf_path)
 
 
 def ingest_fast(pdf_path: Path = PDF_PATH, force: bool = False):
@@ -211,14 +697,7 @@ def ingest_fast(pdf_path: Path = PDF_PATH, force: bool = False):
     # Check if processing needed
     if not force and not needs_processing(pdf_path, CHUNKS_FILE):
         logger.info("ℹ️  Using existing chunks (PDF unchanged)")
-        with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
-            chunk_dicts = json.load(f)
-            # Ensure IDs are strings when loading from JSON
-            chunks = [DocumentChunk(
-                id=str(c['id']),
-                content=c['content'],
-                metadata=c['metadata']
-            ) for c in chunk_dicts]
+        chunks = load_chunks(CHUNKS_FILE)
     else:
         # Process PDF
         processor = FastPDFProcessor(
@@ -228,11 +707,21 @@ def ingest_fast(pdf_path: Path = PDF_PATH, force: bool = False):
         chunks = processor.process_pdf(pdf_path)
         
         # Save chunks
-        save_chunks_to_json(chunks, CHUNKS_FILE)
+        save_chunks(chunks, CHUNKS_FILE)
+        save_chunks_meta(pdf_path)
+    
+    save_vocabulary(chunks, VOCAB_FILE)
+    save_bm25_index(chunks, BM25_INDEX_DIR)
     
     # Build ChromaDB index
     chroma = FastChromaDBManager(CHROMA_DIR)
-    chroma.add_chunks(chunks, COLLECTION_NAME)
+    collection = chroma.add_chunks(chunks, COLLECTION_NAME)
+    
+    # Build FAISS ANN index when configured as the vector store
+    if VECTOR_STORE_TYPE == "faiss":
+        build_faiss_index(collection)
+    elif VECTOR_STORE_TYPE == "int8":
+        build_int8_index(collection)
     
     logger.info("=" * 80)
     logger.info("✅ Fast Ingestion Complete!")
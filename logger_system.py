@@ -2,13 +2,16 @@
 Comprehensive Logging System for Multi-Agent Medical Assistant
 Logs all interactions, agent handoffs, and system events
 """
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 import json
 
-from config import LOGS_DIR, LOG_FORMAT, LOG_DATE_FORMAT
+from config import LOGS_DIR, LOG_FORMAT, LOG_DATE_FORMAT, LOG_MAX_BYTES, LOG_BACKUP_COUNT
 
 
 class MedicalAssistantLogger:
@@ -26,8 +29,13 @@ class MedicalAssistantLogger:
         self.logger = logging.getLogger("MedicalAssistant")
         self.logger.setLevel(logging.DEBUG)
         
-        # File handler
-        file_handler = logging.FileHandler(self.log_file, encoding='utf-8')
+        # File handler (size-capped)
+        file_handler = RotatingFileHandler(
+            self.log_file,
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT,
+            encoding='utf-8'
+        )
         file_handler.setLevel(logging.DEBUG)
         file_formatter = logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT)
         file_handler.setFormatter(file_formatter)
@@ -38,9 +46,14 @@ class MedicalAssistantLogger:
         console_formatter = logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT)
         console_handler.setFormatter(console_formatter)
         
-        # Add handlers
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        # Callers only enqueue records; a background listener does the I/O
+        log_queue = queue.Queue(-1)
+        self.logger.addHandler(QueueHandler(log_queue))
+        self._listener = QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True
+        )
+        self._listener.start()
+        atexit.register(self._listener.stop)
         
         self.logger.info("=" * 80)
         self.logger.info("Medical Assistant Logging System Initialized")
@@ -54,10 +67,9 @@ class MedicalAssistantLogger:
     
     def log_agent_action(self, agent_name: str, action: str, details: Optional[dict] = None):
         """Log agent actions"""
-        details_str = json.dumps(details, indent=2) if details else ""
         self.logger.info(f"[{agent_name}] ACTION: {action}")
-        if details_str:
-            self.logger.debug(f"[{agent_name}] DETAILS: {details_str}")
+        if details and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"[{agent_name}] DETAILS: {json.dumps(details, indent=2)}")
     
     def log_agent_response(self, agent_name: str, response: str):
         """Log agent responses"""
@@ -71,9 +83,10 @@ class MedicalAssistantLogger:
     def log_tool_call(self, tool_name: str, parameters: dict, result: Optional[dict] = None):
         """Log tool invocations"""
         self.logger.info(f"🔧 TOOL CALL: {tool_name}")
-        self.logger.debug(f"   Parameters: {json.dumps(parameters, indent=2)}")
-        if result:
-            self.logger.debug(f"   Result: {json.dumps(result, indent=2)}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"   Parameters: {json.dumps(parameters, indent=2)}")
+            if result:
+                self.logger.debug(f"   Result: {json.dumps(result, indent=2)}")
     
     def log_rag_retrieval(self, query: str, num_docs: int, sources: list):
         """Log RAG document retrieval"""
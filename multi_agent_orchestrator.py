@@ -3,13 +3,32 @@ Multi-Agent Orchestrator
 Coordinates between Receptionist Agent, Clinical Agent, and Web Search Agent
 Manages conversation flow and agent handoffs
 """
-from typing import Dict, List, Optional
+import re
+from dataclasses import asdict, dataclass
+from collections import deque
+from typing import Deque, Dict, Generator, Iterator, List, Optional, Union
 from enum import Enum
 
+from langchain_groq import ChatGroq
+
+from config import GROQ_API_KEY, GROQ_MODEL, TEMPERATURE
 from logger_system import get_logger
+from rate_limiter import get_groq_callbacks
+from patient_retrieval_tool import PatientRetrievalTool, get_patient_tool
+from rag_engine_fast import FastRAGEngine, get_rag_engine
 from receptionist_agent import ReceptionistAgent
 from clinical_agent import ClinicalAgent
-from web_search_agent import WebSearchAgent
+from web_search_agent import WebSearchAgent, get_web_search_agent
+
+# Most recent interactions kept in the conversation log
+CONVERSATION_LOG_MAX_ENTRIES = 1000
+
+# Phrases that hand a clinical conversation back to the receptionist
+RESET_PHRASES = ("go back", "receptionist", "start over", "new patient")
+_RESET_PHRASES_RE = re.compile(
+    "|".join(re.escape(phrase) for phrase in RESET_PHRASES),
+    re.IGNORECASE
+)
 
 
 class AgentType(Enum):
@@ -19,6 +38,46 @@ class AgentType(Enum):
     WEB_SEARCH = "web_search"
 
 
+@dataclass
+class SharedResources:
+    """Stateless, expensive-to-build components shared by every session"""
+    llm: ChatGroq
+    rag_engine: FastRAGEngine
+    web_search_agent: WebSearchAgent
+    patient_tool: PatientRetrievalTool
+
+
+@dataclass
+class Interaction:
+    """One entry in the orchestrator's conversation log"""
+    __slots__ = ("agent", "message_type", "content", "metadata")
+    agent: str
+    message_type: str
+    content: str
+    metadata: Dict
+
+
+def create_shared_resources() -> SharedResources:
+    """
+    Build the LLM client, vectorstore handle, web search agent and patient tool
+    
+    Returns:
+        SharedResources to hand to one or more orchestrators
+    """
+    return SharedResources(
+        llm=ChatGroq(
+            model=GROQ_MODEL,
+            temperature=TEMPERATURE,
+            groq_api_key=GROQ_API_KEY,
+            max_tokens=2048,
+            callbacks=get_groq_callbacks()  # Every agent's calls share the Groq limits
+        ),
+        rag_engine=get_rag_engine(),
+        web_search_agent=get_web_search_agent(),
+        patient_tool=get_patient_tool()
+    )
+
+
 class MultiAgentOrchestrator:
     """
     Orchestrator for managing multiple AI agents in the medical assistant system
@@ -31,20 +90,34 @@ class MultiAgentOrchestrator:
     5. Responses are logged and tracked throughout
     """
     
-    def __init__(self):
+    def __init__(self, shared: Optional[SharedResources] = None):
+        """
+        Args:
+            shared: Heavy components reused across sessions; built fresh if omitted
+        """
         self.logger = get_logger()
         self.logger.log_system_event("Initializing Multi-Agent Orchestrator")
         
-        # Initialize all agents
-        self.receptionist_agent = ReceptionistAgent()
-        self.clinical_agent = ClinicalAgent()
-        self.web_search_agent = WebSearchAgent()
+        shared = shared or create_shared_resources()
+        
+        # Initialize all agents; per-session state lives on the agents,
+        # models and clients come from the shared handle
+        self.receptionist_agent = ReceptionistAgent(
+            llm=shared.llm,
+            patient_tool=shared.patient_tool
+        )
+        self.clinical_agent = ClinicalAgent(
+            llm=shared.llm,
+            web_search_agent=shared.web_search_agent
+        )
+        self.web_search_agent = shared.web_search_agent
         
         # State management
         self.current_agent = AgentType.RECEPTIONIST
         self.session_active = False
         self.patient_context = None
-        self.conversation_log = []
+        self.conversation_log: Deque[Interaction] = deque(maxlen=CONVERSATION_LOG_MAX_ENTRIES)
+        self.interaction_count = 0  # Total logged, including entries evicted from the deque
         
         self.logger.log_system_event(
             "Multi-Agent Orchestrator initialized",
@@ -89,13 +162,32 @@ class MultiAgentOrchestrator:
                 - action: What action was taken
                 - metadata: Additional information
         """
+        result = None
+        for item in self.process_message_stream(user_message):
+            if isinstance(item, dict):
+                result = item
+        return result
+    
+    def process_message_stream(self, user_message: str) -> Iterator[Union[str, Dict]]:
+        """
+        Process user message, yielding response text as the active agent generates it
+        
+        Args:
+            user_message: User's input message
+            
+        Yields:
+            Text chunks of streamed responses, then the same dict
+            process_message returns. Responses that are not streamed
+            yield only the dict.
+        """
         if not self.session_active:
-            return {
+            yield {
                 "response": "Please start a new session first.",
                 "current_agent": None,
                 "action": "error",
                 "metadata": {}
             }
+            return
         
         self.logger.log_user_message(user_message)
         
@@ -108,14 +200,14 @@ class MultiAgentOrchestrator:
         try:
             # Route based on current agent
             if self.current_agent == AgentType.RECEPTIONIST:
-                return self._handle_receptionist_flow(user_message)
+                yield from self._handle_receptionist_flow(user_message)
             
             elif self.current_agent == AgentType.CLINICAL:
-                return self._handle_clinical_flow(user_message)
+                yield from self._handle_clinical_flow(user_message)
             
             else:
                 # Should not reach here in normal flow
-                return {
+                yield {
                     "response": "I'm not sure how to help with that. Let me start over.",
                     "current_agent": self.current_agent.value,
                     "action": "reset",
@@ -123,18 +215,27 @@ class MultiAgentOrchestrator:
                 }
         
         except Exception as e:
-            self.logger.log_error("MessageProcessing", str(e), {"user_message": user_message})
-            return {
-                "response": "I apologize, I encountered an error. Please try again.",
-                "current_agent": self.current_agent.value if self.current_agent else None,
-                "action": "error",
-                "metadata": {"error": str(e)}
-            }
+            yield self._error_response(user_message, e)
     
-    def _handle_receptionist_flow(self, user_message: str) -> Dict:
-        """Handle message when Receptionist Agent is active"""
+    def _error_response(self, user_message: str, error: Exception) -> Dict:
+        """Log a failed turn and build the apology returned to the user"""
+        self.logger.log_error("MessageProcessing", str(error), {"user_message": user_message})
+        return {
+            "response": "I apologize, I encountered an error. Please try again.",
+            "current_agent": self.current_agent.value if self.current_agent else None,
+            "action": "error",
+            "metadata": {"error": str(error)}
+        }
+    
+    def _handle_receptionist_flow(self, user_message: str) -> Iterator[Union[str, Dict]]:
+        """Handle message when Receptionist Agent is active, passing its text chunks through"""
         
-        result = self.receptionist_agent.process_message(user_message)
+        result = None
+        for item in self.receptionist_agent.stream_message(user_message):
+            if isinstance(item, dict):
+                result = item
+            else:
+                yield item
         
         # Check if routing is needed
         if result.get("action") == "route_to_clinical":
@@ -148,11 +249,9 @@ class MultiAgentOrchestrator:
                 f"Medical query: {result.get('original_query', '')[:50]}..."
             )
             
-            # Process the medical query with Clinical Agent
-            clinical_result = self.clinical_agent.process_medical_query(
-                result.get("original_query"),
-                self.patient_context
-            )
+            # Process the medical query with Clinical Agent, after the handoff notice
+            yield f"{result['response']}\n\n---\n\n"
+            clinical_result = yield from self._stream_clinical_answer(result.get("original_query"))
             
             response = f"{result['response']}\n\n---\n\n{clinical_result['answer']}"
             
@@ -166,7 +265,7 @@ class MultiAgentOrchestrator:
                 }
             )
             
-            return {
+            yield {
                 "response": response,
                 "current_agent": AgentType.CLINICAL.value,
                 "action": "clinical_response",
@@ -176,6 +275,7 @@ class MultiAgentOrchestrator:
                     "patient_context": self.patient_context
                 }
             }
+            return
         
         # Store patient context if retrieved
         if result.get("action") == "patient_retrieved":
@@ -188,7 +288,7 @@ class MultiAgentOrchestrator:
             metadata={"action": result.get("action")}
         )
         
-        return {
+        yield {
             "response": result["response"],
             "current_agent": AgentType.RECEPTIONIST.value,
             "action": result.get("action"),
@@ -197,11 +297,21 @@ class MultiAgentOrchestrator:
             }
         }
     
-    def _handle_clinical_flow(self, user_message: str) -> Dict:
-        """Handle message when Clinical Agent is active"""
+    def _stream_clinical_answer(self, query: str) -> Generator[str, None, Dict]:
+        """Pass the Clinical Agent's text chunks through and return its result dict"""
+        clinical_result = None
+        for item in self.clinical_agent.stream_medical_query(query, self.patient_context):
+            if isinstance(item, dict):
+                clinical_result = item
+            else:
+                yield item
+        return clinical_result
+    
+    def _handle_clinical_flow(self, user_message: str) -> Iterator[Union[str, Dict]]:
+        """Handle message when Clinical Agent is active, passing its text chunks through"""
         
         # Check if user wants to go back to receptionist
-        if any(phrase in user_message.lower() for phrase in ["go back", "receptionist", "start over", "new patient"]):
+        if _RESET_PHRASES_RE.search(user_message):
             self.current_agent = AgentType.RECEPTIONIST
             self.patient_context = None
             self.receptionist_agent.reset()
@@ -215,19 +325,21 @@ class MultiAgentOrchestrator:
             
             response = "Returning to reception. How can I help you?"
             
-            return {
+            yield {
                 "response": response,
                 "current_agent": AgentType.RECEPTIONIST.value,
                 "action": "return_to_receptionist",
                 "metadata": {}
             }
+            return
         
         # Process medical query
-        result = self.clinical_agent.process_medical_query(
-            user_message,
-            self.patient_context
-        )
+        result = yield from self._stream_clinical_answer(user_message)
         
+        yield self._clinical_response(result)
+    
+    def _clinical_response(self, result: Dict) -> Dict:
+        """Log a Clinical Agent answer and wrap it as an orchestrator response"""
         self._log_interaction(
             agent=AgentType.CLINICAL,
             message_type="response",
@@ -257,17 +369,17 @@ class MultiAgentOrchestrator:
         metadata: Optional[Dict] = None
     ):
         """Log an interaction to the conversation log"""
-        interaction = {
-            "agent": agent.value if isinstance(agent, AgentType) else agent,
-            "message_type": message_type,
-            "content": content,
-            "metadata": metadata or {}
-        }
-        self.conversation_log.append(interaction)
+        self.conversation_log.append(Interaction(
+            agent=agent.value if isinstance(agent, AgentType) else agent,
+            message_type=message_type,
+            content=content,
+            metadata=metadata or {}
+        ))
+        self.interaction_count += 1
     
     def get_conversation_log(self) -> List[Dict]:
-        """Get the complete conversation log"""
-        return self.conversation_log
+        """Get the conversation log (most recent CONVERSATION_LOG_MAX_ENTRIES interactions) as dicts"""
+        return [asdict(interaction) for interaction in self.conversation_log]
     
     def get_current_agent(self) -> Optional[str]:
         """Get the currently active agent"""
@@ -284,7 +396,8 @@ class MultiAgentOrchestrator:
         self.session_active = False
         self.current_agent = AgentType.RECEPTIONIST
         self.patient_context = None
-        self.conversation_log = []
+        self.conversation_log.clear()
+        self.interaction_count = 0
         
         # Reset all agents
         self.receptionist_agent.reset()
@@ -299,7 +412,8 @@ class MultiAgentOrchestrator:
             "current_agent": self.current_agent.value if self.current_agent else None,
             "patient_identified": self.patient_context is not None,
             "patient_name": self.patient_context.get("patient_name") if self.patient_context else None,
-            "conversation_length": len(self.conversation_log)
+            "conversation_length": len(self.conversation_log),
+            "web_search": self.web_search_agent.get_stats()
         }
 
 
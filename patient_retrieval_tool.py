@@ -3,9 +3,22 @@ Patient Data Retrieval Tool
 Handles database interaction for patient discharge reports
 """
 import json
-from typing import Optional, Dict, List
+from bisect import bisect_left
+from typing import Optional, Dict, List, Tuple
 from pathlib import Path
 
+# Incremental JSON parsing (optional)
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Faster whole-document parse when not streaming (optional)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from config import PATIENTS_JSON
 from logger_system import get_logger
 
@@ -16,19 +29,48 @@ class PatientRetrievalTool:
     def __init__(self, patients_file: Path = PATIENTS_JSON):
         self.patients_file = patients_file
         self.logger = get_logger()
+        
+        # Exact-name lookup: normalized name -> matching records, in file order
+        self._name_index: Dict[str, List[Dict]] = {}
         self.patients_data = self._load_patients()
+        
+        # Lowercased names, parallel to patients_data, so queries never re-lower them
+        self._names_lower: List[str] = [
+            p.get("patient_name", "").lower() for p in self.patients_data
+        ]
+        
+        # Substring search: sorted (suffix, record index) pairs over lowercased names
+        self._name_suffixes: List[Tuple[str, int]] = sorted(
+            (name[start:], i)
+            for i, name in enumerate(self._names_lower)
+            for start in range(len(name))
+        )
+        
         self.logger.log_system_event(
             f"Patient database loaded with {len(self.patients_data)} records"
         )
     
     def _load_patients(self) -> List[Dict]:
-        """Load patient data from JSON file"""
+        """Load patient data from JSON file, indexing each record as it is parsed"""
+        patients = []
         try:
-            with open(self.patients_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(self.patients_file, 'rb') as f:
+                # Stream records when ijson is available instead of building the whole document first
+                if ijson is not None:
+                    records = ijson.items(f, 'item', use_float=True)
+                elif orjson is not None:
+                    records = orjson.loads(f.read())
+                else:
+                    records = json.load(f)
+                for patient in records:
+                    patients.append(patient)
+                    key = patient.get("patient_name", "").strip().lower()
+                    self._name_index.setdefault(key, []).append(patient)
         except Exception as e:
             self.logger.log_error("PatientDataLoad", str(e))
+            self._name_index.clear()
             return []
+        return patients
     
     def get_patient_by_name(self, patient_name: str) -> Optional[Dict]:
         """
@@ -40,20 +82,11 @@ class PatientRetrievalTool:
         Returns:
             Patient discharge report dict or None if not found
         """
-        self.logger.log_tool_call(
-            "get_patient_by_name",
-            {"patient_name": patient_name},
-            None
-        )
-        
         # Normalize name for case-insensitive search
         search_name = patient_name.strip().lower()
         
         # Find matching patients
-        matches = [
-            patient for patient in self.patients_data
-            if patient.get("patient_name", "").lower() == search_name
-        ]
+        matches = self._name_index.get(search_name, [])
         
         if not matches:
             self.logger.log_tool_call(
@@ -94,10 +127,16 @@ class PatientRetrievalTool:
             List of matching patient records
         """
         query = query.strip().lower()
-        matches = [
-            patient for patient in self.patients_data
-            if query in patient.get("patient_name", "").lower()
-        ]
+        if not query:
+            matches = list(self.patients_data)
+        else:
+            # Names containing the query are exactly those with a suffix starting with it
+            found = set()
+            pos = bisect_left(self._name_suffixes, (query,))
+            while pos < len(self._name_suffixes) and self._name_suffixes[pos][0].startswith(query):
+                found.add(self._name_suffixes[pos][1])
+                pos += 1
+            matches = [self.patients_data[i] for i in sorted(found)]
         
         self.logger.log_tool_call(
             "search_patients",
@@ -188,6 +227,18 @@ Follow-up: {patient.get('follow_up')}
         return summary.strip()
 
 
+# Global singleton instance
+_patient_tool: Optional[PatientRetrievalTool] = None
+
+
+def get_patient_tool() -> PatientRetrievalTool:
+    """Get or create the global patient tool, so patients.json is parsed once per process"""
+    global _patient_tool
+    if _patient_tool is None:
+        _patient_tool = PatientRetrievalTool()
+    return _patient_tool
+
+
 # Standalone functions for agent tool integration
 def retrieve_patient(patient_name: str) -> str:
     """
@@ -199,7 +250,7 @@ def retrieve_patient(patient_name: str) -> str:
     Returns:
         Formatted patient information or error message
     """
-    tool = PatientRetrievalTool()
+    tool = get_patient_tool()
     patient = tool.get_patient_by_name(patient_name)
     
     if not patient:
@@ -218,7 +269,7 @@ def search_patients_by_name(query: str) -> str:
     Returns:
         List of matching patient names
     """
-    tool = PatientRetrievalTool()
+    tool = get_patient_tool()
     matches = tool.search_patients(query)
     
     if not matches:
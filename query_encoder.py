@@ -0,0 +1,95 @@
+"""
+Query Encoder
+- Embeds retrieval queries with the same model used at ingest
+- Runs on the fastest available device (CUDA in FP16, Apple MPS, or CPU)
+- CPU hosts use an INT8-quantized ONNX Runtime export when it can be loaded
+- Callable like a Chroma embedding function: list of texts in, vectors out
+"""
+import os
+import logging
+from typing import List
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from config import EMBED_ONNX_FILE
+
+logger = logging.getLogger(__name__)
+
+# Defaults for query-time encoding
+ENCODE_BATCH_SIZE = 64
+ENCODE_CPU_BACKEND = "onnx"  # "onnx" (needs optimum[onnxruntime]) or "torch"
+
+
+def detect_device() -> str:
+    """Pick the fastest available torch device for encoding"""
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+
+    if torch.cuda.is_available():
+        return "cuda"
+    if getattr(torch.backends, "mps", None) and torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+class SentenceTransformerEncoder:
+    """SentenceTransformer query encoder placed on the best available device"""
+
+    def __init__(self, model_name: str, batch_size: int = ENCODE_BATCH_SIZE):
+        """
+        Args:
+            model_name: SentenceTransformer model name
+            batch_size: Most texts encoded per forward pass
+        """
+        self.batch_size = batch_size
+        self.device = detect_device()
+
+        self.backend = "torch"
+        self.model = None
+
+        if self.device == "cpu" and ENCODE_CPU_BACKEND == "onnx":
+            try:
+                # Mean pooling and normalization stay in SentenceTransformer
+                self.model = SentenceTransformer(
+                    model_name,
+                    device=self.device,
+                    backend="onnx",
+                    model_kwargs={"file_name": EMBED_ONNX_FILE}  # Same file as ingest_fast
+                )
+                self.backend = "onnx"
+            except Exception as e:
+                logger.warning(f"⚠️  ONNX query encoder unavailable ({e}), using PyTorch")
+
+        if self.model is None:
+            if self.device == "cpu":
+                # Every core for the transformer matmuls
+                import torch
+                torch.set_num_threads(os.cpu_count() or 1)
+
+            self.model = SentenceTransformer(model_name, device=self.device)
+            if self.device == "cuda":
+                # Half precision roughly doubles GPU throughput for small encoders
+                self.model.half()
+
+        logger.info(f"🧠 Query encoder {model_name} on {self.device} ({self.backend})")
+
+    def __call__(self, input: List[str]) -> List[np.ndarray]:
+        """
+        Embed a batch of texts
+
+        Args:
+            input: Texts to embed
+
+        Returns:
+            One unit-length float32 vector per text
+        """
+        vectors = self.model.encode(
+            list(input),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        return list(vectors.astype(np.float32, copy=False))
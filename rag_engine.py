@@ -2,8 +2,9 @@
 RAG Engine for Nephrology Knowledge Base - Search Only
 This is a lightweight version that only performs searches against a pre-built vector store.
 """
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import logging
 
 from langchain_community.vectorstores import Chroma
@@ -15,6 +16,7 @@ COLLECTION_NAME = "nephrology_knowledge_base"
 EMBED_MODEL = "BAAI/bge-base-en-v1.5"
 TOP_K = 5
 SIMILARITY_THRESHOLD = 0.7  # optional filter
+QUERY_CACHE_SIZE = 256  # Distinct (query, k) pairs whose results are kept
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +55,12 @@ def retrieve_relevant_docs(query: str, k: int = TOP_K) -> List[Dict]:
     Returns:
         List of relevant documents with content and metadata
     """
+    # Copy so callers can't mutate the cached entries
+    return [dict(doc) for doc in _retrieve_cached(query, k)]
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _retrieve_cached(query: str, k: int) -> Tuple[Dict, ...]:
+    """Embed and search once per distinct (query, k); repeats are served from the cache"""
     store = _get_vectorstore()
     docs = store.similarity_search_with_score(query, k=k)
     
@@ -68,7 +76,7 @@ def retrieve_relevant_docs(query: str, k: int = TOP_K) -> List[Dict]:
             })
     
     logger.info("📄 %d chunks passed threshold for query: %.100s …", len(filtered), query)
-    return filtered
+    return tuple(filtered)
 
 def get_context_for_query(query: str, k: int = TOP_K) -> str:
     """
@@ -6,25 +6,37 @@ Supports:
 - Hybrid retrieval (combining dense + sparse)
 - Re-ranking for optimal results
 """
-import json
-import pickle
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+import orjson
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
 
+from bm25_index import BM25Index
+
 # Configuration
 CHROMA_DIR = Path("chroma_db")
-CHUNKS_FILE = Path("data/processed/chunks.json")
-BM25_INDEX_FILE = Path("data/processed/bm25_index.pkl")
+CHUNKS_FILE = Path("data/processed/chunks.jsonl")
+BM25_INDEX_FILE = Path("data/processed/bm25_index")
+DENSE_SQ8_INDEX_FILE = Path("data/processed/dense_sq8.faiss")
+DENSE_SQ8_EF_SEARCH = 64
 COLLECTION_NAME = "nephrology_knowledge_base"
 EMBED_MODEL = "BAAI/bge-base-en-v1.5"
 TOP_K = 5
 DENSE_WEIGHT = 0.7  # Weight for dense retrieval in hybrid mode
 SPARSE_WEIGHT = 0.3  # Weight for sparse retrieval in hybrid mode
+RRF_K = 60  # Reciprocal Rank Fusion damping constant
+QUERY_CACHE_SIZE = 256  # Distinct retrieval calls whose results are kept
+EMBED_CACHE_SIZE = 1024  # Distinct query strings whose embeddings are kept
+WARMUP_QUERY = "chronic kidney disease"
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +51,14 @@ class RetrievalResult:
     retrieval_method: str
 
 
+@dataclass
+class Chunk:
+    """A stored chunk's text and metadata"""
+    __slots__ = ("content", "metadata")
+    content: str
+    metadata: Dict
+
+
 class HybridRAGEngine:
     """
     Advanced RAG Engine with hybrid retrieval capabilities
@@ -47,9 +67,23 @@ class HybridRAGEngine:
     def __init__(self):
         """Initialize the RAG engine"""
         self._vectorstore = None
+        self._vectorstore_lock = threading.Lock()
         self._bm25_index = None
-        self._chunks = None
-        self._chunks_dict = None
+        self._sq8_index = None
+        self._chunks: List[Optional[Chunk]] = []
+        self._chunks_dict: Optional[Dict[int, Chunk]] = None  # Only when ids aren't 0..N-1
+        self._n_chunks = 0
+        
+        # LRU cache of retrieval results, keyed by (query, k, method, dense_weight, sparse_weight)
+        self._query_cache: "OrderedDict[Tuple, List[RetrievalResult]]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        
+        # Dense and sparse legs of hybrid retrieval run side by side
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hybrid-retrieve")
+        
+        # Query embeddings are reused across k, method and the hybrid fan-out
+        self._embeddings: Optional[FastEmbedEmbeddings] = None
+        self._embed_query = lru_cache(maxsize=EMBED_CACHE_SIZE)(self._embed_query)
         
         logger.info("🔧 Initializing Hybrid RAG Engine...")
         self._load_resources()
@@ -64,41 +98,82 @@ class HybridRAGEngine:
                 "Please run 'python ingest_advanced.py' first."
             )
         
-        with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
-            self._chunks = json.load(f)
-            self._chunks_dict = {chunk["id"]: chunk for chunk in self._chunks}
+        # One JSON object per line (written by ingest_advanced.save_chunks)
+        with open(CHUNKS_FILE, 'rb') as f:
+            raw = [orjson.loads(line) for line in f if line.strip()]
+        
+        # Chunk ids are normally 0..N-1, so a chunk's id is its list position
+        self._n_chunks = len(raw)
+        self._chunks = [None] * self._n_chunks
+        for i, chunk in enumerate(raw):
+            self._chunks[i] = Chunk(chunk["content"], chunk["metadata"])
+        
+        # Fall back to an id lookup table for chunk files with other ids
+        self._chunks_dict = None
+        if any(chunk["id"] != i for i, chunk in enumerate(raw)):
+            self._chunks_dict = {chunk["id"]: self._chunks[i] for i, chunk in enumerate(raw)}
         
-        logger.info(f"📚 Loaded {len(self._chunks)} chunks")
+        logger.info("📚 Loaded %d chunks", self._n_chunks)
         
         # Load BM25 index (optional)
         if BM25_INDEX_FILE.exists():
             try:
-                with open(BM25_INDEX_FILE, 'rb') as f:
-                    self._bm25_index = pickle.load(f)
+                self._bm25_index = BM25Index.load(BM25_INDEX_FILE)
                 logger.info("📊 Loaded BM25 sparse index")
             except Exception as e:
-                logger.warning(f"⚠️  Could not load BM25 index: {e}")
+                logger.warning("⚠️  Could not load BM25 index: %s", e)
         else:
             logger.warning("⚠️  BM25 index not found. Sparse retrieval unavailable.")
+        
+        # Load int8 dense index (optional); Chroma is searched when it's absent
+        if DENSE_SQ8_INDEX_FILE.exists():
+            try:
+                import faiss
+                self._sq8_index = faiss.read_index(str(DENSE_SQ8_INDEX_FILE))
+                faiss.downcast_index(self._sq8_index.index).hnsw.efSearch = DENSE_SQ8_EF_SEARCH
+                logger.info("🗜️  Loaded int8 dense index with %d vectors", self._sq8_index.ntotal)
+            except Exception as e:
+                self._sq8_index = None
+                logger.warning("⚠️  Could not load int8 dense index: %s", e)
+    
+    def _get_chunk(self, chunk_id: int) -> Optional[Chunk]:
+        """Look up a chunk by id (positional unless ids were non-contiguous)"""
+        if self._chunks_dict is not None:
+            return self._chunks_dict.get(chunk_id)
+        return self._chunks[chunk_id] if 0 <= chunk_id < self._n_chunks else None
     
     def _get_vectorstore(self) -> Chroma:
         """Lazy load vector store"""
-        if self._vectorstore is None:
-            if not CHROMA_DIR.exists():
-                raise RuntimeError(
-                    f"Vector DB not found at {CHROMA_DIR.absolute()}. "
-                    "Please run 'python ingest_advanced.py' first."
+        with self._vectorstore_lock:
+            if self._vectorstore is None:
+                if not CHROMA_DIR.exists():
+                    raise RuntimeError(
+                        f"Vector DB not found at {CHROMA_DIR.absolute()}. "
+                        "Please run 'python ingest_advanced.py' first."
+                    )
+                
+                logger.info("🔗 Loading ChromaDB vector store...")
+                embeddings = FastEmbedEmbeddings(model_name=EMBED_MODEL)
+                vectorstore = Chroma(
+                    collection_name=COLLECTION_NAME,
+                    embedding_function=embeddings,
+                    persist_directory=str(CHROMA_DIR)
                 )
-            
-            logger.info("🔗 Loading ChromaDB vector store...")
-            self._vectorstore = Chroma(
-                collection_name=COLLECTION_NAME,
-                embedding_function=FastEmbedEmbeddings(model_name=EMBED_MODEL),
-                persist_directory=str(CHROMA_DIR)
-            )
+                
+                # Throwaway search: initializes the ONNX session and pages in the HNSW index
+                vectorstore.similarity_search_by_vector_with_relevance_scores(
+                    embeddings.embed_query(WARMUP_QUERY), k=1
+                )
+                self._embeddings = embeddings
+                self._vectorstore = vectorstore
         
         return self._vectorstore
     
+    def _embed_query(self, query: str) -> tuple:
+        """Embed a query (wrapped in an LRU cache in __init__)"""
+        self._get_vectorstore()
+        return tuple(self._embeddings.embed_query(query))
+    
     def dense_retrieve(self, query: str, k: int = TOP_K) -> List[RetrievalResult]:
         """
         Dense retrieval using semantic vector search
@@ -110,10 +185,15 @@ class HybridRAGEngine:
         Returns:
             List of retrieval results
         """
-        logger.info(f"🔍 Dense retrieval for: {query[:100]}...")
+        logger.info("🔍 Dense retrieval for: %.100s...", query)
+        
+        if self._sq8_index is not None:
+            return self._dense_retrieve_sq8(query, k)
         
         store = self._get_vectorstore()
-        results = store.similarity_search_with_score(query, k=k)
+        results = store.similarity_search_by_vector_with_relevance_scores(
+            list(self._embed_query(query)), k=k
+        )
         
         retrieval_results = []
         for doc, distance in results:
@@ -129,9 +209,45 @@ class HybridRAGEngine:
                 retrieval_method="dense"
             ))
         
-        logger.info(f"✅ Found {len(retrieval_results)} results via dense retrieval")
+        logger.info("✅ Found %d results via dense retrieval", len(retrieval_results))
         return retrieval_results
     
+    def _dense_retrieve_sq8(self, query: str, k: int) -> List[RetrievalResult]:
+        """Dense retrieval against the int8 FAISS index, scored like the Chroma path"""
+        return self._dense_retrieve_sq8_batch([query], k)[0]
+    
+    def _dense_retrieve_sq8_batch(self, queries: List[str], k: int) -> List[List[RetrievalResult]]:
+        """One int8 FAISS search for many queries, from the cached query embeddings"""
+        query_vecs = np.asarray([self._embed_query(query) for query in queries], dtype=np.float32)
+        norms = np.linalg.norm(query_vecs, axis=1, keepdims=True)
+        query_vecs /= np.where(norms > 0, norms, 1.0)
+        similarities, labels = self._sq8_index.search(query_vecs, k)
+        
+        batch_results = []
+        for row_labels, row_similarities in zip(labels, similarities):
+            retrieval_results = []
+            for label, cosine in zip(row_labels, row_similarities):
+                chunk = self._get_chunk(int(label)) if label >= 0 else None
+                if chunk is None:
+                    continue
+                
+                # Same 0-1 scale as Chroma: 1 / (1 + cosine distance)
+                retrieval_results.append(RetrievalResult(
+                    chunk_id=int(label),
+                    content=chunk.content,
+                    metadata=chunk.metadata,
+                    score=1.0 / (1.0 + (1.0 - float(cosine))),
+                    retrieval_method="dense"
+                ))
+            batch_results.append(retrieval_results)
+        
+        logger.info("✅ Found %d results via dense retrieval", sum(len(r) for r in batch_results))
+        return batch_results
+    
+    def _tokenize_query(self, query: str) -> List[str]:
+        """Tokenize a query exactly as the corpus was tokenized at ingest"""
+        return self._bm25_index.tokenize(query) if self._bm25_index is not None else []
+    
     def sparse_retrieve(self, query: str, k: int = TOP_K) -> List[RetrievalResult]:
         """
         Sparse retrieval using BM25
@@ -147,38 +263,44 @@ class HybridRAGEngine:
             logger.warning("⚠️  BM25 index not available, skipping sparse retrieval")
             return []
         
-        logger.info(f"🔍 Sparse retrieval (BM25) for: {query[:100]}...")
+        logger.info("🔍 Sparse retrieval (BM25) for: %.100s...", query)
         
-        # Tokenize query
-        tokenized_query = query.lower().split()
+        tokenized_query = self._tokenize_query(query)
         
         # Get BM25 scores
-        bm25 = self._bm25_index["bm25"]
-        chunk_ids = self._bm25_index["chunk_ids"]
+        chunk_ids = self._bm25_index.chunk_ids
+        
+        scores = self._bm25_index.get_scores(tokenized_query)
         
-        scores = bm25.get_scores(tokenized_query)
+        if len(scores) == 0 or scores.max() <= 0:
+            logger.info("✅ Found 0 results via sparse retrieval")
+            return []
         
-        # Get top-k results
-        top_indices = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
+        # Get top-k results: partition in O(N), then sort only the k winners
+        if k < len(scores):
+            top_indices = np.argpartition(scores, -k)[-k:]
+        else:
+            top_indices = np.arange(len(scores))
+        top_indices = top_indices[np.argsort(-scores[top_indices], kind="stable")]
         
         retrieval_results = []
         for idx in top_indices:
-            chunk_id = chunk_ids[idx]
-            chunk = self._chunks_dict.get(chunk_id)
+            chunk_id = int(chunk_ids[idx])
+            chunk = self._get_chunk(chunk_id)
             
-            if chunk and scores[idx] > 0:
+            if chunk is not None and scores[idx] > 0:
                 # Normalize BM25 score
-                normalized_score = min(scores[idx] / 10.0, 1.0)  # Simple normalization
+                normalized_score = min(float(scores[idx]) / 10.0, 1.0)  # Simple normalization
                 
                 retrieval_results.append(RetrievalResult(
                     chunk_id=chunk_id,
-                    content=chunk["content"],
-                    metadata=chunk["metadata"],
+                    content=chunk.content,
+                    metadata=chunk.metadata,
                     score=normalized_score,
                     retrieval_method="sparse"
                 ))
         
-        logger.info(f"✅ Found {len(retrieval_results)} results via sparse retrieval")
+        logger.info("✅ Found %d results via sparse retrieval", len(retrieval_results))
         return retrieval_results
     
     def hybrid_retrieve(
@@ -191,65 +313,160 @@ class HybridRAGEngine:
         """
         Hybrid retrieval combining dense and sparse methods
         
+        Results are fused with weighted Reciprocal Rank Fusion: a chunk scores
+        dense_weight / (RRF_K + dense_rank) + sparse_weight / (RRF_K + sparse_rank),
+        so only each retriever's top-k ranks matter, not its raw score scale.
+        
         Args:
             query: Search query
             k: Number of results to return
-            dense_weight: Weight for dense retrieval scores
-            sparse_weight: Weight for sparse retrieval scores
+            dense_weight: Weight for dense retrieval ranks
+            sparse_weight: Weight for sparse retrieval ranks
             
         Returns:
-            List of retrieval results sorted by combined score
+            List of retrieval results sorted by fused score, each scored by its retriever
         """
-        logger.info(f"🔍 Hybrid retrieval for: {query[:100]}...")
-        
-        # Get results from both methods
-        dense_results = self.dense_retrieve(query, k=k*2)  # Get more for fusion
-        sparse_results = self.sparse_retrieve(query, k=k*2)
-        
-        # Combine results by chunk_id
-        combined_scores = {}
-        
-        for result in dense_results:
-            combined_scores[result.chunk_id] = {
-                "result": result,
-                "dense_score": result.score,
-                "sparse_score": 0.0
-            }
-        
-        for result in sparse_results:
-            if result.chunk_id in combined_scores:
-                combined_scores[result.chunk_id]["sparse_score"] = result.score
-            else:
-                combined_scores[result.chunk_id] = {
-                    "result": result,
-                    "dense_score": 0.0,
-                    "sparse_score": result.score
-                }
-        
-        # Calculate hybrid scores
-        hybrid_results = []
-        for chunk_id, data in combined_scores.items():
-            hybrid_score = (
-                dense_weight * data["dense_score"] +
-                sparse_weight * data["sparse_score"]
-            )
-            
-            result = data["result"]
-            hybrid_results.append(RetrievalResult(
+        logger.info("🔍 Hybrid retrieval for: %.100s...", query)
+        
+        # Get results from both methods concurrently (ONNX embedding releases the GIL)
+        dense_future = self._executor.submit(self.dense_retrieve, query, k)
+        sparse_results = self.sparse_retrieve(query, k=k)
+        dense_results = dense_future.result()
+        
+        final_results = self._fuse(dense_results, sparse_results, k, dense_weight, sparse_weight)
+        
+        logger.info("✅ Hybrid retrieval returned %d results", len(final_results))
+        return final_results
+    
+    def _fuse(
+        self,
+        dense_results: List[RetrievalResult],
+        sparse_results: List[RetrievalResult],
+        k: int,
+        dense_weight: float,
+        sparse_weight: float
+    ) -> List[RetrievalResult]:
+        """
+        Combine one query's dense and sparse results into the top-k hybrid results
+        
+        Results are ordered by fused RRF score, but each keeps its retriever's own
+        0-1 score (dense similarity, else normalized BM25) for display and thresholds;
+        RRF values sit near 1 / RRF_K and mean nothing as a relevance.
+        """
+        # One representative result per chunk_id, in first-seen order (dense first)
+        results_by_id: Dict[int, RetrievalResult] = {}
+        for result in dense_results + sparse_results:
+            results_by_id.setdefault(result.chunk_id, result)
+        
+        if not results_by_id:
+            return []
+        
+        # Scatter each list's rank contributions into chunk-indexed arrays (best rank wins
+        # for repeated ids, hence the reversed order) and fuse in one pass
+        touched = np.fromiter(results_by_id, dtype=np.int64, count=len(results_by_id))
+        size = max(self._n_chunks, int(touched.max()) + 1)
+        dense_rrf = np.zeros(size)
+        sparse_rrf = np.zeros(size)
+        ranks = np.arange(1, max(len(dense_results), len(sparse_results)) + 1)
+        dense_rrf[[r.chunk_id for r in reversed(dense_results)]] = (
+            dense_weight / (RRF_K + ranks[:len(dense_results)])
+        )[::-1]
+        sparse_rrf[[r.chunk_id for r in reversed(sparse_results)]] = (
+            sparse_weight / (RRF_K + ranks[:len(sparse_results)])
+        )[::-1]
+        hybrid_scores = dense_rrf[touched] + sparse_rrf[touched]
+        
+        # Top-k by fused score; ties keep first-seen order
+        top = np.arange(len(touched))
+        if k < len(touched):
+            top = np.argpartition(-hybrid_scores, k - 1)[:k]
+        top = top[np.lexsort((top, -hybrid_scores[top]))]
+        
+        # Materialize results for the winners only
+        final_results = []
+        for pos in top:
+            result = results_by_id[int(touched[pos])]
+            final_results.append(RetrievalResult(
                 chunk_id=result.chunk_id,
                 content=result.content,
                 metadata=result.metadata,
-                score=hybrid_score,
+                score=result.score,
                 retrieval_method="hybrid"
             ))
         
-        # Sort by hybrid score and return top-k
-        hybrid_results.sort(key=lambda x: x.score, reverse=True)
-        final_results = hybrid_results[:k]
-        
-        logger.info(f"✅ Hybrid retrieval returned {len(final_results)} results")
         return final_results
     
+    def dense_retrieve_batch(self, queries: List[str], k: int = TOP_K) -> List[List[RetrievalResult]]:
+        """
+        Dense retrieval for many queries with one index query, from the cached query embeddings
+        
+        Args:
+            queries: Search queries
+            k: Number of results to return per query
+            
+        Returns:
+            One list of retrieval results per query, in input order
+        """
+        if not queries:
+            return []
+        
+        logger.info("🔍 Batched dense retrieval for %d queries...", len(queries))
+        
+        if self._sq8_index is not None:
+            return self._dense_retrieve_sq8_batch(queries, k)
+        
+        store = self._get_vectorstore()
+        vectors = [list(self._embed_query(query)) for query in queries]
+        raw = store._collection.query(
+            query_embeddings=vectors,
+            n_results=k,
+            include=["documents", "metadatas", "distances"]
+        )
+        
+        batch_results = []
+        for docs, metas, distances in zip(raw["documents"], raw["metadatas"], raw["distances"]):
+            batch_results.append([
+                RetrievalResult(
+                    chunk_id=(meta or {}).get("chunk_index", 0),
+                    content=doc,
+                    metadata=meta or {},
+                    score=1.0 / (1.0 + distance),
+                    retrieval_method="dense"
+                )
+                for doc, meta, distance in zip(docs, metas, distances)
+            ])
+        
+        return batch_results
+    
+    def hybrid_retrieve_batch(
+        self,
+        queries: List[str],
+        k: int = TOP_K,
+        dense_weight: float = DENSE_WEIGHT,
+        sparse_weight: float = SPARSE_WEIGHT
+    ) -> List[List[RetrievalResult]]:
+        """
+        Hybrid retrieval for many queries, sharing one batched dense pass
+        
+        Args:
+            queries: Search queries
+            k: Number of results to return per query
+            dense_weight: Weight for dense retrieval ranks
+            sparse_weight: Weight for sparse retrieval ranks
+            
+        Returns:
+            One list of retrieval results per query, in input order
+        """
+        # Batched dense pass in the background while BM25 scores each query here
+        dense_future = self._executor.submit(self.dense_retrieve_batch, queries, k)
+        sparse_batch = [self.sparse_retrieve(query, k=k) for query in queries]
+        dense_batch = dense_future.result()
+        
+        return [
+            self._fuse(dense_results, sparse_results, k, dense_weight, sparse_weight)
+            for dense_results, sparse_results in zip(dense_batch, sparse_batch)
+        ]
+    
     def retrieve(
         self,
         query: str,
@@ -267,14 +484,29 @@ class HybridRAGEngine:
         Returns:
             List of retrieval results
         """
+        if method not in ("dense", "sparse", "hybrid"):
+            raise ValueError(f"Unknown retrieval method: {method}")
+        
+        key = (query, k, method, DENSE_WEIGHT, SPARSE_WEIGHT)
+        with self._query_cache_lock:
+            cached = self._query_cache.get(key)
+            if cached is not None:
+                self._query_cache.move_to_end(key)
+                return list(cached)
+        
         if method == "dense":
-            return self.dense_retrieve(query, k)
+            results = self.dense_retrieve(query, k)
         elif method == "sparse":
-            return self.sparse_retrieve(query, k)
-        elif method == "hybrid":
-            return self.hybrid_retrieve(query, k)
+            results = self.sparse_retrieve(query, k)
         else:
-            raise ValueError(f"Unknown retrieval method: {method}")
+            results = self.hybrid_retrieve(query, k, DENSE_WEIGHT, SPARSE_WEIGHT)
+        
+        with self._query_cache_lock:
+            self._query_cache[key] = results
+            if len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        
+        return list(results)
     
     def get_context_for_query(
         self,
@@ -329,6 +561,23 @@ class HybridRAGEngine:
         Returns:
             True if relevant documents found above threshold
         """
+        if method == "hybrid":
+            # Fused scores are rank-based, so judge relevance on the retrievers' own
+            # scores: dense similarity and normalized BM25, weighted as in the fusion
+            dense = self.dense_retrieve(query, k=1)
+            best_dense = dense[0].score if dense else 0.0
+            if DENSE_WEIGHT * best_dense + SPARSE_WEIGHT < threshold:
+                return False
+            
+            # No query term in the BM25 vocabulary: sparse adds nothing, so the dense hit decides
+            vocab = self._bm25_index.term_to_id if self._bm25_index is not None else {}
+            if not any(token in vocab for token in self._tokenize_query(query)):
+                return DENSE_WEIGHT * best_dense >= threshold
+            
+            sparse = self.sparse_retrieve(query, k=1)
+            best_sparse = sparse[0].score if sparse else 0.0
+            return DENSE_WEIGHT * best_dense + SPARSE_WEIGHT * best_sparse >= threshold
+        
         results = self.retrieve(query, k=1, method=method)
         return len(results) > 0 and results[0].score >= threshold
 
@@ -337,14 +586,26 @@ class HybridRAGEngine:
 _rag_engine: Optional[HybridRAGEngine] = None
 
 
+_rag_engine_lock = threading.Lock()
+
+
 def get_rag_engine() -> HybridRAGEngine:
     """Get or create the global RAG engine instance"""
     global _rag_engine
-    if _rag_engine is None:
-        _rag_engine = HybridRAGEngine()
+    with _rag_engine_lock:
+        if _rag_engine is None:
+            _rag_engine = HybridRAGEngine()
     return _rag_engine
 
 
+def _warm_up() -> None:
+    """Build the engine and load the embedding model and vector index ahead of the first query"""
+    try:
+        get_rag_engine()._get_vectorstore()
+    except Exception as e:
+        logger.warning("⚠️  RAG engine warm-up failed: %s", e)
+
+
 # Convenience functions for backward compatibility
 def retrieve_relevant_docs(query: str, k: int = TOP_K) -> List[Dict]:
     """Retrieve relevant documents (backward compatible)"""
@@ -375,3 +636,6 @@ def has_relevant_information(query: str) -> bool:
 
 # For agent tool use
 search_nephrology_knowledge = get_context_for_query
+
+# Warm up in the background so the first real query doesn't pay for loading
+threading.Thread(target=_warm_up, daemon=True, name="rag-warmup").start()
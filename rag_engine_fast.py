@@ -3,25 +3,57 @@ Fast RAG Engine - Optimized for Speed
 Uses smaller embedding model (all-MiniLM-L6-v2) for faster retrieval
 """
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+import json
 import logging
+import threading
+from functools import lru_cache
 
+import numpy as np
 import chromadb
-from chromadb.utils import embedding_functions
+from chromadb.config import Settings
+
+from bm25_index import BM25Index, content_terms
+from query_encoder import SentenceTransformerEncoder
+from semantic_cache import SemanticCache
+from config import (
+    VECTOR_STORE_TYPE, FAISS_INDEX_PATH, FAISS_EF_SEARCH, INT8_SCAN_BLOCK,
+    RERANK_ENABLED, RERANKER_MODEL, RERANK_TOP_K,
+    RETRIEVAL_CACHE_THRESHOLD, RETRIEVAL_CACHE_MAX_ENTRIES, RETRIEVAL_CACHE_TTL_S,
+    CHROMA_SEGMENT_CACHE_POLICY, CHROMA_MEMORY_LIMIT_BYTES,
+    CHROMA_SERVER_HOST, CHROMA_SERVER_PORT,
+    BM25_PREFILTER_ENABLED, BM25_PREFILTER_CANDIDATES
+)
 
 # Configuration
 CHROMA_DIR = Path("chroma_db")
 COLLECTION_NAME = "nephrology_knowledge_base"
+VOCAB_FILE = Path("data/processed/vocab.json")
+VOCAB_MIN_MATCHES = 1  # Content terms a query must share with the corpus to be searched
+BM25_INDEX_DIR = Path("data/processed/bm25_index_fast")
+INT8_INDEX_DIR = Path("data/processed/dense_int8_fast")
+RRF_K = 60  # Reciprocal rank fusion constant
 EMBED_MODEL = "all-MiniLM-L6-v2"  # Fast & efficient
 TOP_K = 5
 SIMILARITY_THRESHOLD = 0.5
 
 logger = logging.getLogger(__name__)
 
+# Citation block for each chunk in get_context_for_query
+_SOURCE_TEMPLATE = "[Source {i} - {source} (Page {page}), Relevance: {score:.3f}]\n{content}"
+_CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+QUERY_CACHE_SIZE = 1024  # Distinct queries whose embedding and search results are kept
+
 # Global singleton
 _rag_engine: Optional['FastRAGEngine'] = None
 
 
+def _normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive cache key (the embedding model is uncased)"""
+    return " ".join(query.lower().split())
+
+
 class FastRAGEngine:
     """Fast RAG Engine with ChromaDB"""
     
@@ -30,6 +62,27 @@ class FastRAGEngine:
         self._client = None
         self._collection = None
         self._embedding_function = None
+        self._faiss_index = None
+        self._faiss_ids = None
+        self._int8_codes = None  # int8[N, dim], memory-mapped
+        self._int8_scale = None  # float32[dim]
+        self._int8_norms = None  # float32[N], norms of the dequantized rows
+        self._int8_ids = None
+        self._vocab = None
+        self._bm25: Optional[BM25Index] = None
+        self._reranker = None
+        
+        # Per-instance LRUs so repeated (or re-cased) queries skip the model and the index
+        self._embed_normalized = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._embed_normalized)
+        self._search = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._search)
+        
+        # Near-duplicate queries reuse filtered results; entries are scoped to the index version
+        self._retrieval_cache = SemanticCache(
+            threshold=RETRIEVAL_CACHE_THRESHOLD,
+            max_entries=RETRIEVAL_CACHE_MAX_ENTRIES,
+            ttl_s=RETRIEVAL_CACHE_TTL_S
+        )
+        self._index_version = 0
         
         logger.info("🔧 Initializing Fast RAG Engine...")
         self._load_resources()
@@ -37,27 +90,41 @@ class FastRAGEngine:
     
     def _load_resources(self) -> None:
         """Load ChromaDB resources"""
-        if not CHROMA_DIR.exists():
-            raise RuntimeError(
-                f"ChromaDB not found at {CHROMA_DIR.absolute()}. "
-                "Please run 'python ingest_fast.py' first."
+        if CHROMA_SERVER_HOST:
+            # Queries are HTTP round trips; concurrent callers overlap them on worker threads
+            logger.info(f"🔗 Connecting to ChromaDB server at {CHROMA_SERVER_HOST}:{CHROMA_SERVER_PORT}...")
+            self._client = chromadb.HttpClient(
+                host=CHROMA_SERVER_HOST,
+                port=CHROMA_SERVER_PORT,
+                settings=Settings(anonymized_telemetry=False)
+            )
+        else:
+            if not CHROMA_DIR.exists():
+                raise RuntimeError(
+                    f"ChromaDB not found at {CHROMA_DIR.absolute()}. "
+                    "Please run 'python ingest_fast.py' first."
+                )
+            
+            logger.info("🔗 Loading ChromaDB...")
+            
+            # Initialize client; loaded index segments stay cached in memory
+            self._client = chromadb.PersistentClient(
+                path=str(CHROMA_DIR),
+                settings=Settings(
+                    anonymized_telemetry=False,
+                    chroma_segment_cache_policy=CHROMA_SEGMENT_CACHE_POLICY,
+                    chroma_memory_limit_bytes=CHROMA_MEMORY_LIMIT_BYTES
+                )
             )
         
-        logger.info("🔗 Loading ChromaDB...")
-        
-        # Initialize client
-        self._client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+        # Initialize embedding function (GPU in FP16 when available)
+        self._embedding_function = SentenceTransformerEncoder(EMBED_MODEL)
         
-        # Initialize embedding function
-        self._embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=EMBED_MODEL
-        )
-        
-        # Get collection
+        # Get collection; queries are always embedded here and passed as vectors
         try:
             self._collection = self._client.get_collection(
                 name=COLLECTION_NAME,
-                embedding_function=self._embedding_function
+                embedding_function=None
             )
             doc_count = self._collection.count()
             logger.info(f"📚 Loaded collection with {doc_count} documents")
@@ -66,6 +133,290 @@ class FastRAGEngine:
                 f"Failed to load collection '{COLLECTION_NAME}': {e}. "
                 "Please run 'python ingest_fast.py' first."
             )
+        
+        if VECTOR_STORE_TYPE == "faiss":
+            self._load_faiss_index()
+        elif VECTOR_STORE_TYPE == "int8":
+            self._load_int8_index()
+        
+        # Corpus vocabulary for the off-topic prefilter (optional)
+        if VOCAB_FILE.exists():
+            with open(VOCAB_FILE, 'r', encoding='utf-8') as f:
+                self._vocab = frozenset(json.load(f))
+            logger.info(f"📖 Loaded {len(self._vocab)} vocabulary terms")
+        
+        # BM25 index that narrows the dense search to lexically matching chunks (optional)
+        if BM25_PREFILTER_ENABLED and BM25_INDEX_DIR.exists():
+            try:
+                self._bm25 = BM25Index.load(BM25_INDEX_DIR)
+                logger.info(f"📊 Loaded BM25 prefilter over {len(self._bm25.chunk_ids)} chunks")
+            except Exception as e:
+                logger.warning(f"⚠️  Could not load BM25 index: {e}. Searching all chunks")
+    
+    def _load_faiss_index(self) -> None:
+        """Load the FAISS ANN index built by ingest_fast (falls back to Chroma)"""
+        index_file = Path(f"{FAISS_INDEX_PATH}.faiss")
+        ids_file = Path(f"{FAISS_INDEX_PATH}.ids.json")
+        
+        if not index_file.exists() or not ids_file.exists():
+            logger.warning("⚠️  FAISS index not found, using ChromaDB search")
+            return
+        
+        try:
+            import faiss
+            
+            self._faiss_index = faiss.read_index(str(index_file))
+            
+            # Quantized indexes are wrapped in a refine index; tune the base graph
+            base_index = self._faiss_index
+            if isinstance(base_index, faiss.IndexRefine):
+                base_index = faiss.downcast_index(base_index.base_index)
+            if hasattr(base_index, "hnsw"):
+                base_index.hnsw.efSearch = FAISS_EF_SEARCH
+            with open(ids_file, 'r', encoding='utf-8') as f:
+                self._faiss_ids = json.load(f)
+            logger.info(f"🧭 Loaded FAISS index with {self._faiss_index.ntotal} vectors")
+        except Exception as e:
+            self._faiss_index = None
+            logger.warning(f"⚠️  Could not load FAISS index: {e}. Using ChromaDB search")
+    
+    def _load_int8_index(self) -> None:
+        """Load the int8 codes built by ingest_fast (falls back to Chroma)"""
+        if not (INT8_INDEX_DIR / "codes.npy").exists():
+            logger.warning("⚠️  Int8 index not found, using ChromaDB search")
+            return
+        
+        try:
+            # Codes stay on disk and are paged in by the OS; the rest is small
+            self._int8_codes = np.load(INT8_INDEX_DIR / "codes.npy", mmap_mode="r", allow_pickle=False)
+            self._int8_scale = np.load(INT8_INDEX_DIR / "scale.npy", allow_pickle=False)
+            self._int8_norms = np.maximum(np.load(INT8_INDEX_DIR / "norms.npy", allow_pickle=False), 1e-12)
+            self._int8_ids = np.load(INT8_INDEX_DIR / "ids.npy", allow_pickle=False).tolist()
+            logger.info(f"🗜️  Loaded int8 index with {len(self._int8_ids)} vectors")
+        except Exception as e:
+            self._int8_codes = None
+            logger.warning(f"⚠️  Could not load int8 index: {e}. Using ChromaDB search")
+    
+    def _query_int8(self, query_vecs: np.ndarray, k: int) -> Dict:
+        """
+        Exact cosine search over the int8 codes, in the same shape as _query_faiss
+        
+        Dequantization is folded into the query (scale * q), so each block of
+        codes only needs a widening cast before one matrix product. Blocks are
+        widened into one reused buffer rather than a fresh array each time.
+        """
+        scaled = np.array(query_vecs, dtype=np.float32, ndmin=2) * self._int8_scale
+        
+        n = len(self._int8_ids)
+        scores = np.empty((len(scaled), n), dtype=np.float32)
+        buffer = np.empty((min(INT8_SCAN_BLOCK, n), self._int8_codes.shape[1]), dtype=np.float32)
+        for start in range(0, n, INT8_SCAN_BLOCK):
+            rows = min(INT8_SCAN_BLOCK, n - start)
+            np.copyto(buffer[:rows], self._int8_codes[start:start + rows], casting="unsafe")
+            scores[:, start:start + rows] = scaled @ buffer[:rows].T
+        scores /= self._int8_norms
+        
+        k = min(k, n)
+        all_hits = []
+        for row in scores:
+            top = np.argpartition(row, -k)[-k:] if k < n else np.arange(n)
+            top = top[np.argsort(-row[top], kind="stable")]
+            all_hits.append([(self._int8_ids[i], float(row[i])) for i in top])
+        
+        return self._fetch_hits(all_hits)
+    
+    def _query_faiss(self, query_vecs: np.ndarray, k: int) -> Dict:
+        """
+        Search the FAISS index and fetch documents from ChromaDB
+        
+        Returns a dict shaped like ChromaDB's query() result, one inner list
+        per query row, with cosine distances so callers can treat both
+        backends the same way.
+        """
+        # Query vectors come from the encoder already unit-length
+        query_vecs = np.array(query_vecs, dtype=np.float32, ndmin=2)
+        
+        scores, indices = self._faiss_index.search(query_vecs, k)
+        all_hits = [
+            [(self._faiss_ids[i], float(s)) for i, s in zip(row_indices, row_scores) if i >= 0]
+            for row_indices, row_scores in zip(indices, scores)
+        ]
+        
+        return self._fetch_hits(all_hits)
+    
+    def _fetch_hits(self, all_hits: List[List[Tuple[str, float]]]) -> Dict:
+        """
+        Fetch documents for (id, cosine similarity) hits from ChromaDB
+        
+        Args:
+            all_hits: One list of hits per query, best first
+            
+        Returns:
+            ChromaDB query()-shaped result with cosine distances
+        """
+        # One Chroma fetch for every query's hits
+        hit_ids = list({doc_id for hits in all_hits for doc_id, _ in hits})
+        by_id = {}
+        if hit_ids:
+            fetched = self._collection.get(ids=hit_ids, include=["documents", "metadatas"])
+            by_id = {
+                doc_id: (doc, meta)
+                for doc_id, doc, meta in zip(fetched['ids'], fetched['documents'], fetched['metadatas'])
+            }
+        all_hits = [[(doc_id, score) for doc_id, score in hits if doc_id in by_id] for hits in all_hits]
+        
+        return {
+            'ids': [[doc_id for doc_id, _ in hits] for hits in all_hits],
+            'documents': [[by_id[doc_id][0] for doc_id, _ in hits] for hits in all_hits],
+            'metadatas': [[by_id[doc_id][1] for doc_id, _ in hits] for hits in all_hits],
+            'distances': [[1.0 - score for _, score in hits] for hits in all_hits]
+        }
+    
+    def _bm25_candidates(self, query: str) -> Optional[List[str]]:
+        """
+        Ids of the chunks with the best BM25 scores for a query
+        
+        Args:
+            query: Search query
+            
+        Returns:
+            Up to BM25_PREFILTER_CANDIDATES ids, best first, or None when no
+            chunk shares a term with the query
+        """
+        scores = self._bm25.get_scores(self._bm25.tokenize(query))
+        matching = np.flatnonzero(scores > 0)
+        if len(matching) == 0:
+            return None
+        
+        if len(matching) > BM25_PREFILTER_CANDIDATES:
+            matching = matching[np.argpartition(scores[matching], -BM25_PREFILTER_CANDIDATES)[-BM25_PREFILTER_CANDIDATES:]]
+        matching = matching[np.argsort(-scores[matching], kind="stable")]
+        return [str(chunk_id) for chunk_id in self._bm25.chunk_ids[matching]]
+    
+    def _query_prefiltered(self, query_vec: np.ndarray, candidates: List[str], k: int) -> Dict:
+        """
+        Dense search restricted to BM25 candidates, ordered by reciprocal rank fusion
+        
+        Args:
+            query_vec: One query embedding, shape (1, dim)
+            candidates: Chunk ids from _bm25_candidates, best first
+            k: Number of results
+            
+        Returns:
+            Single-query ChromaDB query() result; distances are kept so the
+            similarity threshold still applies
+        """
+        results = self._collection.query(
+            query_embeddings=query_vec,
+            ids=candidates,
+            n_results=min(k, len(candidates)),
+            include=["documents", "metadatas", "distances"]
+        )
+        
+        sparse_rank = {doc_id: rank for rank, doc_id in enumerate(candidates)}
+        ids = results['ids'][0]
+        order = sorted(
+            range(len(ids)),
+            key=lambda i: -(1.0 / (RRF_K + i + 1) + 1.0 / (RRF_K + sparse_rank[ids[i]] + 1))
+        )
+        return {
+            key: [[results[key][0][i] for i in order]]
+            for key in ('ids', 'documents', 'metadatas', 'distances')
+        }
+    
+    def _query_chroma(self, queries: List[str], query_vecs: np.ndarray, k: int) -> List[Tuple[Dict, int]]:
+        """
+        Search ChromaDB for several queries, BM25-prefiltered where possible
+        
+        Queries with no BM25 candidates (or with no BM25 index loaded) share
+        one unfiltered query() call.
+        
+        Args:
+            queries: Normalized search queries
+            query_vecs: Their embeddings, one row per query
+            k: Number of results per query
+            
+        Returns:
+            (result, row) per query, for _parse_hits
+        """
+        candidates = [
+            self._bm25_candidates(query) if self._bm25 is not None else None
+            for query in queries
+        ]
+        
+        hits: List[Optional[Tuple[Dict, int]]] = [None] * len(queries)
+        unfiltered = [i for i, ids in enumerate(candidates) if not ids]
+        if unfiltered:
+            results = self._collection.query(
+                query_embeddings=query_vecs[unfiltered],
+                n_results=k,
+                include=["documents", "metadatas", "distances"]
+            )
+            for row, i in enumerate(unfiltered):
+                hits[i] = (results, row)
+        
+        for i, ids in enumerate(candidates):
+            if ids:
+                hits[i] = (self._query_prefiltered(query_vecs[i:i + 1], ids, k), 0)
+        
+        return hits
+    
+    def _search(self, query: str, k: int) -> Dict:
+        """
+        Nearest-neighbour search for a normalized query
+        
+        Wrapped in an LRU cache in __init__; callers must not mutate the result.
+        """
+        query_vecs = np.asarray([self.embed_query(query)], dtype=np.float32)
+        if self._int8_codes is not None:
+            return self._query_int8(query_vecs, k)
+        if self._faiss_index is not None:
+            return self._query_faiss(query_vecs, k)
+        results, _ = self._query_chroma([query], query_vecs, k)[0]
+        return results
+    
+    def may_cover(self, query: str) -> bool:
+        """
+        Cheap lexical check that the corpus could answer a query
+        
+        Args:
+            query: Search query
+            
+        Returns:
+            False only when the query shares no content terms with the
+            corpus; always True if no vocabulary was built
+        """
+        if self._vocab is None:
+            return True
+        return len(content_terms(query) & self._vocab) >= VOCAB_MIN_MATCHES
+    
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query with the collection's embedding function
+        
+        Args:
+            query: Search query
+            
+        Returns:
+            Query embedding vector
+        """
+        return list(self._embed_normalized(_normalize_query(query)))
+    
+    def _embed_normalized(self, query: str) -> tuple:
+        """Embed an already-normalized query (wrapped in an LRU cache in __init__)"""
+        return tuple(float(x) for x in self._embedding_function([query])[0])
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed several queries in a single encoder call
+        
+        Args:
+            queries: Search queries
+            
+        Returns:
+            One embedding vector per query, in input order
+        """
+        return [list(vector) for vector in self._embedding_function(list(queries))]
     
     def retrieve(
         self,
@@ -87,38 +438,103 @@ class FastRAGEngine:
         logger.info(f"🔍 Retrieving for: {query[:100]}...")
         
         try:
-            results = self._collection.query(
-                query_texts=[query],
-                n_results=k
-            )
+            normalized = _normalize_query(query)
+            query_vec = self._embed_normalized(normalized)
+            namespace = (k, threshold, self._index_version)
+            
+            cached = self._retrieval_cache.get(query_vec, namespace)
+            if cached is not None:
+                logger.info(f"⚡ Retrieval cache hit ({len(cached)} documents)")
+                return [dict(doc) for doc in cached]
+            
+            results = self._search(normalized, k)
             
             if not results or not results['documents'] or not results['documents'][0]:
                 logger.info("❌ No results found")
+                self._retrieval_cache.set(query_vec, (), namespace)
                 return []
             
-            # Parse results
-            documents = []
-            for i in range(len(results['documents'][0])):
-                # ChromaDB returns distances, convert to similarity (1 - distance)
-                distance = results['distances'][0][i] if 'distances' in results else 0
-                similarity = 1.0 - distance
-                
-                # Filter by threshold
-                if similarity >= threshold:
-                    documents.append({
-                        'content': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i] if 'metadatas' in results else {},
-                        'relevance_score': similarity,
-                        'id': results['ids'][0][i] if 'ids' in results else f"doc_{i}"
-                    })
+            documents = self._parse_hits(results, 0, threshold)
             
             logger.info(f"✅ Found {len(documents)} documents above threshold {threshold}")
+            self._retrieval_cache.set(query_vec, tuple(dict(doc) for doc in documents), namespace)
             return documents
             
         except Exception as e:
             logger.error(f"❌ Retrieval error: {e}")
             return []
     
+    @staticmethod
+    def _parse_hits(results: Dict, row: int, threshold: float) -> List[Dict]:
+        """
+        Turn one query's row of a Chroma-shaped result into document dicts
+        
+        Args:
+            results: Result of _search / _query_faiss / collection.query
+            row: Which query's hits to parse
+            threshold: Minimum similarity score (0-1)
+            
+        Returns:
+            Documents above the threshold, best first
+        """
+        # Cosine ("cosine" space) or 1 - dot ("ip" space, unit vectors) distance
+        # -> similarity for all hits at once
+        docs = results['documents'][row]
+        metas = results.get('metadatas')
+        metas = metas[row] if metas else [{}] * len(docs)
+        ids = results.get('ids')
+        ids = ids[row] if ids else [f"doc_{i}" for i in range(len(docs))]
+        distances = results.get('distances')
+        similarities = (
+            1.0 - np.asarray(distances[row], dtype=np.float32) if distances
+            else np.ones(len(docs), dtype=np.float32)
+        )
+        
+        # Filter by threshold
+        return [
+            {
+                'content': docs[i],
+                'metadata': metas[i],
+                'relevance_score': float(similarities[i]),
+                'id': ids[i]
+            }
+            for i in np.flatnonzero(similarities >= threshold)
+        ]
+    
+    def invalidate_caches(self) -> None:
+        """Forget cached embeddings and results, e.g. after the collection is rewritten"""
+        self._index_version += 1
+        self._retrieval_cache.clear()
+        self._search.cache_clear()
+    
+    def cache_stats(self) -> Dict:
+        """Get retrieval cache counters"""
+        return self._retrieval_cache.stats()
+    
+    def rerank(self, query: str, docs: List[Dict], top_n: int = RERANK_TOP_K) -> List[Dict]:
+        """
+        Reorder retrieved documents with a cross-encoder
+        
+        Args:
+            query: Search query
+            docs: Documents from retrieve()
+            top_n: Number of documents to keep
+            
+        Returns:
+            Best top_n documents, each with a 'rerank_score'
+        """
+        if self._reranker is None:
+            from sentence_transformers import CrossEncoder
+            
+            logger.info(f"🔗 Loading reranker {RERANKER_MODEL}...")
+            self._reranker = CrossEncoder(RERANKER_MODEL)
+        
+        scores = self._reranker.predict([(query, doc['content']) for doc in docs])
+        for doc, score in zip(docs, scores):
+            doc['rerank_score'] = float(score)
+        
+        return sorted(docs, key=lambda doc: doc['rerank_score'], reverse=True)[:top_n]
+    
     def get_context_for_query(
         self,
         query: str,
@@ -141,19 +557,21 @@ class FastRAGEngine:
         if not docs:
             return ""
         
-        # Format with citations
-        context_parts = []
-        for i, doc in enumerate(docs, 1):
-            source = doc['metadata'].get('source', 'nephrology.pdf')
-            page = doc['metadata'].get('page', '?')
-            score = doc['relevance_score']
-            
-            context_parts.append(
-                f"[Source {i} - {source} (Page {page}), Relevance: {score:.3f}]\n"
-                f"{doc['content']}"
-            )
+        # Keep only the best few chunks so the LLM prompt stays short
+        if RERANK_ENABLED and len(docs) > RERANK_TOP_K:
+            docs = self.rerank(query, docs)
         
-        return "\n\n---\n\n".join(context_parts)
+        # Format with citations from one precompiled template
+        return _CONTEXT_SEPARATOR.join(
+            _SOURCE_TEMPLATE.format(
+                i=i,
+                source=doc['metadata'].get('source', 'nephrology.pdf'),
+                page=doc['metadata'].get('page', '?'),
+                score=doc['relevance_score'],
+                content=doc['content']
+            )
+            for i, doc in enumerate(docs, 1)
+        )
     
     def has_relevant_information(
         self,
@@ -175,14 +593,34 @@ class FastRAGEngine:
 
 
 # Singleton pattern
+_rag_engine_lock = threading.Lock()
+
+
 def get_rag_engine() -> FastRAGEngine:
     """Get or create the global RAG engine instance"""
     global _rag_engine
-    if _rag_engine is None:
-        _rag_engine = FastRAGEngine()
+    with _rag_engine_lock:
+        if _rag_engine is None:
+            _rag_engine = FastRAGEngine()
     return _rag_engine
 
 
+def _warm_up() -> None:
+    """Load the encoder and page in the HNSW index before the first user query"""
+    try:
+        engine = get_rag_engine()
+        # Bypass the query caches so no throwaway entry is stored
+        vector = engine._embedding_function(["chronic kidney disease"])[0]
+        engine._collection.query(
+            query_embeddings=np.asarray([vector], dtype=np.float32),
+            n_results=1,
+            include=["distances"]
+        )
+        logger.info("🔥 Fast RAG engine warmed up")
+    except Exception as e:
+        logger.warning(f"⚠️  Fast RAG engine warm-up failed: {e}")
+
+
 # Convenience functions for backward compatibility
 def retrieve_relevant_docs(query: str, k: int = TOP_K) -> List[Dict]:
     """Retrieve relevant documents"""
@@ -202,6 +640,10 @@ def has_relevant_information(query: str, threshold: float = SIMILARITY_THRESHOLD
     return engine.has_relevant_information(query, threshold)
 
 
+# Warm up in the background at process start
+threading.Thread(target=_warm_up, daemon=True, name="fast-rag-warmup").start()
+
+
 # Test function
 if __name__ == "__main__":
     print("🧪 Testing Fast RAG Engine")
@@ -0,0 +1,122 @@
+"""
+Client-side Rate Limiter
+- Token bucket pacing requests to the Groq per-minute limits
+- Tracks requests (RPM) and estimated prompt tokens (TPM) separately
+- Callers wait locally instead of being refused and retried by the API
+- Attached to every ChatGroq client as a callback, so all agents share one budget
+"""
+import threading
+import time
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+
+from config import GROQ_MODEL, GROQ_RPM, GROQ_TPM
+from logger_system import get_logger
+
+
+class TokenBucket:
+    """Thread-safe request and token buckets, refilled continuously"""
+
+    def __init__(self, rpm: int, tpm: int):
+        """
+        Args:
+            rpm: Requests allowed per minute
+            tpm: Tokens allowed per minute
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Add the capacity earned since the last update"""
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def acquire(self, estimated_tokens: int = 0) -> float:
+        """
+        Block until one request of estimated_tokens fits in both buckets
+
+        Args:
+            estimated_tokens: Expected tokens used by the request (capped at tpm)
+
+        Returns:
+            Seconds spent waiting
+        """
+        tokens = min(estimated_tokens, self.tpm)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return waited
+                # Time until both buckets have refilled enough
+                delay = max(
+                    (1 - self._requests) * 60 / self.rpm,
+                    (tokens - self._tokens) * 60 / self.tpm
+                )
+            time.sleep(delay)
+            waited += delay
+
+
+# Global instance: the limits apply to the API key, shared by every agent
+_groq_bucket: Optional[TokenBucket] = None
+_groq_bucket_lock = threading.Lock()
+
+
+def get_groq_rate_limiter() -> TokenBucket:
+    """Get or create the token bucket for Groq calls"""
+    global _groq_bucket
+    with _groq_bucket_lock:
+        if _groq_bucket is None:
+            _groq_bucket = TokenBucket(rpm=GROQ_RPM, tpm=GROQ_TPM)
+    return _groq_bucket
+
+
+class GroqRateLimitHandler(BaseCallbackHandler):
+    """Blocks each chat model call until the shared Groq token bucket admits it"""
+
+    def __init__(self, bucket: TokenBucket):
+        """
+        Args:
+            bucket: Token bucket for the Groq API key
+        """
+        self.bucket = bucket
+
+    def on_chat_model_start(
+        self,
+        serialized: dict,
+        messages: List[List[BaseMessage]],
+        **kwargs: Any
+    ) -> None:
+        """Wait for capacity before the request is sent"""
+        # ~4 characters per token for English text
+        chars = sum(len(str(message.content)) for batch in messages for message in batch)
+        waited = self.bucket.acquire(estimated_tokens=chars // 4)
+        if waited:
+            get_logger().log_system_event(
+                "Groq rate limit pacing",
+                f"Waited {waited:.2f}s before calling {GROQ_MODEL}"
+            )
+
+
+_groq_handler: Optional[GroqRateLimitHandler] = None
+
+
+def get_groq_callbacks() -> List[BaseCallbackHandler]:
+    """Callbacks to pass to every ChatGroq client, so all calls share the Groq limits"""
+    global _groq_handler
+    bucket = get_groq_rate_limiter()
+    with _groq_bucket_lock:
+        if _groq_handler is None:
+            _groq_handler = GroqRateLimitHandler(bucket)
+    return [_groq_handler]
@@ -5,37 +5,119 @@ Receptionist Agent
 - Asks follow-up questions based on discharge information
 - Routes medical queries to Clinical Agent
 """
-from typing import Dict, Optional, List
+import re
+import json
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Generator, Iterator, Optional, List, Tuple, Union
 from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
 
 from config import GROQ_API_KEY, GROQ_MODEL, TEMPERATURE
 from logger_system import get_logger
-from patient_retrieval_tool import PatientRetrievalTool
+from rate_limiter import get_groq_callbacks
+from patient_retrieval_tool import PatientRetrievalTool, get_patient_tool
+
+# Aho-Corasick automaton for the keyword scan (optional, pip install pyahocorasick)
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# spaCy NER is a second, still-local chance at a name before asking the LLM (optional)
+try:
+    import spacy
+except ImportError:
+    spacy = None
+
+
+# Most recent messages (user + assistant) kept in conversation_history
+HISTORY_MAX_MESSAGES = 32
+
+# Messages from the end of the history included in the LLM context
+CONTEXT_HISTORY_MESSAGES = 5
+
+# Keywords that mark a message as a medical question for the Clinical Agent
+MEDICAL_KEYWORDS = (
+    "pain", "symptom", "medication", "side effect", "swelling",
+    "breathing", "kidney", "diagnosis", "treatment", "disease",
+    "should i", "is it normal", "worried", "concern", "doctor",
+    "medical", "health", "blood", "urine", "diet", "exercise"
+)
+
+# One alternation scanned in a single pass, instead of one substring search per keyword
+_MEDICAL_KEYWORDS_RE = re.compile(
+    "|".join(re.escape(keyword) for keyword in MEDICAL_KEYWORDS),
+    re.IGNORECASE
+)
+
+
+def _build_keyword_automaton():
+    """Build a multi-pattern automaton over MEDICAL_KEYWORDS, or None without pyahocorasick"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword in MEDICAL_KEYWORDS:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+
+_MEDICAL_KEYWORDS_AUTOMATON = _build_keyword_automaton()
+
+# Common ways patients introduce themselves; tried in order before any LLM call.
+# Only the lead-in phrase is case-insensitive, so a capture stops at the first lowercase word;
+# a match that is not a known patient still goes to the LLM.
+_NAME_WORD = r"[A-Z][a-zA-Z'\-]+"
+NAME_PATTERNS = (
+    re.compile(rf"(?i:my name is)\s+({_NAME_WORD}(?:\s+{_NAME_WORD}){{0,2}})"),
+    re.compile(rf"\b(?i:i'?m|i am)\s+({_NAME_WORD}(?:\s+{_NAME_WORD})?)"),
+    re.compile(rf"\b(?i:this is)\s+({_NAME_WORD}(?:\s+{_NAME_WORD}){{0,2}})"),
+)
+
+# A message that is just two capitalised words. Greetings such as "Good Morning"
+# match as well, so it is tried last and only kept when a discharge report exists
+BARE_NAME_PATTERN = re.compile(rf"^\s*({_NAME_WORD}\s+{_NAME_WORD})\s*[.!]?\s*$")
 
 
 class ReceptionistAgent:
     """Receptionist Agent for patient intake and routing"""
     
-    def __init__(self):
+    # spaCy pipeline shared by every agent instance, loaded on first use
+    _nlp = None
+    _nlp_failed = False
+    
+    def __init__(
+        self,
+        llm: Optional[ChatGroq] = None,
+        patient_tool: Optional[PatientRetrievalTool] = None
+    ):
+        """
+        Args:
+            llm: Shared Groq client; a new one is created if omitted
+            patient_tool: Shared patient retrieval tool; a new one is created if omitted
+        """
         self.logger = get_logger()
         self.logger.log_system_event("Initializing Receptionist Agent")
         
         # Initialize Groq LLM
-        self.llm = ChatGroq(
+        self.llm = llm or ChatGroq(
             model=GROQ_MODEL,
             temperature=TEMPERATURE,
             groq_api_key=GROQ_API_KEY,
-            max_tokens=2048
+            max_tokens=2048,
+            callbacks=get_groq_callbacks()
         )
         
         # Initialize patient retrieval tool
-        self.patient_tool = PatientRetrievalTool()
+        self.patient_tool = patient_tool or get_patient_tool()
         
         # Agent state
         self.current_patient = None
-        self.conversation_history = []
+        self._formatted_patient_info: Optional[str] = None  # format_patient_info(current_patient)
+        self.conversation_history: Deque[Dict] = deque(maxlen=HISTORY_MAX_MESSAGES)
         self.patient_name_collected = False
         
         # System instructions
@@ -71,15 +153,69 @@ Remember:
 - Route medical queries appropriately
 """
         
+        # Conversation prompt built once: the static system block leads every
+        # request, so providers with prompt caching can reuse its prefill
+        self._prompt = ChatPromptTemplate.from_messages([
+            SystemMessage(content=self.system_instructions),
+            MessagesPlaceholder("patient", optional=True),
+            MessagesPlaceholder("history"),
+            ("human", "{user}")
+        ])
+        
         self.logger.log_agent_action(
             "ReceptionistAgent",
             "Initialized",
             {"model": GROQ_MODEL}
         )
     
+    @classmethod
+    def _get_nlp(cls):
+        """Load the spaCy English pipeline once, or None if it is unavailable"""
+        if cls._nlp is None and not cls._nlp_failed:
+            if spacy is None:
+                cls._nlp_failed = True
+            else:
+                try:
+                    cls._nlp = spacy.load("en_core_web_sm", disable=["parser", "lemmatizer"])
+                except Exception as e:
+                    cls._nlp_failed = True
+                    get_logger().log_error("NameExtraction", f"spaCy model unavailable: {e}")
+        return cls._nlp
+    
+    def _match_name(self, message: str) -> Optional[str]:
+        """
+        Extract a name locally with regex patterns, then spaCy NER, then a bare name
+        
+        Args:
+            message: User's message
+            
+        Returns:
+            Extracted name or None
+        """
+        for pattern in NAME_PATTERNS:
+            match = pattern.search(message)
+            if match:
+                return match.group(1).strip()
+        
+        nlp = self._get_nlp()
+        if nlp is not None:
+            for ent in nlp(message).ents:
+                if ent.label_ == "PERSON":
+                    return ent.text.strip()
+        
+        # Only a known patient counts; anything else is left to the LLM
+        match = BARE_NAME_PATTERN.search(message)
+        if match and self.patient_tool.get_patient_by_name(match.group(1).strip()):
+            return match.group(1).strip()
+        
+        return None
+    
     def extract_name_from_message(self, message: str) -> Optional[str]:
         """
-        Attempt to extract a name from user message using LLM
+        Attempt to extract a name from user message
+        
+        Local pattern matching handles the usual introductions; the LLM is
+        only asked when it finds nothing.
         
         Args:
             message: User's message
@@ -87,6 +223,10 @@ Remember:
         Returns:
             Extracted name or None
         """
+        name = self._match_name(message)
+        if name:
+            return name
+        
         try:
             extraction_prompt = f"""Extract the person's name from this message. Return ONLY the name, nothing else.
 If no name is present, return "NONE".
@@ -106,6 +246,45 @@ Name:"""
             self.logger.log_error("NameExtraction", str(e))
             return None
     
+    def _extract_name_or_reply(self, message: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Ask the LLM for the patient's name and, if there is none, a reply, in one call
+        
+        Replaces the separate name-extraction and conversation calls on turns
+        where the patient has not introduced themselves yet.
+        
+        Args:
+            message: User's message
+            
+        Returns:
+            (name, reply) - name is None when no name was found, reply is None
+            when a name was found or the model returned no usable reply
+        """
+        prompt = f"""{self.system_instructions}
+
+{self._build_context()}
+
+The patient has not been identified yet. Respond with a JSON object with exactly these keys:
+- "name": the person's name if the message below contains it, otherwise "NONE"
+- "reply": if "name" is "NONE", your response to the message (politely ask for their name); otherwise ""
+
+Message: "{message}"
+"""
+        
+        try:
+            raw = self.llm.bind(response_format={"type": "json_object"}).invoke(prompt).content
+            data = json.loads(raw)
+        except Exception as e:
+            self.logger.log_error("NameExtraction", str(e))
+            return None, None
+        
+        name = str(data.get("name") or "").strip()
+        reply = str(data.get("reply") or "").strip()
+        
+        if not name or name.upper() == "NONE" or len(name) > 50:
+            return None, reply or None
+        return name, None
+    
     def retrieve_patient_info(self, patient_name: str) -> Optional[Dict]:
         """
         Retrieve patient discharge information
@@ -126,6 +305,8 @@ Name:"""
         
         if patient_data:
             self.current_patient = patient_data
+            # Formatted once here; reused for the greeting and every later turn's context
+            self._formatted_patient_info = self.patient_tool.format_patient_info(patient_data)
             self.patient_name_collected = True
             
             self.logger.log_tool_call(
@@ -146,15 +327,10 @@ Name:"""
         Returns:
             True if should route to clinical agent
         """
-        medical_keywords = [
-            "pain", "symptom", "medication", "side effect", "swelling",
-            "breathing", "kidney", "diagnosis", "treatment", "disease",
-            "should i", "is it normal", "worried", "concern", "doctor",
-            "medical", "health", "blood", "urine", "diet", "exercise"
-        ]
-        
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in medical_keywords)
+        if _MEDICAL_KEYWORDS_AUTOMATON is not None:
+            # One linear pass, no backtracking; stops at the first keyword found
+            return next(_MEDICAL_KEYWORDS_AUTOMATON.iter(message.lower()), None) is not None
+        return _MEDICAL_KEYWORDS_RE.search(message) is not None
     
     def process_message(self, user_message: str) -> Dict:
         """
@@ -166,6 +342,44 @@ Name:"""
         Returns:
             Dict with response, action, and metadata
         """
+        result = None
+        for item in self.stream_message(user_message):
+            if isinstance(item, dict):
+                result = item
+        return result
+    
+    def _stream_llm(self, prompt) -> Generator[str, None, str]:
+        """
+        Stream an LLM completion chunk by chunk
+        
+        Args:
+            prompt: Prompt string or formatted chat prompt
+            
+        Yields:
+            Text chunks as Groq produces them
+            
+        Returns:
+            The full completion, stripped
+        """
+        parts = []
+        for chunk in self.llm.stream(prompt):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
+        return "".join(parts).strip()
+    
+    def stream_message(self, user_message: str) -> Iterator[Union[str, Dict]]:
+        """
+        Process user message, yielding LLM text as it is generated
+        
+        Args:
+            user_message: User's input message
+            
+        Yields:
+            Text chunks of the response while it is generated, then the same
+            dict process_message returns (response, action, and metadata).
+            Responses that need no LLM call yield only the dict.
+        """
         self.logger.log_user_message(user_message)
         
         # Add to conversation history
@@ -183,30 +397,37 @@ Name:"""
                     f"Medical query detected: {user_message[:50]}..."
                 )
                 
-                return {
+                yield {
                     "response": "I understand you have a medical question. Let me connect you with our Clinical AI Agent who can provide detailed medical information.",
                     "action": "route_to_clinical",
                     "route_to": "clinical",
                     "original_query": user_message,
                     "patient_context": self.current_patient
                 }
+                return
             
             # If patient name not collected, try to extract it
             if not self.patient_name_collected:
-                name = self.extract_name_from_message(user_message)
-                
+                # Local patterns first; otherwise one LLM call yields the name or the reply
+                intake_reply = None
+                patient_data = None
+                name = self._match_name(user_message)
                 if name:
-                    # Try to retrieve patient info
                     patient_data = self.retrieve_patient_info(name)
-                    
+                
+                if not patient_data:
+                    # No local match, or one that is not a patient ("I'm Fine thanks")
+                    local_name = name
+                    name, intake_reply = self._extract_name_or_reply(user_message)
+                    if name and name.lower() != (local_name or "").lower():
+                        patient_data = self.retrieve_patient_info(name)
+                
+                if name:
                     if patient_data:
                         # Handle multiple matches warning
                         if "warning" in patient_data:
-                            warning = patient_data["warning"]
                             patient_data = patient_data["patient"]
-                            formatted_info = self.patient_tool.format_patient_info({"warning": warning, "patient": patient_data})
-                        else:
-                            formatted_info = self.patient_tool.format_patient_info(patient_data)
+                        formatted_info = self._formatted_patient_info
                         
                         # Generate personalized greeting
                         context = f"""Patient discharge information:
@@ -218,7 +439,7 @@ Generate a warm, professional greeting that:
 3. Asks how they're feeling today
 4. Keep it conversational and brief (2-3 sentences)"""
                         
-                        greeting = self.llm.invoke(context).content.strip()
+                        greeting = yield from self._stream_llm(context)
                         
                         self.conversation_history.append({
                             "role": "assistant",
@@ -227,12 +448,13 @@ Generate a warm, professional greeting that:
                         
                         self.logger.log_agent_response("ReceptionistAgent", greeting)
                         
-                        return {
+                        yield {
                             "response": greeting,
                             "action": "patient_retrieved",
                             "patient_data": patient_data,
                             "route_to": None
                         }
+                        return
                     else:
                         # Patient not found
                         response = f"I couldn't find a discharge report for '{name}'. Could you please verify the spelling of your name?"
@@ -242,23 +464,36 @@ Generate a warm, professional greeting that:
                             "content": response
                         })
                         
-                        return {
+                        yield {
                             "response": response,
                             "action": "patient_not_found",
                             "route_to": None
                         }
+                        return
+                
+                elif intake_reply:
+                    self.conversation_history.append({
+                        "role": "assistant",
+                        "content": intake_reply
+                    })
+                    
+                    self.logger.log_agent_response("ReceptionistAgent", intake_reply)
+                    
+                    yield {
+                        "response": intake_reply,
+                        "action": "conversation",
+                        "route_to": None
+                    }
+                    return
             
             # Generate contextual response
-            context = self._build_context()
-            prompt = f"""{self.system_instructions}
-
-{context}
-
-User: {user_message}
-
-Generate an appropriate response following your role as Receptionist Agent."""
+            prompt = self._prompt.invoke({
+                "patient": self._patient_messages(),
+                "history": self._history_messages(),
+                "user": user_message
+            })
             
-            agent_response = self.llm.invoke(prompt).content.strip()
+            agent_response = yield from self._stream_llm(prompt)
             
             self.conversation_history.append({
                 "role": "assistant",
@@ -267,7 +502,7 @@ Generate an appropriate response following your role as Receptionist Agent."""
             
             self.logger.log_agent_response("ReceptionistAgent", agent_response)
             
-            return {
+            yield {
                 "response": agent_response,
                 "action": "conversation",
                 "route_to": None
@@ -277,23 +512,40 @@ Generate an appropriate response following your role as Receptionist Agent."""
             self.logger.log_error("ReceptionistProcessing", str(e))
             error_response = "I apologize, I encountered an error. Could you please repeat that?"
             
-            return {
+            yield {
                 "response": error_response,
                 "action": "error",
                 "route_to": None,
                 "error": str(e)
             }
     
+    def _patient_messages(self) -> List[BaseMessage]:
+        """Current patient's discharge information as a system message, if known"""
+        if not self._formatted_patient_info:
+            return []
+        return [SystemMessage(content=f"Current Patient Information:\n{self._formatted_patient_info}")]
+    
+    def _history_messages(self) -> List[BaseMessage]:
+        """Recent turns before the message being answered, oldest first"""
+        # The newest entry is the user message passed separately as the human turn
+        recent = list(islice(reversed(self.conversation_history), 1, CONTEXT_HISTORY_MESSAGES + 1))
+        return [
+            HumanMessage(content=msg["content"]) if msg["role"] == "user" else AIMessage(content=msg["content"])
+            for msg in reversed(recent)
+        ]
+    
     def _build_context(self) -> str:
         """Build conversation context"""
         context_parts = []
         
-        if self.current_patient:
-            patient_info = self.patient_tool.format_patient_info(self.current_patient)
-            context_parts.append(f"Current Patient Information:\n{patient_info}")
+        if self._formatted_patient_info:
+            context_parts.append(f"Current Patient Information:\n{self._formatted_patient_info}")
         
         if self.conversation_history:
-            recent_history = self.conversation_history[-5:]  # Last 5 exchanges
+            # Walk back from the newest message instead of slicing the whole history
+            recent_history = reversed(list(
+                islice(reversed(self.conversation_history), CONTEXT_HISTORY_MESSAGES)
+            ))
             history_str = "\n".join([
                 f"{msg['role'].title()}: {msg['content']}"
                 for msg in recent_history
@@ -305,7 +557,8 @@ Generate an appropriate response following your role as Receptionist Agent."""
     def reset(self):
         """Reset agent state for new conversation"""
         self.current_patient = None
-        self.conversation_history = []
+        self._formatted_patient_info = None
+        self.conversation_history.clear()
         self.patient_name_collected = False
         self.logger.log_system_event("Receptionist Agent reset for new conversation")
     
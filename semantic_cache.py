@@ -0,0 +1,137 @@
+"""
+Semantic Response Cache
+- Buckets query embeddings with random-projection LSH
+- Verifies candidates with cosine similarity before returning a hit
+- Namespaced entries so per-session / per-patient answers stay isolated
+- Bounded LRU eviction with optional TTL and hit/miss/eviction counters
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class SemanticCache:
+    """Cache responses for semantically similar queries"""
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        n_bits: int = 8,
+        max_entries: int = 1024,
+        seed: int = 42,
+        ttl_s: Optional[float] = None
+    ):
+        self.threshold = threshold
+        self.n_bits = n_bits
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._rng = np.random.default_rng(seed)
+
+        # Projection planes are created lazily once the embedding size is known
+        self._planes: Optional[np.ndarray] = None
+
+        # entry_id -> (bucket_key, unit vector, value, monotonic time stored)
+        self._entries: "OrderedDict[int, Tuple[Tuple, np.ndarray, Any, float]]" = OrderedDict()
+        # bucket_key -> entry ids sharing the same LSH signature
+        self._buckets: Dict[Tuple, List[int]] = {}
+        self._next_id = 0
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _normalize(self, vector: Sequence[float]) -> np.ndarray:
+        """Convert to a float32 unit vector so cosine similarity is a dot product"""
+        vec = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def _bucket_key(self, vec: np.ndarray, namespace: Hashable) -> Tuple:
+        """Compute the LSH bucket for a unit vector"""
+        if self._planes is None or self._planes.shape[0] != vec.shape[0]:
+            self._planes = self._rng.standard_normal(
+                (vec.shape[0], self.n_bits)
+            ).astype(np.float32)
+        signature = np.packbits(vec @ self._planes > 0).tobytes()
+        return (namespace, signature)
+
+    def get(self, vector: Sequence[float], namespace: Hashable = None) -> Optional[Any]:
+        """
+        Look up a cached value for a query embedding
+
+        Args:
+            vector: Query embedding
+            namespace: Scope for the lookup (e.g. session id)
+
+        Returns:
+            Cached value or None on miss
+        """
+        vec = self._normalize(vector)
+
+        with self._lock:
+            key = self._bucket_key(vec, namespace)
+            best_id, best_sim = None, self.threshold
+
+            oldest = time.monotonic() - self.ttl_s if self.ttl_s is not None else None
+
+            for entry_id in self._buckets.get(key, []):
+                _, entry_vec, _, stored_at = self._entries[entry_id]
+                if oldest is not None and stored_at < oldest:
+                    continue
+                similarity = float(vec @ entry_vec)
+                if similarity >= best_sim:
+                    best_id, best_sim = entry_id, similarity
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id][2]
+
+    def set(self, vector: Sequence[float], value: Any, namespace: Hashable = None) -> None:
+        """
+        Store a value for a query embedding
+
+        Args:
+            vector: Query embedding
+            value: Value to cache
+            namespace: Scope for the entry (e.g. session id)
+        """
+        vec = self._normalize(vector)
+
+        with self._lock:
+            key = self._bucket_key(vec, namespace)
+            entry_id = self._next_id
+            self._next_id += 1
+
+            self._entries[entry_id] = (key, vec, value, time.monotonic())
+            self._buckets.setdefault(key, []).append(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                old_id, (old_key, _, _, _) = self._entries.popitem(last=False)
+                bucket = self._buckets[old_key]
+                bucket.remove(old_id)
+                if not bucket:
+                    del self._buckets[old_key]
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> Dict:
+        """Get cache counters"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries)
+        }
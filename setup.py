@@ -6,6 +6,7 @@ Checks prerequisites and runs initial setup
 import os
 import sys
 import subprocess
+from functools import lru_cache
 from pathlib import Path
 
 def print_header(text):
@@ -14,18 +15,31 @@ def print_header(text):
     print(f"  {text}")
     print("=" * 80 + "\n")
 
+@lru_cache(maxsize=None)
+def _dir_entries(directory):
+    """Names in a directory, listed once however many of them are checked"""
+    try:
+        return frozenset(os.listdir(directory))
+    except OSError:
+        return frozenset()
+
+def path_exists(filepath):
+    """Check a path against its parent directory's cached listing"""
+    path = Path(filepath)
+    return path.name in _dir_entries(str(path.parent))
+
 def check_file(filepath, description):
     """Check if a file exists"""
-    if Path(filepath).exists():
+    if path_exists(filepath):
         print(f"✅ {description}: Found")
         return True
     else:
         print(f"❌ {description}: NOT FOUND at {filepath}")
         return False
 
-def check_env_variable(var_name):
-    """Check if environment variable is set"""
-    value = os.getenv(var_name)
+def check_env_variable(var_name, env=None):
+    """Check if environment variable is set (in env, a snapshot of os.environ, if given)"""
+    value = (os.environ if env is None else env).get(var_name)
     if value:
         masked = value[:8] + "..." if len(value) > 8 else value
         print(f"✅ {var_name}: Set ({masked})")
@@ -70,8 +84,9 @@ def main():
     except ImportError:
         print("⚠️  python-dotenv not installed yet")
     
-    env_ok &= check_env_variable("GEMINI_API_KEY")
-    env_ok &= check_env_variable("GROQ_API_KEY")
+    env = dict(os.environ)
+    env_ok &= check_env_variable("GEMINI_API_KEY", env)
+    env_ok &= check_env_variable("GROQ_API_KEY", env)
     
     if not env_ok:
         all_checks_passed = False
@@ -111,19 +126,19 @@ def main():
     # Check 5: Indexes
     print("\n🗂️  Index Check")
     indexes_exist = True
-    if Path("chroma_db").exists():
+    if path_exists("chroma_db"):
         print("✅ Dense index (ChromaDB) exists")
     else:
         print("❌ Dense index not found")
         indexes_exist = False
     
-    if Path("data/processed/chunks.json").exists():
+    if path_exists("data/processed/chunks.jsonl"):
         print("✅ Chunks file exists")
     else:
         print("❌ Chunks file not found")
         indexes_exist = False
     
-    if Path("data/processed/bm25_index.pkl").exists():
+    if path_exists("data/processed/bm25_index"):
         print("✅ Sparse index (BM25) exists")
     else:
         print("⚠️  Sparse index not found (will run without BM25)")
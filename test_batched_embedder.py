@@ -0,0 +1,65 @@
+"""
+Unit tests for the batched query embedder (fake encoder, no models needed)
+
+    pytest test_batched_embedder.py
+"""
+import asyncio
+
+from batched_embedder import BatchedEmbedder
+
+
+class FakeEncoder:
+    """Records each batch it is called with; one-element vectors from text length"""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("encoder down")
+        return [[float(len(text))] for text in texts]
+
+
+def test_concurrent_requests_share_one_call():
+    """Requests arriving inside the window are embedded together, in order"""
+    encoder = FakeEncoder()
+    embedder = BatchedEmbedder(encoder, window_s=0.05)
+    texts = ["a", "bb", "ccc", "dddd"]
+
+    async def run():
+        return await asyncio.gather(*(embedder.embed(text) for text in texts))
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [3.0], [4.0]]
+    assert encoder.calls == [texts]
+
+
+def test_batches_capped_at_max_size():
+    """No encoder call gets more than max_batch_size texts"""
+    encoder = FakeEncoder()
+    embedder = BatchedEmbedder(encoder, max_batch_size=2, window_s=0.05)
+
+    async def run():
+        return await asyncio.gather(*(embedder.embed("x" * n) for n in range(1, 6)))
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert [len(call) for call in encoder.calls] == [2, 2, 1]
+
+
+def test_errors_reach_every_waiter():
+    """An encoder failure is raised to each caller in the batch, and later batches still run"""
+    encoder = FakeEncoder(fail=True)
+    embedder = BatchedEmbedder(encoder, window_s=0.05)
+
+    async def run():
+        results = await asyncio.gather(
+            embedder.embed("a"), embedder.embed("b"), return_exceptions=True
+        )
+        encoder.fail = False
+        return results, await embedder.embed("ok")
+
+    results, after = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert after == [2.0]
+    assert len(encoder.calls) == 2
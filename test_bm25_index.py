@@ -0,0 +1,62 @@
+"""
+Unit tests for the flat BM25 index (no models, data files or network needed)
+
+    pytest test_bm25_index.py
+"""
+import numpy as np
+import pytest
+
+from bm25_index import BM25Index, content_terms, tokenize
+
+rank_bm25 = pytest.importorskip("rank_bm25")
+
+CORPUS = [
+    "Chronic kidney disease is a gradual loss of kidney function.",
+    "Dialysis filters waste from the blood when the kidneys fail.",
+    "A low sodium diet helps control blood pressure in kidney disease.",
+    "Potassium and phosphorus intake should be limited on dialysis.",
+    "Acute kidney injury can follow dehydration or certain medications.",
+]
+CHUNK_IDS = [10, 11, 12, 13, 14]
+QUERIES = [
+    "kidney disease",
+    "dialysis blood",
+    "kidney kidney diet",  # Repeated terms count repeatedly
+    "sodium, potassium; phosphorus!",
+    "completely unknown words",
+]
+
+
+@pytest.fixture
+def bm25():
+    """rank_bm25 reference model over the test corpus"""
+    return rank_bm25.BM25Okapi([tokenize(text) for text in CORPUS])
+
+
+def test_tokenize_strips_punctuation():
+    """Terms are lowercase word characters only"""
+    assert tokenize("Kidney, Dialysis; eGFR!") == ["kidney", "dialysis", "egfr"]
+    assert content_terms("What is the eGFR of a kidney in 2024?") == {"egfr", "kidney"}
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_scores_match_rank_bm25(bm25, query):
+    """Flat postings score every document exactly like BM25Okapi"""
+    index = BM25Index.from_bm25(bm25, CHUNK_IDS)
+    tokens = tokenize(query)
+    np.testing.assert_allclose(index.get_scores(tokens), bm25.get_scores(tokens))
+
+
+def test_save_load_round_trip(bm25, tmp_path):
+    """A saved index loads with the same vocabulary, ids, tokenizer and scores"""
+    index = BM25Index.from_bm25(bm25, CHUNK_IDS)
+    index.save(tmp_path / "bm25")
+    loaded = BM25Index.load(tmp_path / "bm25")
+
+    assert loaded.vocab.tolist() == index.vocab.tolist()
+    assert loaded.chunk_ids.tolist() == CHUNK_IDS
+    assert (loaded.k1, loaded.b) == (index.k1, index.b)
+    assert loaded.token_pattern == index.token_pattern
+    for query in QUERIES:
+        tokens = loaded.tokenize(query)
+        np.testing.assert_allclose(loaded.get_scores(tokens), index.get_scores(tokens))
@@ -0,0 +1,36 @@
+"""
+Unit tests for ingest_fast chunk windowing (pure function, no models loaded)
+
+    pytest test_ingest_fast.py
+"""
+import pytest
+
+ingest_fast = pytest.importorskip("ingest_fast")
+_token_spans = ingest_fast._token_spans
+
+
+def test_windows_overlap_and_cover_the_page():
+    """Without paragraph breaks, full-size windows overlap by exactly `overlap` tokens"""
+    spans = _token_spans([], num_tokens=600, chunk_size=254, overlap=64)
+
+    assert spans == [(0, 254), (190, 444), (380, 600)]
+    assert all(end - start <= 254 for start, end in spans)
+    for (_, prev_end), (start, _) in zip(spans, spans[1:]):
+        assert prev_end - start == 64
+
+
+def test_window_ends_at_paragraph_break_in_second_half():
+    """A window is cut at the last paragraph break past its midpoint"""
+    spans = _token_spans([100, 200, 400], num_tokens=600, chunk_size=254, overlap=64)
+
+    # 200 is past the first window's midpoint; 100 alone would not be used
+    assert spans[0] == (0, 200)
+    assert spans[1] == (136, 390)
+    assert spans[-1][1] == 600
+    assert _token_spans([100], num_tokens=600, chunk_size=254, overlap=64)[0] == (0, 254)
+
+
+def test_short_and_empty_pages():
+    """A page shorter than one window is a single span; an empty page has none"""
+    assert _token_spans([], num_tokens=50, chunk_size=254, overlap=64) == [(0, 50)]
+    assert _token_spans([], num_tokens=0, chunk_size=254, overlap=64) == []
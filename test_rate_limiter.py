@@ -0,0 +1,58 @@
+"""
+Unit tests for the client-side token bucket (runs on a fake clock, no sleeping)
+
+    pytest test_rate_limiter.py
+"""
+import pytest
+
+import rate_limiter
+from rate_limiter import TokenBucket
+
+
+class FakeClock:
+    """Stands in for the time module: sleep() just advances monotonic()"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake clock installed in rate_limiter"""
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", fake)
+    return fake
+
+
+def test_burst_then_request_pacing(clock):
+    """A full bucket allows rpm requests at once, then one per 60 / rpm seconds"""
+    bucket = TokenBucket(rpm=60, tpm=100_000)
+
+    assert all(bucket.acquire() == 0 for _ in range(60))
+    assert bucket.acquire() == pytest.approx(1.0)
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test_token_pacing(clock):
+    """Requests wait until enough tokens have refilled"""
+    bucket = TokenBucket(rpm=1000, tpm=1200)
+
+    assert bucket.acquire(estimated_tokens=1200) == 0
+    # 600 tokens at 20 tokens per second
+    assert bucket.acquire(estimated_tokens=600) == pytest.approx(30.0)
+
+
+def test_estimate_capped_at_tpm(clock):
+    """A request larger than the whole minute budget waits for a full bucket, not forever"""
+    bucket = TokenBucket(rpm=1000, tpm=1200)
+
+    assert bucket.acquire(estimated_tokens=5000) == 0
+    assert bucket.acquire(estimated_tokens=5000) == pytest.approx(60.0)
@@ -0,0 +1,68 @@
+"""
+Unit tests for the semantic response cache (no models or network needed)
+
+    pytest test_semantic_cache.py
+"""
+import semantic_cache
+from semantic_cache import SemanticCache
+
+
+class FakeClock:
+    """Stands in for the time module so TTL tests do not sleep"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def test_threshold():
+    """Only queries at least `threshold` cosine-similar to a stored one hit"""
+    # No LSH bits: every vector shares one bucket, so only the cosine check decides
+    cache = SemanticCache(threshold=0.95, n_bits=0)
+    cache.set([1.0, 0.0, 0.0], "answer")
+
+    assert cache.get([2.0, 0.1, 0.0]) == "answer"  # Scale-invariant, cosine ~0.999
+    assert cache.get([1.0, 1.0, 0.0]) is None  # Cosine ~0.71
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_namespaces_are_isolated():
+    """An entry is only visible in the namespace it was stored under"""
+    cache = SemanticCache()
+    cache.set([0.3, 0.4, 0.5], "patient a", namespace="a")
+    cache.set([0.3, 0.4, 0.5], "patient b", namespace="b")
+
+    assert cache.get([0.3, 0.4, 0.5], namespace="a") == "patient a"
+    assert cache.get([0.3, 0.4, 0.5], namespace="b") == "patient b"
+    assert cache.get([0.3, 0.4, 0.5]) is None
+
+
+def test_ttl_expiry(monkeypatch):
+    """Entries older than ttl_s are ignored"""
+    clock = FakeClock()
+    monkeypatch.setattr(semantic_cache, "time", clock)
+    cache = SemanticCache(ttl_s=60)
+    cache.set([1.0, 2.0, 3.0], "fresh")
+
+    clock.now += 59
+    assert cache.get([1.0, 2.0, 3.0]) == "fresh"
+    clock.now += 2
+    assert cache.get([1.0, 2.0, 3.0]) is None
+
+
+def test_lru_eviction():
+    """The least recently used entry is evicted once max_entries is exceeded"""
+    cache = SemanticCache(max_entries=2)
+    cache.set([1.0, 0.0, 0.0], "a")
+    cache.set([0.0, 1.0, 0.0], "b")
+    assert cache.get([1.0, 0.0, 0.0]) == "a"  # "b" is now the oldest
+    cache.set([0.0, 0.0, 1.0], "c")
+
+    assert cache.get([0.0, 1.0, 0.0]) is None
+    assert cache.get([1.0, 0.0, 0.0]) == "a"
+    assert cache.get([0.0, 0.0, 1.0]) == "c"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
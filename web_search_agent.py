@@ -3,7 +3,15 @@ Web Search Agent - Simple Tool + LLM (version-safe)
 Uses DuckDuckGo tool to fetch results, then Groq LLM to synthesize an answer
 """
 import os
-from typing import Dict, List, Optional
+import bisect
+import hashlib
+import queue
+import threading
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+from concurrent.futures import Future
+from typing import Dict, Generator, Iterator, List, Optional, Tuple, Union
 from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 
@@ -13,22 +21,152 @@ try:
         DuckDuckGoSearchResults,
         DuckDuckGoSearchRun,
     )
+    from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
     _HAS_COMMUNITY = True
 except Exception:  # pragma: no cover
     _HAS_COMMUNITY = False
     DuckDuckGoSearchResults = None  # type: ignore
+    DuckDuckGoSearchAPIWrapper = None  # type: ignore
     try:
         from langchain.tools import DuckDuckGoSearchRun  # Older LC provided this
     except Exception:  # pragma: no cover
         DuckDuckGoSearchRun = None  # type: ignore
 
+# Instant Answers endpoint: only duckduckgo-search 6.x has DDGS.answers(), ddgs dropped it (optional)
+try:
+    from duckduckgo_search import DDGS as InstantAnswerDDGS
+    if not hasattr(InstantAnswerDDGS, "answers"):
+        InstantAnswerDDGS = None
+except ImportError:
+    InstantAnswerDDGS = None
+
+# Answer cache that survives restarts (optional)
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+# Export query counters to Prometheus (optional)
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
 from config import GROQ_API_KEY, GROQ_MODEL, TEMPERATURE, MEDICAL_DISCLAIMER
 from logger_system import get_logger
+from rate_limiter import get_groq_callbacks
+
+
+# Disclaimer text as it appears in a finished answer
+_DISCLAIMER = MEDICAL_DISCLAIMER.strip()
+
+# Answer cache: fresh entries are returned as-is; stale ones are returned
+# immediately while a background refresh replaces them
+ANSWER_CACHE_MAX_ENTRIES = 256
+ANSWER_CACHE_FRESH_S = 600
+ANSWER_CACHE_STALE_S = 3600
+
+# On-disk copy of the answer cache; keys include GROQ_MODEL, so a model change starts empty
+ANSWER_DISK_CACHE_DIR = Path(".cache/web_search")
+ANSWER_DISK_CACHE_SIZE_LIMIT = 200 * 1024 * 1024
+ANSWER_DISK_CACHE_TTL_S = ANSWER_CACHE_STALE_S  # Older answers are never served, so diskcache drops them
+
+# A DuckDuckGo Instant Answer is returned without LLM synthesis only when it is
+# filed under a medical topic and long enough
+INSTANT_ANSWER_TOPICS = {"Medicine", "Health"}
+INSTANT_ANSWER_MIN_CHARS = 150
+
+# answer_query latency histogram (upper bounds in seconds) and how often to log the stats
+LATENCY_BUCKETS_S = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+STATS_LOG_EVERY = 100
+
+if prometheus_client is not None:
+    _PROM_QUERIES = prometheus_client.Counter(
+        "web_search_queries_total", "Web search answers by outcome", ["outcome"]
+    )
+    _PROM_LATENCY = prometheus_client.Histogram(
+        "web_search_answer_seconds", "Time to a complete web search answer",
+        buckets=LATENCY_BUCKETS_S
+    )
+
+# DuckDuckGo throttles bursts: cap concurrent searches per agent and back off on errors
+SEARCH_MAX_CONCURRENCY = 4
+SEARCH_RETRIES = 3
+SEARCH_BACKOFF_S = 0.5  # Doubled after every failed attempt
+
+SYNTHESIS_INSTRUCTIONS = """You are a helpful medical information assistant. Using ONLY the search results provided, 
+provide a concise, accurate answer to the user's question. If the results are not relevant, say so clearly.
+Always include a short list of cited URLs if present in the results and end with the medical disclaimer."""
+
+
+def _normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive cache key"""
+    return " ".join(question.lower().split())
+
+
+if DuckDuckGoSearchAPIWrapper is not None:
+    from pydantic import PrivateAttr
+    
+    class _PooledDDGSWrapper(DuckDuckGoSearchAPIWrapper):
+        """
+        DuckDuckGo wrapper that keeps its DDGS clients between searches
+        
+        The stock wrapper opens a new DDGS (and HTTP client) per query, paying
+        DNS, TCP and TLS setup every time. Here each search borrows an idle
+        client from a pool and returns it afterwards, so connections stay warm.
+        The pool grows to at most the number of concurrent searches.
+        """
+        
+        _clients: queue.SimpleQueue = PrivateAttr(default_factory=queue.SimpleQueue)
+        
+        def _borrow(self):
+            """Take an idle DDGS client from the pool, creating one if none is idle"""
+            try:
+                return self._clients.get_nowait()
+            except queue.Empty:
+                from ddgs import DDGS
+                return DDGS()
+        
+        def _ddgs_text(self, query: str, max_results: Optional[int] = None) -> List[Dict[str, str]]:
+            """Run query through DuckDuckGo text search on a pooled client"""
+            ddgs = self._borrow()
+            results = ddgs.text(
+                query,
+                region=self.region,
+                safesearch=self.safesearch,
+                timelimit=self.time,
+                max_results=max_results or self.max_results,
+                backend=self.backend,
+            )
+            # Only a client whose search succeeded goes back into the pool
+            self._clients.put(ddgs)
+            return list(results or [])
+
+
+def _final_result(stream: Iterator[Union[str, Dict]]) -> Dict[str, any]:
+    """Drain a stream_query-style generator and return its result dict"""
+    result = None
+    for item in stream:
+        if isinstance(item, dict):
+            result = item
+    return result
 
 
 class WebSearchAgent:
     """Perform web searches with DuckDuckGo and summarize with Groq LLM"""
     
+    # Parsed once at import; each answer only fills in the variables
+    _PROMPT = PromptTemplate.from_template(
+        SYNTHESIS_INSTRUCTIONS + """
+
+Search Results:
+{search_results}
+
+Question: {question}
+
+Final Answer:"""
+    )
+    
     def __init__(self):
         """Initialize the web search agent (version-safe)"""
         self.logger = get_logger()
@@ -37,7 +175,7 @@ class WebSearchAgent:
         # Initialize DuckDuckGo tools
         if _HAS_COMMUNITY and DuckDuckGoSearchResults is not None:
             # Returns structured results (list of dicts) as a stringified summary
-            self.search_tool_results = DuckDuckGoSearchResults()
+            self.search_tool_results = DuckDuckGoSearchResults(api_wrapper=_PooledDDGSWrapper())
         else:
             # Fallback: returns a text summary of top results
             if DuckDuckGoSearchRun is None:
@@ -50,9 +188,25 @@ class WebSearchAgent:
         self.llm = ChatGroq(
             temperature=TEMPERATURE,
             model=GROQ_MODEL,
-            api_key=GROQ_API_KEY
+            api_key=GROQ_API_KEY,
+            callbacks=get_groq_callbacks()
         )
         
+        # normalized question -> (time answered, result), least recently used first
+        self._cache: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._refreshing = set()
+        self._disk = self._open_disk_cache()
+        
+        self._search_slots = threading.BoundedSemaphore(SEARCH_MAX_CONCURRENCY)
+        self._inflight: Dict[str, Future] = {}  # normalized question -> search in progress
+        self._inflight_lock = threading.Lock()
+        
+        # Usage counters: cache hits/misses, errors, instant answers, latency buckets
+        self._stats: Counter = Counter()
+        self._latency = [0] * len(LATENCY_BUCKETS_S)
+        self._stats_lock = threading.Lock()
+        
         self.logger.log_agent_action(
             "WebSearchAgent",
             "Initialized",
@@ -63,12 +217,223 @@ class WebSearchAgent:
         """
         Answer a question using DuckDuckGo + Groq LLM
         
+        Answers to the same (normalized) question are reused for
+        ANSWER_CACHE_FRESH_S; up to ANSWER_CACHE_STALE_S the cached answer is
+        still returned at once and refreshed in the background.
+        
         Args:
             question: User's question
             
         Returns:
             Dict with answer, sources, and metadata
         """
+        return _final_result(self.stream_query(question))
+    
+    def stream_query(self, question: str) -> Iterator[Union[str, Dict]]:
+        """
+        Answer a question, yielding the synthesized answer as Groq generates it
+        
+        Args:
+            question: User's question
+            
+        Yields:
+            Text chunks of the answer while it is generated (the medical
+            disclaimer, if appended, arrives as the last chunk), then the same
+            dict answer_query returns. Cached and instant answers yield only
+            the dict.
+        """
+        start = time.perf_counter()
+        key = _normalize_question(question)
+        
+        cached = self._cached(key, question)
+        if cached is not None:
+            self._record("hit", time.perf_counter() - start)
+            yield cached
+            return
+        
+        for item in self._stream_uncached(question):
+            if isinstance(item, dict):
+                self._store(key, item)
+                self._record("miss" if item.get("success") else "error", time.perf_counter() - start)
+            yield item
+    
+    def _record(self, outcome: str, seconds: float) -> None:
+        """Count one answer_query outcome and its latency, logging the totals every STATS_LOG_EVERY queries"""
+        with self._stats_lock:
+            self._stats[outcome] += 1
+            self._stats["queries"] += 1
+            self._latency[bisect.bisect_left(LATENCY_BUCKETS_S, seconds)] += 1
+            due = self._stats["queries"] % STATS_LOG_EVERY == 0
+        
+        if prometheus_client is not None:
+            _PROM_QUERIES.labels(outcome=outcome).inc()
+            _PROM_LATENCY.observe(seconds)
+        
+        if due:
+            self.logger.log_system_event("Web search stats", str(self.get_stats()))
+    
+    def get_stats(self) -> Dict:
+        """Get answer counters, cache size and the latency histogram"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            latency = {
+                f"<={bound:g}s" if bound != float("inf") else f">{LATENCY_BUCKETS_S[-2]:g}s": count
+                for bound, count in zip(LATENCY_BUCKETS_S, self._latency)
+            }
+        queries = stats.get("queries", 0)
+        stats["hit_rate"] = stats.get("hit", 0) / queries if queries else 0.0
+        stats["cache_entries"] = len(self._cache)
+        stats["latency"] = latency
+        return stats
+    
+    def _stream_llm(self, prompt: str) -> Generator[str, None, str]:
+        """
+        Stream an LLM completion (paced by the client's Groq rate limit callback)
+        
+        Args:
+            prompt: Prompt string
+            
+        Yields:
+            Text chunks as Groq produces them
+            
+        Returns:
+            The full completion, stripped
+        """
+        parts = []
+        for chunk in self.llm.stream(prompt):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
+        return "".join(parts).strip()
+    
+    def _search(self, question: str) -> str:
+        """
+        Run a DuckDuckGo search, sharing the result with identical searches in flight
+        
+        Concurrent searches for the same normalized question (e.g. from two
+        sessions at once) wait for the first one instead of querying
+        DuckDuckGo again.
+        
+        Args:
+            question: Search query
+            
+        Returns:
+            Search tool output
+        """
+        key = _normalize_question(question)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            output = self._run_search(question)
+            future.set_result(output)
+            return output
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+    
+    def _run_search(self, question: str) -> str:
+        """Search DuckDuckGo, at most SEARCH_MAX_CONCURRENCY at once, retrying with exponential backoff"""
+        with self._search_slots:
+            for attempt in range(SEARCH_RETRIES):
+                try:
+                    return self.search_tool_results.run(question)
+                except Exception:
+                    if attempt == SEARCH_RETRIES - 1:
+                        raise
+                    time.sleep(SEARCH_BACKOFF_S * 2 ** attempt)
+    
+    def _open_disk_cache(self):
+        """Open the on-disk answer cache, or return None if diskcache is unavailable"""
+        if diskcache is None:
+            return None
+        try:
+            return diskcache.Cache(str(ANSWER_DISK_CACHE_DIR), size_limit=ANSWER_DISK_CACHE_SIZE_LIMIT)
+        except Exception as e:
+            self.logger.log_error("WebSearchDiskCacheError", str(e), {"path": str(ANSWER_DISK_CACHE_DIR)})
+            return None
+    
+    @staticmethod
+    def _disk_key(key: str) -> str:
+        """Disk cache key for a normalized question under the current model"""
+        return hashlib.blake2b(f"{GROQ_MODEL}\0{key}".encode(), digest_size=16).hexdigest()
+    
+    def _cached(self, key: str, question: str) -> Optional[Dict[str, any]]:
+        """
+        Look a question up in memory, then on disk
+        
+        A disk hit keeps its age when loaded into memory, so it is fresh or
+        stale exactly as it would have been in memory; answers older than
+        ANSWER_CACHE_STALE_S are misses.
+        """
+        cached = self._lookup(key, question)
+        if cached is not None or self._disk is None:
+            return cached
+        
+        entry = self._disk.get(self._disk_key(key))
+        if entry is None:
+            return None
+        saved_at, result = entry
+        age = time.time() - saved_at
+        if age >= ANSWER_CACHE_STALE_S:
+            return None
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic() - age, result)
+        return self._lookup(key, question)
+    
+    def _lookup(self, key: str, question: str) -> Optional[Dict[str, any]]:
+        """Return a cached answer, scheduling a background refresh if it is stale"""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            age = time.monotonic() - entry[0]
+            if age >= ANSWER_CACHE_STALE_S:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            if age >= ANSWER_CACHE_FRESH_S and key not in self._refreshing:
+                self._refreshing.add(key)
+                threading.Thread(
+                    target=self._refresh, args=(key, question), daemon=True
+                ).start()
+            return dict(entry[1])
+    
+    def _refresh(self, key: str, question: str) -> None:
+        """Recompute a stale cached answer"""
+        try:
+            self._store(key, self._answer_uncached(question))
+        finally:
+            with self._cache_lock:
+                self._refreshing.discard(key)
+    
+    def _store(self, key: str, result: Dict) -> None:
+        """Cache a successful answer, evicting the least recently used beyond the limit"""
+        if not result.get("success"):
+            return
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), dict(result))
+            self._cache.move_to_end(key)
+            while len(self._cache) > ANSWER_CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+        if self._disk is not None:
+            self._disk.set(self._disk_key(key), (time.time(), dict(result)), expire=ANSWER_DISK_CACHE_TTL_S)
+    
+    def _answer_uncached(self, question: str) -> Dict[str, any]:
+        """Search DuckDuckGo and synthesize an answer with Groq"""
+        return _final_result(self._stream_uncached(question))
+    
+    def _stream_uncached(self, question: str) -> Iterator[Union[str, Dict]]:
+        """Search DuckDuckGo and stream the Groq synthesis, then yield the result dict"""
         self.logger.log_agent_action(
             "WebSearchAgent",
             "ProcessingQuery",
@@ -76,38 +441,24 @@ class WebSearchAgent:
         )
         
         try:
-            # 1) Perform web search (returns text summary for Run, JSON-like text for Results)
-            search_output = self.search_tool_results.run(question)
+            # 0) A direct DuckDuckGo answer needs no synthesis
+            instant = self._instant_answer(question)
+            if instant is not None:
+                yield instant
+                return
             
-            # 2) Build synthesis prompt
-            prompt = PromptTemplate.from_template(
-                """You are a helpful medical information assistant. Using ONLY the search results provided, 
-provide a concise, accurate answer to the user's question. If the results are not relevant, say so clearly.
-Always include a short list of cited URLs if present in the results and end with the medical disclaimer.
-
-Search Results:
-{search_results}
-
-Question: {question}
-
-Final Answer:"""
-            )
-            final_prompt = prompt.format(search_results=search_output, question=question)
-            
-            # 3) Call LLM
-            answer = self.llm.invoke(final_prompt).content.strip()
-            
-            # Ensure medical disclaimer is included
-            if MEDICAL_DISCLAIMER.strip() not in answer:
-                answer += f"\n\n{MEDICAL_DISCLAIMER}"
+            # 1) Perform web search (returns text summary for Run, JSON-like text for Results)
+            search_output = self._search(question)
             
-            self.logger.log_agent_response("WebSearchAgent", answer)
+            # 2) Stream the answer synthesized from the results
+            final_prompt = self._PROMPT.format(search_results=search_output, question=question)
+            answer = yield from self._stream_llm(final_prompt)
             
-            return {
-                "answer": answer,
-                "sources": [],  # URLs are included within the synthesized answer
-                "success": True
-            }
+            result = self._finish_answer(answer)
+            if len(result["answer"]) > len(answer):
+                # Disclaimer appended after the stream
+                yield result["answer"][len(answer):]
+            yield result
             
         except Exception as e:
             self.logger.log_error(
@@ -115,12 +466,63 @@ Final Answer:"""
                 str(e),
                 {"question": question}
             )
-            return {
+            yield {
                 "answer": f"An error occurred while searching: {str(e)}. Please try rephrasing your question or consult with a healthcare professional.",
                 "sources": [],
                 "success": False
             }
     
+    def _instant_answer(self, question: str) -> Optional[Dict[str, any]]:
+        """Return DuckDuckGo's Instant Answer as the result if it is a confident medical answer"""
+        if InstantAnswerDDGS is None:
+            return None
+        
+        try:
+            answers = list(InstantAnswerDDGS().answers(question) or [])
+        except Exception:
+            # Instant answers are best-effort; the regular search still runs
+            answers = []
+        
+        hit = next(
+            (
+                a for a in answers
+                if a.get("topic") in INSTANT_ANSWER_TOPICS
+                and len(a.get("text") or "") >= INSTANT_ANSWER_MIN_CHARS
+            ),
+            None
+        )
+        
+        with self._stats_lock:
+            self._stats["instant_lookups"] += 1
+            self._stats["instant_hits"] += hit is not None
+            counts = {"hits": self._stats["instant_hits"], "lookups": self._stats["instant_lookups"]}
+        self.logger.log_agent_action(
+            "WebSearchAgent",
+            "InstantAnswerHit" if hit else "InstantAnswerMiss",
+            counts
+        )
+        
+        if hit is None:
+            return None
+        
+        answer = hit["text"].strip()
+        if hit.get("url"):
+            answer += f"\n\nSource: {hit['url']}"
+        return self._finish_answer(answer)
+    
+    def _finish_answer(self, answer: str) -> Dict[str, any]:
+        """Append the medical disclaimer if missing and wrap the answer in a result dict"""
+        if _DISCLAIMER not in answer:
+            answer += f"\n\n{MEDICAL_DISCLAIMER}"
+        
+        self.logger.log_agent_response("WebSearchAgent", answer)
+        
+        return {
+            "answer": answer,
+            "sources": [],  # URLs are included within the synthesized answer
+            "success": True
+        }
+    
     def run(self, query: str) -> str:
         """
         Main method to run web search and get answer
@@ -147,6 +549,20 @@ Final Answer:"""
         return answer
 
 
+# Global singleton instance
+_web_search_agent: Optional[WebSearchAgent] = None
+_web_search_agent_lock = threading.Lock()
+
+
+def get_web_search_agent() -> WebSearchAgent:
+    """Get or create the global web search agent, so the Groq client and search tool are built once"""
+    global _web_search_agent
+    with _web_search_agent_lock:
+        if _web_search_agent is None:
+            _web_search_agent = WebSearchAgent()
+    return _web_search_agent
+
+
 # Standalone function for agent tool integration
 def search_web_for_medical_info(query: str) -> str:
     """
@@ -158,8 +574,7 @@ def search_web_for_medical_info(query: str) -> str:
     Returns:
         Answer with sources and disclaimer
     """
-    agent = WebSearchAgent()
-    return agent.run(query)
+    return get_web_search_agent().run(query)
 
 
 # Test the agent
@@ -173,5 +588,13 @@ if __name__ == "__main__":
     print(f"\nQuery: {test_query}")
     print("-" * 80)
     
-    answer = agent.run(test_query)
-    print(f"\nAnswer:\n{answer}")
+    print("\nAnswer:")
+    streamed = False
+    for item in agent.stream_query(test_query):
+        if isinstance(item, str):
+            print(item, end="", flush=True)
+            streamed = True
+        elif not streamed:
+            # Cached and instant answers arrive whole
+            print(item["answer"], end="")
+    print()